@@ -0,0 +1,38 @@
+from benchmarks.fakes import StaticBackend
+from benchmarks.framework import BenchmarkClassBase, benchmarkmethod
+from benchmarks.payloads import login_response_json, make_sync_response
+import json
+import pymatrix.api
+import pymatrix.constants
+
+class GenericCallBenchmarks(BenchmarkClassBase):
+    """
+    Measures the cost of ApiBase.generic_call itself: building, formatting
+    and serialising the request, then decoding and deserialising the
+    response, against a backend answering instantly
+    """
+
+    def benchmark_init(self):
+        self.login_api = pymatrix.api.RestApi(backend=StaticBackend(
+            json.dumps(login_response_json).encode("utf-8")))
+        self.sync_api = pymatrix.api.RestApi(backend=StaticBackend(
+            json.dumps(make_sync_response(20, 20)).encode("utf-8")))
+        self.sync_api.access_token = "ABCDE123456"
+
+    @benchmarkmethod
+    async def generic_call_login(self):
+        await self.login_api.generic_call(
+            pymatrix.constants.EndpointNamesEnum.Login,
+            user="local_username", password="correct_password")
+
+    @benchmarkmethod
+    async def generic_call_sync_medium(self):
+        await self.sync_api.generic_call(
+            pymatrix.constants.EndpointNamesEnum.Sync,
+            since="s72595_4483_1934", timeout=30000)
+
+    @benchmarkmethod
+    async def generic_call_raw_sync_medium(self):
+        await self.sync_api.generic_call_raw(
+            pymatrix.constants.EndpointNamesEnum.Sync,
+            since="s72595_4483_1934", timeout=30000)
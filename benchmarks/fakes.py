@@ -0,0 +1,41 @@
+import pymatrix.backend.base
+import pymatrix.backend.http
+import asyncio
+import inspect
+
+class StaticBackend(pymatrix.backend.base.BackendBase):
+    """
+    An in-process backend answering every message with the same response,
+    so that only the cost of the layers above the backend is measured.
+    With a delay, every response takes that many seconds to arrive.
+    """
+
+    def __init__(self, body, status=200, delay=0):
+        self.body = body
+        self.status = status
+        self.delay = delay
+
+    async def connect(self, hostname, port):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def write_event(self, message, raw=False):
+        if(self.delay):
+            await asyncio.sleep(self.delay)
+        if(raw):
+            return pymatrix.backend.http.RawResponse(self.body, self.status)
+        return pymatrix.backend.http.Response(self.body, self.status >= 400,
+            self.status)
+
+    async def read_events(self, next_message):
+        message = next_message(None)
+        if(inspect.isawaitable(message)):
+            message = await message
+        while(message is not None):
+            response = await self.write_event(message)
+            message = next_message(response)
+            if(inspect.isawaitable(message)):
+                message = await message
+            yield response
@@ -0,0 +1,163 @@
+import asyncio
+import inspect
+import math
+import time
+import tracemalloc
+
+### constants
+is_benchmark_method = "is_benchmark_method"
+
+DEFAULT_ITERATIONS = 1000
+DEFAULT_WARMUP = 10
+# percentiles reported for every benchmark
+PERCENTILES = (50, 90, 99)
+
+### functions
+def benchmarkmethod(func):
+    """Decorator for marking benchmark methods. A benchmark method runs the
+    measured operation once; it may be a coroutine function."""
+    func.__dict__[is_benchmark_method] = True
+    return func
+
+def _is_benchmark_method(func):
+    return inspect.ismethod(func) \
+        and func.__func__.__dict__.get(is_benchmark_method, False)
+
+def percentile(sorted_samples, rank):
+    """Returns the nearest-rank percentile of sorted samples"""
+    index = max(0, math.ceil(rank / 100 * len(sorted_samples)) - 1)
+    return sorted_samples[index]
+
+### classes
+class BenchmarkClassBase:
+    """Base class of a set of benchmarks sharing their fixtures"""
+
+    def benchmark_init(self):
+        """Method to initialise fixtures before the benchmarks of the class
+        run; may be a coroutine function. Should be overridden in a
+        benchmark class for it to do anything."""
+        pass
+
+    def benchmark_cleanup(self):
+        """Method to cleanup after the benchmarks of the class have run.
+        Should be overridden in a benchmark class for it to do anything."""
+        pass
+
+class BenchmarkResult:
+    def __init__(self, name, samples, peak_bytes, retained_bytes):
+        """
+        samples: durations of each operation, in seconds
+        peak_bytes: highest memory allocated during one operation
+        retained_bytes: memory still allocated after one operation, on
+            average
+        """
+        sorted_samples = sorted(samples)
+        self.name = name
+        self.iterations = len(samples)
+        self.mean = sum(samples) / len(samples)
+        self.ops_per_second = 1 / self.mean if self.mean > 0 else math.inf
+        self.percentiles = dict((rank, percentile(sorted_samples, rank))
+            for rank in PERCENTILES)
+        self.peak_bytes = peak_bytes
+        self.retained_bytes = retained_bytes
+
+    def as_dict(self):
+        return {
+            "iterations": self.iterations,
+            "ops_per_second": self.ops_per_second,
+            "mean_us": self.mean * 1000000,
+            "percentiles_us": dict(("p{}".format(rank), value * 1000000)
+                for rank, value in self.percentiles.items()),
+            "peak_bytes": self.peak_bytes,
+            "retained_bytes": self.retained_bytes
+            }
+
+    def __repr__(self):
+        return "{}: {:.0f} ops/s, mean {:.2f}µs, {}, peak {}B, " \
+            "retained {:.0f}B".format(self.name, self.ops_per_second,
+                self.mean * 1000000,
+                ", ".join("p{} {:.2f}µs".format(rank, value * 1000000)
+                    for rank, value in self.percentiles.items()),
+                self.peak_bytes, self.retained_bytes)
+
+class BenchmarkRunner:
+    """
+    Runs the benchmark methods of a class. Timings and allocations are
+    measured in separate passes, as tracing allocations slows every
+    operation down.
+    """
+
+    def __init__(self, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+        name_filter=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.name_filter = name_filter
+
+    async def _time(self, func, is_async):
+        perf_counter = time.perf_counter
+        samples = []
+        for i in range(0, self.warmup):
+            if(is_async):
+                await func()
+            else:
+                func()
+        for i in range(0, self.iterations):
+            start = perf_counter()
+            if(is_async):
+                await func()
+            else:
+                func()
+            samples.append(perf_counter() - start)
+        return samples
+
+    async def _trace_allocations(self, func, is_async):
+        iterations = max(1, self.iterations // 10)
+        tracemalloc.start()
+        try:
+            peak = 0
+            start_size = tracemalloc.get_traced_memory()[0]
+            for i in range(0, iterations):
+                current = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                if(is_async):
+                    await func()
+                else:
+                    func()
+                peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+            retained = (tracemalloc.get_traced_memory()[0] - start_size) \
+                / iterations
+        finally:
+            tracemalloc.stop()
+        return peak, retained
+
+    async def _run_method(self, name, func):
+        is_async = inspect.iscoroutinefunction(func)
+        samples = await self._time(func, is_async)
+        peak, retained = await self._trace_allocations(func, is_async)
+        return BenchmarkResult(name, samples, peak, retained)
+
+    def run_from_class(self, cls):
+        assert inspect.isclass(cls)
+        obj = cls()
+        methods = [("{}.{}".format(cls.__name__, name), method)
+            for name, method
+            in inspect.getmembers(obj, predicate=_is_benchmark_method)]
+        if(self.name_filter is not None):
+            methods = [(name, method) for name, method in methods
+                if self.name_filter in name]
+        if(not methods):
+            return []
+
+        loop = asyncio.get_event_loop()
+        self._run_fixture(loop, obj.benchmark_init)
+        try:
+            return [loop.run_until_complete(self._run_method(name, method))
+                for name, method in methods]
+        finally:
+            self._run_fixture(loop, obj.benchmark_cleanup)
+
+    def _run_fixture(self, loop, fixture):
+        if(inspect.iscoroutinefunction(fixture)):
+            loop.run_until_complete(fixture())
+        else:
+            fixture()
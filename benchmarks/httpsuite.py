@@ -0,0 +1,61 @@
+from benchmarks.framework import BenchmarkClassBase, benchmarkmethod
+from benchmarks.payloads import make_sync_response
+from pymatrix_tests.integration_tests.helpers.mock_matrix_server import StaticResponseHTTPRequestHandler
+import http
+import http.server
+import json
+import threading
+import pymatrix.backend.http
+
+server_hostname = "localhost"
+server_port = 49993
+
+class _QuietRequestHandler(StaticResponseHTTPRequestHandler):
+    # HTTP/1.1 so that connections are kept alive between requests
+    protocol_version = "HTTP/1.1"
+
+    def send_static_response(self):
+        body = StaticResponseHTTPRequestHandler.response_body.encode("utf-8")
+        self.send_response_only(StaticResponseHTTPRequestHandler.status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class HttpRoundTripBenchmarks(BenchmarkClassBase):
+    """
+    Measures round trips of HttpBackend.write_event against the local
+    static response server used by the integration tests
+    """
+
+    async def benchmark_init(self):
+        StaticResponseHTTPRequestHandler.setup_response(http.HTTPStatus.OK,
+            json.dumps(make_sync_response(20, 20)))
+        self.server = http.server.ThreadingHTTPServer(
+            (server_hostname, server_port), _QuietRequestHandler)
+        self.server_thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05})
+        self.server_thread.start()
+        self.backend = pymatrix.backend.http.HttpBackend()
+        await self.backend.connect(server_hostname, server_port)
+
+    async def benchmark_cleanup(self):
+        await self.backend.disconnect()
+        self.server.shutdown()
+        self.server_thread.join()
+        self.server.server_close()
+        StaticResponseHTTPRequestHandler.response_body = None
+        StaticResponseHTTPRequestHandler.status_code = None
+
+    @benchmarkmethod
+    async def write_event_sync_medium(self):
+        await self.backend.write_event(pymatrix.backend.http.RestMessage(
+            url="/_matrix/client/r0/sync"))
+
+    @benchmarkmethod
+    async def write_event_raw_sync_medium(self):
+        await self.backend.write_event(pymatrix.backend.http.RestMessage(
+            url="/_matrix/client/r0/sync"), raw=True)
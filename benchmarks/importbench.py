@@ -0,0 +1,72 @@
+"""
+Measures the cold start of the package: how long importing its entry
+modules takes in a fresh interpreter, from the -X importtime report, and
+which modules take the longest. Run from the repository root with:
+
+    python -m benchmarks.importbench [--runs N] [--top N] [module ...]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["pymatrix.client", "pymatrix.api", "pymatrix.injection"]
+DEFAULT_RUNS = 10
+DEFAULT_TOP = 5
+
+def parse_importtime(report):
+    """
+    Returns the (module, self µs, cumulative µs) tuples of a -X importtime
+    report, in the order the imports completed
+    """
+    imports = []
+    for line in report.splitlines():
+        if(not line.startswith("import time:")):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if(not fields[0].strip().isdigit()):
+            continue # the header
+        imports.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return imports
+
+def measure_import(module):
+    """
+    Imports the module in a fresh interpreter; returns the parsed
+    -X importtime report and whether aiohttp was executed
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c",
+        "import sys, {}; print('aiohttp.client' in sys.modules)".format(
+            module)],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return parse_importtime(process.stderr), process.stdout.strip() == "True"
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measures the import time of pymatrix modules.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+        help="fresh interpreters started per module")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP,
+        help="slowest imports listed per module")
+    arguments = parser.parse_args()
+
+    for module in arguments.modules:
+        totals = []
+        for i in range(0, arguments.runs):
+            imports, aiohttp_loaded = measure_import(module)
+            totals.append(sum(self_time for name, self_time, cumulative
+                in imports))
+        # the imports of the last run, sorted by self time
+        slowest = sorted(imports, key=lambda entry: entry[1],
+            reverse=True)[:arguments.top]
+        print("{}: median {:.1f}ms, min {:.1f}ms over {} runs, {} modules, "
+            "aiohttp {}".format(module, statistics.median(totals) / 1000,
+                min(totals) / 1000, arguments.runs, len(imports),
+                "loaded" if aiohttp_loaded else "deferred"))
+        for name, self_time, cumulative in slowest:
+            print("    {}: {:.1f}ms".format(name, self_time / 1000))
+
+if __name__ == "__main__":
+    main()
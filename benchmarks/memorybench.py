@@ -0,0 +1,59 @@
+"""
+Measures the memory used by deserialised response messages and the cost of
+reading their members, with and without __slots__. Run from the repository
+root with:
+
+    python -m benchmarks.memorybench
+"""
+import time
+import tracemalloc
+import pymatrix.serialisation
+import pymatrix.specification.base
+import pymatrix.specification.r0.login
+
+nb_objects = 10000
+
+login_response_json = {
+    "user_id": "@local_username:localhost",
+    "access_token": "ABCDE123456",
+    "home_server": "localhost",
+    "device_id": "DEVICE123"
+    }
+
+def _unslotted_copy(cls):
+    """Rebuilds a slotted message class as a regular one"""
+    namespace = dict((name, member) for name, member in cls.__dict__.items()
+        if name != "__slots__" and name not in cls.__slots__)
+    return type(cls.__name__, cls.__bases__, namespace)
+
+def _measure_memory(serialiser, type):
+    tracemalloc.start()
+    start_size = tracemalloc.get_traced_memory()[0]
+    objects = [serialiser.deserialise(login_response_json, type)
+        for i in range(0, nb_objects)]
+    size = tracemalloc.get_traced_memory()[0] - start_size
+    tracemalloc.stop()
+    return objects, size / nb_objects
+
+def _measure_access(objects):
+    start = time.perf_counter()
+    for obj in objects:
+        obj.user_id
+        obj.access_token
+        obj.home_server
+        obj.device_id
+    return (time.perf_counter() - start) * 1000000000 / (len(objects) * 4)
+
+def main():
+    serialiser = pymatrix.serialisation.JsonSerialiser()
+    slotted_type = pymatrix.specification.r0.login.LoginResponseMessage
+    unslotted_type = _unslotted_copy(slotted_type)
+
+    for name, type in [("dict", unslotted_type), ("slots", slotted_type)]:
+        objects, size = _measure_memory(serialiser, type)
+        access = _measure_access(objects)
+        print("LoginResponseMessage with {}: {:.0f} bytes/object, "
+            "{:.1f}ns/member read".format(name, size, access))
+
+if __name__ == "__main__":
+    main()
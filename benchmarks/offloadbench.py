@@ -0,0 +1,49 @@
+"""
+Measures how long the event loop is blocked while large sync responses are
+decoded and deserialised, with and without offloading them to the default
+executor. Run from the repository root with:
+
+    python -m benchmarks.offloadbench
+"""
+from benchmarks.fakes import StaticBackend
+import asyncio
+import json
+import pymatrix.api
+import pymatrix.constants
+import pymatrix.monitoring
+
+nb_calls = 10
+nb_rooms = 2000
+
+sync_response_body = json.dumps({
+    "next_batch": "s72595_4483_1934",
+    "rooms": {"join": dict(("!room_{}:localhost".format(index), {
+        "timeline": {"events": [{"type": "m.room.message",
+            "sender": "@user:localhost",
+            "content": {"body": "message {}".format(event)}}
+            for event in range(0, 10)]}}) for index in range(0, nb_rooms))}
+    }).encode("utf-8")
+
+async def _measure(offload_threshold):
+    api = pymatrix.api.RestApi(backend=StaticBackend(sync_response_body,
+        delay=0.001),
+        offload_threshold=offload_threshold)
+    monitor = pymatrix.monitoring.LoopLagMonitor(interval=0.005)
+    monitor.start()
+    for i in range(0, nb_calls):
+        await api.generic_call(pymatrix.constants.EndpointNamesEnum.Sync)
+    await monitor.stop()
+    return monitor.statistics
+
+def main():
+    print("sync response of {:.1f}MB, {} calls".format(
+        len(sync_response_body) / 1024 / 1024, nb_calls))
+    for name, threshold in [("in the loop", None),
+        ("offloaded", pymatrix.api.DEFAULT_OFFLOAD_THRESHOLD)]:
+        statistics = asyncio.get_event_loop().run_until_complete(
+            _measure(threshold))
+        print("{}: max loop lag {:.1f}ms, mean {:.1f}ms".format(name,
+            statistics.lag_max * 1000, statistics.lag_mean * 1000))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Matrix payloads of several sizes, shaped like the responses of a real
+homeserver
+"""
+
+login_response_json = {
+    "user_id": "@local_username:localhost",
+    "access_token": "ABCDE123456",
+    "home_server": "localhost",
+    "device_id": "DEVICE123"
+    }
+
+def _message_event(room_index, event_index):
+    return {
+        "type": "m.room.message",
+        "event_id": "$event_{}_{}:localhost".format(room_index, event_index),
+        "sender": "@user_{}:localhost".format(event_index % 7),
+        "origin_server_ts": 1600000000000 + event_index,
+        "unsigned": {"age": 1234},
+        "content": {"msgtype": "m.text",
+            "body": "message {} of room {}".format(event_index, room_index)}
+        }
+
+def _state_event(room_index, event_type, state_key, content):
+    return {
+        "type": event_type,
+        "event_id": "$state_{}_{}_{}:localhost".format(room_index, event_type,
+            state_key),
+        "sender": "@user_0:localhost",
+        "origin_server_ts": 1600000000000,
+        "state_key": state_key,
+        "content": content
+        }
+
+def make_sync_response(nb_rooms, nb_events):
+    """
+    Returns a decoded sync response with nb_rooms joined rooms, each having
+    a few state events and nb_events messages in its timeline
+    """
+    return {
+        "next_batch": "s72595_4483_1934",
+        "rooms": {
+            "join": dict(("!room_{}:localhost".format(room_index), {
+                "state": {"events": [
+                    _state_event(room_index, "m.room.name", "",
+                        {"name": "Room {}".format(room_index)}),
+                    _state_event(room_index, "m.room.member",
+                        "@user_0:localhost", {"membership": "join"}),
+                    _state_event(room_index, "m.room.power_levels", "",
+                        {"users": {"@user_0:localhost": 100}})]},
+                "timeline": {"events": [_message_event(room_index, index)
+                    for index in range(0, nb_events)], "limited": False},
+                "ephemeral": {"events": []},
+                "account_data": {"events": []},
+                "unread_notifications": {"highlight_count": 0,
+                    "notification_count": nb_events}
+                }) for room_index in range(0, nb_rooms)),
+            "invite": {},
+            "leave": {}
+            },
+        "presence": {"events": [{"type": "m.presence",
+            "sender": "@user_{}:localhost".format(index),
+            "content": {"presence": "online"}} for index in range(0, 7)]},
+        "account_data": {"events": []},
+        "to_device": {"events": []}
+        }
+
+def make_timelines(nb_rooms, nb_events):
+    """
+    Returns the timelines of the joined rooms of a sync response, a list of
+    nb_rooms decoded EventsMessage with nb_events messages each
+    """
+    return [room["timeline"] for room
+        in make_sync_response(nb_rooms, nb_events)["rooms"]["join"].values()]
+
+def make_error_responses(nb_errors):
+    """
+    Returns nb_errors decoded error responses, e.g. the failures of a batch
+    of calls being rate limited
+    """
+    return [{"errcode": "M_LIMIT_EXCEEDED",
+        "error": "Too many requests ({})".format(index),
+        "retry_after_ms": 1000 + index} for index in range(0, nb_errors)]
+
+# (name, number of rooms, messages per room)
+sync_response_sizes = [
+    ("small", 1, 5),
+    ("medium", 20, 20),
+    ("large", 200, 50)
+    ]
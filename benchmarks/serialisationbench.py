@@ -0,0 +1,81 @@
+"""
+Measures the per-message cost of JsonSerialiser with and without the cached
+serialisation plans, with the generated code path, and of lazily
+deserialising a sync response of which only the token is read. Run from the
+repository root with:
+
+    python -m benchmarks.serialisationbench
+"""
+import time
+import pymatrix.serialisation
+import pymatrix.specification.base
+import pymatrix.specification.r0.login
+import pymatrix.specification.r0.sync
+
+iterations = 20000
+
+login_response_json = {
+    "user_id": "@local_username:localhost",
+    "access_token": "ABCDE123456",
+    "home_server": "localhost",
+    "device_id": "DEVICE123"
+    }
+
+sync_response_json = {
+    "next_batch": "s72595_4483_1934",
+    "rooms": {"join": {}, "invite": {}, "leave": {}},
+    "presence": {"events": [{"type": "m.presence",
+        "sender": "@user_{}:localhost".format(index),
+        "content": {"presence": "online"}} for index in range(0, 20)]},
+    "account_data": {"events": []},
+    "to_device": {"events": []}
+    }
+
+def _uncached(func):
+    """Simulates the reflection-per-call behaviour by dropping all plans
+    before every call"""
+    def run():
+        pymatrix.serialisation.invalidate_serialisation_plan()
+        func()
+    return run
+
+def _measure(func):
+    func() # warm up
+    start = time.perf_counter()
+    for i in range(0, iterations):
+        func()
+    return (time.perf_counter() - start) * 1000000 / iterations
+
+def main():
+    serialiser = pymatrix.serialisation.JsonSerialiser()
+    generated_serialiser = pymatrix.serialisation.JsonSerialiser(
+        generate_code=True)
+    request = pymatrix.specification.r0.login.LoginRequestMessage(
+        user="local_username", password="correct_password")
+    response_type = pymatrix.specification.r0.login.LoginResponseMessage
+
+    cases = [
+        ("serialise LoginRequestMessage",
+            lambda s: s.serialise(request)),
+        ("deserialise LoginResponseMessage",
+            lambda s: s.deserialise(login_response_json, response_type))
+        ]
+
+    for name, func in cases:
+        before = _measure(_uncached(lambda: func(serialiser)))
+        after = _measure(lambda: func(serialiser))
+        generated = _measure(lambda: func(generated_serialiser))
+        print("{}: {:.2f}µs/msg uncached, {:.2f}µs/msg cached, "
+            "{:.2f}µs/msg generated".format(name, before, after, generated))
+
+    lazy_serialiser = pymatrix.serialisation.JsonSerialiser(lazy=True)
+    sync_type = pymatrix.specification.r0.sync.SyncResponseMessage
+    eager = _measure(lambda: serialiser.deserialise(sync_response_json,
+        sync_type).next_batch)
+    lazy = _measure(lambda: lazy_serialiser.deserialise(sync_response_json,
+        sync_type).next_batch)
+    print("deserialise SyncResponseMessage, read next_batch: "
+        "{:.2f}µs/msg eager, {:.2f}µs/msg lazy".format(eager, lazy))
+
+if __name__ == "__main__":
+    main()
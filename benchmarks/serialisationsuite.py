@@ -0,0 +1,127 @@
+from benchmarks.framework import BenchmarkClassBase, benchmarkmethod
+from benchmarks.payloads import login_response_json, make_error_responses, \
+    make_sync_response, make_timelines, sync_response_sizes
+import pymatrix.codec
+import pymatrix.serialisation
+import pymatrix.specification.base
+import pymatrix.specification.r0.login
+import pymatrix.specification.r0.sync
+
+class SerialisationBenchmarks(BenchmarkClassBase):
+
+    def benchmark_init(self):
+        self.serialiser = pymatrix.serialisation.JsonSerialiser()
+        self.generated_serialiser = pymatrix.serialisation.JsonSerialiser(
+            generate_code=True)
+        self.codec = self.serialiser.codec
+        self.login_request = pymatrix.specification.r0.login \
+            .LoginRequestMessage(user="local_username",
+                password="correct_password")
+        # SyncResponseMessage keeps the rooms as decoded: only loads, which
+        # decodes them too, scales with the size of a sync response
+        self.encoded_sync_responses = dict((name,
+            self.codec.encode(make_sync_response(nb_rooms, nb_events)))
+            for name, nb_rooms, nb_events in sync_response_sizes)
+        # model objects in numbers growing with the size: one EventsMessage
+        # per room, one error per message
+        self.timelines = dict((name, make_timelines(nb_rooms, nb_events))
+            for name, nb_rooms, nb_events in sync_response_sizes)
+        self.timeline_messages = dict((name, self.serialiser.deserialise(
+            timelines, pymatrix.specification.r0.sync.EventsMessage))
+            for name, timelines in self.timelines.items())
+        self.error_responses = dict((name,
+            make_error_responses(nb_rooms * nb_events))
+            for name, nb_rooms, nb_events in sync_response_sizes)
+
+    def _deserialise_timelines(self, serialiser, name):
+        serialiser.deserialise(self.timelines[name],
+            pymatrix.specification.r0.sync.EventsMessage)
+
+    def _serialise_timelines(self, name):
+        self.serialiser.serialise(self.timeline_messages[name])
+
+    def _deserialise_errors(self, name):
+        self.serialiser.deserialise(self.error_responses[name],
+            pymatrix.specification.base.ErrorMessageBase)
+
+    def _loads_sync(self, name):
+        self.serialiser.loads(self.encoded_sync_responses[name],
+            pymatrix.specification.r0.sync.SyncResponseMessage)
+
+    @benchmarkmethod
+    def serialise_login_request(self):
+        self.serialiser.serialise(self.login_request)
+
+    @benchmarkmethod
+    def serialise_login_request_generated(self):
+        self.generated_serialiser.serialise(self.login_request)
+
+    @benchmarkmethod
+    def deserialise_login_response(self):
+        self.serialiser.deserialise(login_response_json,
+            pymatrix.specification.r0.login.LoginResponseMessage)
+
+    @benchmarkmethod
+    def deserialise_login_response_generated(self):
+        self.generated_serialiser.deserialise(login_response_json,
+            pymatrix.specification.r0.login.LoginResponseMessage)
+
+    @benchmarkmethod
+    def deserialise_timelines_small(self):
+        self._deserialise_timelines(self.serialiser, "small")
+
+    @benchmarkmethod
+    def deserialise_timelines_medium(self):
+        self._deserialise_timelines(self.serialiser, "medium")
+
+    @benchmarkmethod
+    def deserialise_timelines_large(self):
+        self._deserialise_timelines(self.serialiser, "large")
+
+    @benchmarkmethod
+    def deserialise_timelines_generated_small(self):
+        self._deserialise_timelines(self.generated_serialiser, "small")
+
+    @benchmarkmethod
+    def deserialise_timelines_generated_medium(self):
+        self._deserialise_timelines(self.generated_serialiser, "medium")
+
+    @benchmarkmethod
+    def deserialise_timelines_generated_large(self):
+        self._deserialise_timelines(self.generated_serialiser, "large")
+
+    @benchmarkmethod
+    def serialise_timelines_small(self):
+        self._serialise_timelines("small")
+
+    @benchmarkmethod
+    def serialise_timelines_medium(self):
+        self._serialise_timelines("medium")
+
+    @benchmarkmethod
+    def serialise_timelines_large(self):
+        self._serialise_timelines("large")
+
+    @benchmarkmethod
+    def deserialise_errors_small(self):
+        self._deserialise_errors("small")
+
+    @benchmarkmethod
+    def deserialise_errors_medium(self):
+        self._deserialise_errors("medium")
+
+    @benchmarkmethod
+    def deserialise_errors_large(self):
+        self._deserialise_errors("large")
+
+    @benchmarkmethod
+    def loads_sync_small(self):
+        self._loads_sync("small")
+
+    @benchmarkmethod
+    def loads_sync_medium(self):
+        self._loads_sync("medium")
+
+    @benchmarkmethod
+    def loads_sync_large(self):
+        self._loads_sync("large")
@@ -1,64 +1,512 @@
 import pymatrix.backend
 import pymatrix.backend.http
+import pymatrix.coalescing
+import pymatrix.metrics
 import pymatrix.serialisation
 import pymatrix.constants as consts
+import pymatrix.lazy
 import pymatrix.specification.base
+import pymatrix.tracing
+import asyncio
+import concurrent.futures
+import time
+import urllib.parse
+import weakref
 from abc import ABCMeta, abstractmethod
 
+# only loaded when a RestApi is created without a specification
+pymatrix.lazy.lazy_import("pymatrix.specification.r0")
+
+DEFAULT_MAX_CONCURRENCY = 10
+# used when the server reports a rate limit without saying for how long
+DEFAULT_RETRY_AFTER_MS = 1000
+# requests which can be coalesced unless their route says otherwise
+_SAFE_METHODS = ("GET", "HEAD")
+# responses larger than this, in bytes, are decoded out of the event loop
+DEFAULT_OFFLOAD_THRESHOLD = 256 * 1024
+# errcode of the error responses whose body is not a JSON object, such as
+# the HTML pages of proxies
+UNDECODABLE_ERRCODE = "M_UNKNOWN"
+
+def _undecodable_error(status):
+    return {"errcode": UNDECODABLE_ERRCODE,
+        "error": "HTTP {} response without a valid body".format(status)}
+
+def decode_body(codec, body, is_error, status):
+    """
+    Decodes the body of a response. The body of an error response which is
+    not a JSON object is replaced by an UNDECODABLE_ERRCODE error, so that
+    it is still returned as an error message. A module function, so that it
+    can be run by a process executor.
+    """
+    if(not is_error):
+        return codec.decode(body)
+    try:
+        decoded = codec.decode(body)
+    except ValueError:
+        decoded = None
+    if(not isinstance(decoded, dict)):
+        decoded = _undecodable_error(status)
+    return decoded
+
 class ApiBase(metaclass=ABCMeta):
     """
     Base class for an API specification. It is an association of a
     backend, a message format, etc...
     """
-    def __init__(self, backend, serialiser, specification):
+    def __init__(self, backend, serialiser, specification, scheduler=None,
+        response_cache=None,
+        single_flight: pymatrix.coalescing.SingleFlight=None,
+        executor: concurrent.futures.Executor=None,
+        offload_threshold=DEFAULT_OFFLOAD_THRESHOLD,
+        tracer: pymatrix.tracing.Tracer=None,
+        metrics: pymatrix.metrics.ClientMetrics=None):
+        """
+        executor: where responses larger than offload_threshold bytes are
+            decoded and deserialised, the default executor of the event
+            loop if None. A process executor needs the serialiser and the
+            response types to be picklable; objects deserialised lazily are
+            sent back fully deserialised.
+        offload_threshold: None to always decode in the event loop
+        tracer: receives the duration of each stage of the calls while it
+            has observers; a tracer set later through the tracer property
+            is given to the backend too if it is a HttpBackend
+        metrics: where the requests, their latency and errcodes are counted
+        """
         self._backend = backend
         self._serialiser = serialiser
         self._specification = specification
+        self._scheduler = scheduler
+        self._response_cache = response_cache
+        self._single_flight = single_flight
+        self._executor = executor
+        self._offload_threshold = offload_threshold
+        self._offloaded_count = 0
+        self._tracer = tracer
+        self._metrics = metrics
+        # error bodies already decoded to read a rate limit delay
+        self._decoded_errors = weakref.WeakKeyDictionary()
+        self._access_token = None
+
+    @property
+    def backend(self): return self._backend
+    @property
+    def response_cache(self): return self._response_cache
+    @property
+    def single_flight(self): return self._single_flight
+    @property
+    def tracer(self): return self._tracer
+    @tracer.setter
+    def tracer(self, value):
+        self._tracer = value
+        # so that the round trips of the requests are traced too
+        if(isinstance(self._backend, pymatrix.backend.http.HttpBackend)):
+            self._backend.tracer = value
+    @property
+    def metrics(self): return self._metrics
+    @property
+    def offloaded_count(self):
+        """Number of responses decoded out of the event loop"""
+        return self._offloaded_count
+
+    @property
+    def access_token(self): return self._access_token
+    @access_token.setter
+    def access_token(self, value): self._access_token = value
 
     async def connect(self, hostname, port=None):
         await self._backend.connect(hostname, port)
 
     async def generic_call(self, call_endpoint_code, *args, **kwargs):
-        request_type, response_type, error_type = \
-            self._specification.get_message_types(
-                call_endpoint_code
-                )
-        request = request_type(*args, **kwargs)
-
-        login_response = await self._backend.write_event(
-            self.format_message(request)
-            )
-        return self._serialiser.deserialise(login_response.body,
-            response_type if not login_response.is_error else error_type)
+        tracer = self._tracer
+        if(tracer is not None and tracer.active):
+            result = await self._generic_call_traced(tracer,
+                call_endpoint_code, *args, **kwargs)
+        else:
+            route = self._specification.get_route(call_endpoint_code)
+            request = route.request_type(*args, **kwargs)
+            message = self.format_message(request, route)
+
+            response = await self._fetch(call_endpoint_code, route, message)
+            if(response.is_error):
+                result = self._serialiser.deserialise(
+                    self._decode_body(response), route.error_type)
+            else:
+                result = await self._offload(len(response.body),
+                    self._serialiser.loads, response.body,
+                    route.response_type)
+
+        if(self._metrics is not None and isinstance(result,
+            pymatrix.specification.base.ErrorMessageBase)):
+            self._metrics._record_errcode(call_endpoint_code, result.errcode)
+        return result
+
+    async def _generic_call_traced(self, tracer, call_endpoint_code, *args,
+        **kwargs):
+        """
+        Same as generic_call, timing each stage; decoding and deserialising
+        are then run as two steps to be timed apart
+        """
+        clock = pymatrix.tracing.clock
+        stages = pymatrix.tracing.TraceStageEnum
+
+        start = clock()
+        route = self._specification.get_route(call_endpoint_code)
+        request = route.request_type(*args, **kwargs)
+        end = clock()
+        tracer.emit(stages.Build, end - start, None, call_endpoint_code)
+
+        start = end
+        message = self.format_message(request, route)
+        end = clock()
+        tracer.emit(stages.Serialise, end - start,
+            len(message.body) if message.body is not None else 0,
+            call_endpoint_code)
+
+        start = end
+        response = await self._fetch(call_endpoint_code, route, message)
+        end = clock()
+        size = len(response.body)
+        tracer.emit(stages.Send, end - start, size, call_endpoint_code)
+
+        start = end
+        body = await self._decode_body_offloaded(size, response)
+        end = clock()
+        tracer.emit(stages.Decode, end - start, size, call_endpoint_code)
+
+        start = end
+        result = await self._offload(size, self._serialiser.deserialise, body,
+            route.response_type if not response.is_error
+                else route.error_type)
+        tracer.emit(stages.Deserialise, clock() - start, None,
+            call_endpoint_code)
+        return result
+
+    async def _fetch(self, call_endpoint_code, route, message):
+        """
+        Returns the response to the message, from the response cache if the
+        route allows it
+        """
+        return await self._measure(call_endpoint_code,
+            lambda: self._fetch_response(call_endpoint_code, route, message))
+
+    async def _measure(self, call_endpoint_code, fetch):
+        """
+        Awaits fetch(), recording the request and its response in the
+        metrics if any
+        """
+        metrics = self._metrics
+        if(metrics is None):
+            return await fetch()
+        metrics._request_started(call_endpoint_code)
+        start = time.perf_counter()
+        status = None
+        try:
+            response = await fetch()
+            status = response.status
+            return response
+        finally:
+            metrics._request_finished(call_endpoint_code, status,
+                time.perf_counter() - start)
+
+    async def _fetch_response(self, call_endpoint_code, route, message):
+        if(self._response_cache is not None and route.cache_ttl is not None):
+            return await self._response_cache.fetch(
+                (message.method, message.url, self._access_token),
+                route.cache_ttl,
+                lambda etag: self._write_event(call_endpoint_code,
+                    self._make_conditional(message, etag)))
+        return await self._send(call_endpoint_code, message)
+
+    def _decode_body(self, response):
+        """
+        Decodes the body of a response with decode_body; error bodies are
+        only decoded once
+        """
+        if(response.is_error):
+            body = self._decoded_errors.get(response, None)
+            if(body is not None):
+                return body
+        body = decode_body(self._serialiser.codec, response.body,
+            response.is_error, response.status)
+        if(response.is_error):
+            self._decoded_errors[response] = body
+        return body
+
+    async def _decode_body_offloaded(self, size, response):
+        """
+        Same as _decode_body, in the executor if size is above the offload
+        threshold
+        """
+        if(response.is_error):
+            body = self._decoded_errors.get(response, None)
+            if(body is not None):
+                return body
+        body = await self._offload(size, decode_body, self._serialiser.codec,
+            response.body, response.is_error, response.status)
+        if(response.is_error):
+            self._decoded_errors[response] = body
+        return body
+
+    async def _offload(self, size, func, *args):
+        """
+        Runs func in the executor if size is above the offload threshold,
+        directly otherwise
+        """
+        if(self._offload_threshold is None
+            or size <= self._offload_threshold):
+            return func(*args)
+        self._offloaded_count += 1
+        return await asyncio.get_event_loop().run_in_executor(
+            self._executor, func, *args)
+
+    async def generic_call_raw(self, call_endpoint_code, *args, **kwargs):
+        """
+        Same as generic_call, but the response is neither decoded nor
+        deserialised: a pymatrix.backend.http.RawResponse is returned, whose
+        body can be forwarded as is. The errcodes of the error responses are
+        then not counted by the metrics, only their status.
+        """
+        route = self._specification.get_route(call_endpoint_code)
+        request = route.request_type(*args, **kwargs)
+        message = self.format_message(request, route)
+
+        return await self._measure(call_endpoint_code,
+            lambda: self._write_event(call_endpoint_code, message, raw=True))
+
+    async def _send(self, call_endpoint_code, message):
+        """
+        Writes the message, sharing the response of an identical request
+        already in flight if it is idempotent
+        """
+        if(self._single_flight is None
+            or message.idempotent is False
+            or (message.idempotent is None
+                and message.method not in _SAFE_METHODS)):
+            return await self._write_event(call_endpoint_code, message)
+        return await self._single_flight.do(
+            (call_endpoint_code, message.method, message.url, message.body,
+                self._access_token),
+            lambda: self._write_event(call_endpoint_code, message))
+
+    def _make_conditional(self, message, etag):
+        """
+        Returns a copy of the message only asking for the response if it no
+        longer matches the ETag, or the message itself without an ETag
+        """
+        if(etag is None):
+            return message
+        headers = dict(message.headers) if message.headers is not None \
+            else {}
+        headers["If-None-Match"] = etag
+        return pymatrix.backend.http.RestMessage(url=message.url,
+            method=message.method, body=message.body, headers=headers,
+            idempotent=message.idempotent, endpoint=message.endpoint)
+
+    def _get_retry_after(self, response):
+        """
+        Returns the delay in seconds asked by the server if the response is
+        a rate limit error, None otherwise
+        """
+        if(not response.is_error):
+            return None
+        body = self._decode_body(response)
+        if(body.get("errcode") != "M_LIMIT_EXCEEDED"):
+            return None
+        return (body.get("retry_after_ms") or DEFAULT_RETRY_AFTER_MS) / 1000
+
+    async def _write_event(self, call_endpoint_code, message, raw=False):
+        if(self._scheduler is None):
+            return await self._backend.write_event(message, raw)
+        return await self._scheduler.schedule(call_endpoint_code,
+            lambda: self._backend.write_event(message, raw),
+            self._get_retry_after)
+
+    async def generic_call_many(self, calls,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        Runs many calls concurrently, with at most max_concurrency of them in
+        flight at once. calls is a list of (endpoint code, kwargs dict)
+        tuples; they are started in order and their results are returned in
+        the same order. A call raising an exception does not cancel the
+        others: the exception is returned in place of its result.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded_call(call_endpoint_code, kwargs):
+            async with semaphore:
+                return await self.generic_call(call_endpoint_code, **kwargs)
+
+        return await asyncio.gather(
+            *[bounded_call(call_endpoint_code, kwargs)
+                for call_endpoint_code, kwargs in calls],
+            return_exceptions=True)
 
     async def login(self, username, password):
-        return await self.generic_call(
+        response = await self.generic_call(
             pymatrix.constants.EndpointNamesEnum.Login,
             user=username, password=password)
+        if(not isinstance(response,
+            pymatrix.specification.base.ErrorMessageBase)):
+            self._access_token = response.access_token
+        return response
+
+    async def read_events(self, since=None, timeout=30000, **kwargs):
+        """
+        Long-polls the server for new events, starting from the since token
+        (or with a full sync if there is none), and yields each sync response.
+        The next poll is issued as soon as a response is received, while the
+        previous batch is deserialised and handled. Transient failures are
+        retried by the backend according to its retry policy; an error
+        response which is left is yielded as an error message, after which
+        polling stops: the caller decides whether to resume, from the last
+        next_batch token. So is a successful response whose body is not a
+        JSON object, as an UNDECODABLE_ERRCODE error. While the tracer is active, the polls are traced
+        like the calls except for the Send stage, a long poll being held by
+        the server until there are events.
+        """
+        endpoint_code = pymatrix.constants.EndpointNamesEnum.Sync
+        route = self._specification.get_route(endpoint_code)
+        clock = pymatrix.tracing.clock
+        stages = pymatrix.tracing.TraceStageEnum
+        # (body, is_error) tuples keyed by response
+        decoded_bodies = {}
+
+        def get_tracer():
+            tracer = self._tracer
+            return tracer if tracer is not None and tracer.active else None
+
+        async def next_message(previous_response):
+            nonlocal since
+            tracer = get_tracer()
+            if(previous_response is not None):
+                size = len(previous_response.body)
+                if(tracer is not None):
+                    start = clock()
+                try:
+                    body = await self._decode_body_offloaded(size,
+                        previous_response)
+                except ValueError:
+                    body = None
+                if(tracer is not None):
+                    tracer.emit(stages.Decode, clock() - start, size,
+                        endpoint_code)
+                is_error = previous_response.is_error
+                if(not isinstance(body, dict)):
+                    body = _undecodable_error(previous_response.status)
+                    is_error = True
+                if(self._metrics is not None):
+                    self._metrics._record_sync(previous_response.status,
+                        is_error)
+                decoded_bodies[previous_response] = (body, is_error)
+                if(is_error):
+                    return None
+                since = body.get("next_batch", since)
+            if(tracer is not None):
+                start = clock()
+            message = self.format_message(
+                route.request_type(since=since, timeout=timeout, **kwargs),
+                route)
+            if(tracer is not None):
+                tracer.emit(stages.Serialise, clock() - start,
+                    len(message.body) if message.body is not None else 0,
+                    endpoint_code)
+            return message
+
+        async for response in self._backend.read_events(next_message):
+            tracer = get_tracer()
+            if(tracer is not None):
+                start = clock()
+            body, is_error = decoded_bodies.pop(response)
+            result = await self._offload(len(response.body),
+                self._serialiser.deserialise, body,
+                route.response_type if not is_error else route.error_type)
+            if(tracer is not None):
+                tracer.emit(stages.Deserialise, clock() - start, None,
+                    endpoint_code)
+            if(self._metrics is not None and isinstance(result,
+                pymatrix.specification.base.ErrorMessageBase)):
+                self._metrics._record_errcode(endpoint_code, result.errcode)
+            yield result
 
     async def logout(self):
+        self._access_token = None
         await self._backend.disconnect()
 
     @abstractmethod
-    def format_message(url, body):
+    def format_message(self, message, route=None):
         pass
 
 class RestApi(ApiBase):
     """
     An API over HTTP/S
     """
-    def __init__(self):
+    def __init__(self, backend=None, serialiser=None, specification=None,
+        scheduler=None, response_cache=None, single_flight=None,
+        executor=None, offload_threshold=DEFAULT_OFFLOAD_THRESHOLD,
+        tracer=None, metrics=None):
         super().__init__(
-            pymatrix.backend.http.HttpBackend(),
-            pymatrix.serialisation.JsonSerialiser(),
-            pymatrix.specification.r0.Specification()
+            backend if backend is not None
+                else pymatrix.backend.http.HttpBackend(tracer=tracer),
+            serialiser if serialiser is not None
+                else pymatrix.serialisation.JsonSerialiser(),
+            specification if specification is not None
+                else pymatrix.specification.r0.Specification(),
+            scheduler,
+            response_cache,
+            single_flight,
+            executor,
+            offload_threshold,
+            tracer,
+            metrics
             )
 
-    def format_message(self, message):
-        url = message.transport_options["http"]["endpoint"]
-        method = message.transport_options["http"]["method"]
+    def _format_query_value(self, value):
+        if(isinstance(value, bool)):
+            return "true" if value else "false"
+        if(isinstance(value, (dict, list))):
+            return self._serialiser.codec.encode(value).decode("utf-8")
+        return str(value)
+
+    def format_message(self, message, route=None):
+        if(route is not None and route.path is not None):
+            url = route.path
+            method = route.method
+            idempotent = route.idempotent
+        else:
+            http_options = message.transport_options["http"]
+            url = http_options["endpoint"]
+            method = http_options["method"]
+            idempotent = http_options.get("idempotent", None)
+        # traced by its endpoint code, or its path before the parameters
+        # are filled in
+        endpoint = route.endpoint_code if route is not None else url
+        path_parameters = message.path_parameters
+        if(path_parameters):
+            url = pymatrix.specification.base.format_path(url,
+                **path_parameters)
+        headers = {}
+        if(self._access_token is not None):
+            headers["Authorization"] = "Bearer {}".format(self._access_token)
+
+        if(method == "GET"):
+            # GET requests carry their parameters in the query string
+            body = None
+            parameters = self._serialiser.serialise(message)
+            if(parameters is not None):
+                url = "{}?{}".format(url, urllib.parse.urlencode(
+                    [(name, self._format_query_value(value))
+                        for name, value in parameters.items()]))
+        else:
+            body = self._serialiser.dumps(message)
+            if(body is not None):
+                headers["Content-Type"] = self._serialiser.codec.content_type
+
         return pymatrix.backend.http.RestMessage(
             url=url,
-            body=self._serialiser.serialise(message),
-            method=method
+            body=body,
+            method=method,
+            headers=headers if headers else None,
+            idempotent=idempotent,
+            endpoint=endpoint
             )
@@ -27,15 +27,19 @@ class BackendBase(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    async def write_event(self, message):
+    async def write_event(self, message, raw=False):
         """
-        Writes events to the backend to send to the server
+        Writes events to the backend to send to the server. With raw, the
+        response body is returned as received, without any decoding.
         """
         pass
 
     @abstractmethod
-    async def read_events(self):
+    async def read_events(self, next_message):
         """
-        Reads from the backend to receive new events
+        Reads from the backend to receive new events. next_message is called
+        with the previous response (None at first) and returns the next
+        message to poll with, or None to stop, or an awaitable of it; each
+        response is yielded.
         """
         pass
@@ -1,6 +1,14 @@
-import aiohttp
 import asyncio
+import inspect
 import pymatrix.backend.base
+import pymatrix.backend.retry
+import pymatrix.codec
+import pymatrix.lazy
+import pymatrix.tracing
+
+# aiohttp takes longer to import than the rest of the package: it is only
+# loaded once a session or connector is created
+aiohttp = pymatrix.lazy.lazy_import("aiohttp")
 
 _METHOD_GET="GET"
 _METHOD_PUT="PUT"
@@ -19,22 +27,224 @@ class RestMessage:
     url = None
     body = None
     headers = None
+    idempotent = None
+    endpoint = None
 
-    def __init__(self, url, method=_METHOD_GET, body=None, headers=None):
+    def __init__(self, url, method=_METHOD_GET, body=None, headers=None,
+        idempotent=None, endpoint=None):
+        """
+        endpoint: what the request is traced as, e.g. its endpoint code; the
+            path of the url without its query string if None
+        """
         self.method = method
         self.url = url
         self.body = body
         self.headers = headers
+        # None lets the retry policy decide from the method
+        self.idempotent = idempotent
+        self.endpoint = endpoint
 
 class Response:
-    def __init__(self, body, is_error):
+    """
+    A response as received from the server; the body is left encoded
+    """
+    def __init__(self, body, is_error, status=None, headers=None):
         self._body = body
         self._is_error = is_error
+        self._status = status
+        self._headers = headers
 
     @property
     def body(self): return self._body
     @property
     def is_error(self): return self._is_error
+    @property
+    def status(self): return self._status
+    @property
+    def headers(self):
+        """The headers, a case-insensitive mapping, or None"""
+        return self._headers
+
+class RawResponse:
+    """
+    A response handed out untouched for callers which only forward it: the
+    body is a read-only memoryview of the received bytes and the headers are
+    only parsed the first time they are read
+    """
+    def __init__(self, body, status, raw_headers=()):
+        self._body = memoryview(body).toreadonly()
+        self._status = status
+        self._raw_headers = raw_headers
+        self._headers = None
+
+    @property
+    def body(self): return self._body
+    @property
+    def is_error(self): return self._status >= 400
+    @property
+    def status(self): return self._status
+    @property
+    def raw_headers(self):
+        """The headers as received, a tuple of (name, value) bytes pairs"""
+        return self._raw_headers
+
+    @property
+    def headers(self):
+        """
+        The headers as a dictionary keyed by lowercase name; the values of
+        a repeated header are joined with commas
+        """
+        if(self._headers is None):
+            headers = {}
+            for name, value in self._raw_headers:
+                name = name.decode("latin-1").lower()
+                value = value.decode("latin-1")
+                if(name in headers):
+                    value = headers[name] + ", " + value
+                headers[name] = value
+            self._headers = headers
+        return self._headers
+
+    def tobytes(self):
+        return self._body.tobytes()
+
+class StreamedResponse:
+    """
+    A response whose body is decoded while it is being received. Iterating
+    over it asynchronously yields the (path, value) sections of the body as
+    soon as each of them is complete. Its connection goes back to the pool
+    once the body is read to the end or the response is closed: use it as
+    an asynchronous context manager, or call close(), when it may not be
+    iterated over to the end.
+    """
+    def __init__(self, response, decoder):
+        self._response = response
+        self._decoder = decoder
+        self._closed = False
+
+    @property
+    def status(self): return self._response.status
+    @property
+    def is_error(self): return self._response.status >= 400
+    @property
+    def closed(self): return self._closed
+
+    def close(self):
+        """
+        Releases the connection; the rest of the body is discarded
+        """
+        if(not self._closed):
+            self._closed = True
+            self._response.release()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __aiter__(self):
+        return self._read_sections()
+
+    async def _read_sections(self):
+        try:
+            async for chunk in self._response.content.iter_any():
+                for section in self._decoder.feed(chunk):
+                    yield section
+            for section in self._decoder.close():
+                yield section
+        finally:
+            self.close()
+
+class ConnectionPoolOptions:
+    """
+    Settings of the pool of connections kept open by a HttpBackend. Note that
+    aiohttp enables TCP_NODELAY on every connection it opens.
+    """
+    limit = None
+    limit_per_host = None
+    keepalive_timeout = None
+    ttl_dns_cache = None
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=30.0,
+        ttl_dns_cache=300):
+        """
+        limit: max number of simultaneous connections, 0 for no limit
+        limit_per_host: max number of simultaneous connections to the same
+            endpoint, 0 for no limit
+        keepalive_timeout: seconds an idle connection is kept open for reuse
+        ttl_dns_cache: seconds resolved addresses are cached, None to cache
+            them forever
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+
+def make_connector(options: ConnectionPoolOptions):
+    """
+    Returns a connection pool applying the options; it has to be created
+    while the event loop is running
+    """
+    return aiohttp.TCPConnector(
+        limit=options.limit,
+        limit_per_host=options.limit_per_host,
+        keepalive_timeout=options.keepalive_timeout,
+        ttl_dns_cache=options.ttl_dns_cache,
+        use_dns_cache=True
+        )
+
+class PoolStatistics:
+    """
+    Usage of the connection pool of a HttpBackend
+    """
+    def __init__(self):
+        self._connector = None
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.wait_count = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _attach(self, connector):
+        self._connector = connector
+
+    def _record_wait(self, wait_time):
+        self.wait_count += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    @property
+    def acquired(self):
+        """Connections currently used by a request"""
+        if(self._connector is None):
+            return 0
+        return len(getattr(self._connector, "_acquired", ()))
+
+    @property
+    def idle(self):
+        """Connections currently open and waiting to be reused"""
+        if(self._connector is None):
+            return 0
+        return sum(len(connections) for connections
+            in getattr(self._connector, "_conns", {}).values())
+
+    @property
+    def open(self):
+        """Connections currently open"""
+        return self.acquired + self.idle
+
+    def as_dict(self):
+        return {
+            "open": self.open,
+            "idle": self.idle,
+            "acquired": self.acquired,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "wait_count": self.wait_count,
+            "wait_time_total": self.wait_time_total,
+            "wait_time_max": self.wait_time_max
+            }
 
 class HttpBackend(pymatrix.backend.base.BackendBase):
     """
@@ -44,9 +254,62 @@ class HttpBackend(pymatrix.backend.base.BackendBase):
     _session = None
     _hostname = None
     _port = None
+    _base_url = None
 
-    def __init__(self):
+    def __init__(self, pool_options: ConnectionPoolOptions=None,
+        retry_policy: pymatrix.backend.retry.RetryPolicy=None,
+        timeout=None, connector=None,
+        tracer: pymatrix.tracing.Tracer=None):
+        """
+        timeout: an aiohttp.ClientTimeout applied to the requests
+        connector: an aiohttp.BaseConnector shared with other backends,
+            which this one neither configures nor closes; pool_options are
+            then ignored
+        tracer: receives the duration of each attempt at sending a request,
+            with the endpoint of the request, see RestMessage
+        """
         self._session = None
+        self._connector = connector
+        self._pool_options = pool_options if pool_options is not None \
+            else ConnectionPoolOptions()
+        self._pool_statistics = PoolStatistics()
+        self._retry_policy = retry_policy if retry_policy is not None \
+            else pymatrix.backend.retry.RetryPolicy()
+        self._retry_statistics = pymatrix.backend.retry.RetryStatistics()
+        self._timeout = timeout
+        self._tracer = tracer
+
+    @property
+    def tracer(self): return self._tracer
+    @tracer.setter
+    def tracer(self, value): self._tracer = value
+    @property
+    def pool_statistics(self): return self._pool_statistics
+    @property
+    def retry_statistics(self): return self._retry_statistics
+
+    def _make_trace_config(self):
+        statistics = self._pool_statistics
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_queued_start(session, context, params):
+            context.queued_at = asyncio.get_event_loop().time()
+        async def on_queued_end(session, context, params):
+            statistics._record_wait(
+                asyncio.get_event_loop().time() - context.queued_at)
+        async def on_create_end(session, context, params):
+            statistics.connections_created += 1
+        async def on_reuse(session, context, params):
+            statistics.connections_reused += 1
+
+        trace_config.on_connection_queued_start.append(on_queued_start)
+        trace_config.on_connection_queued_end.append(on_queued_end)
+        trace_config.on_connection_create_end.append(on_create_end)
+        trace_config.on_connection_reuseconn.append(on_reuse)
+        return trace_config
+
+    def _make_connector(self):
+        return make_connector(self._pool_options)
 
     async def connect(
         self,
@@ -57,16 +320,27 @@ class HttpBackend(pymatrix.backend.base.BackendBase):
         """
         if(self._session is not None):
             await self.disconnect()
-            self.hostname = None
+            self._hostname = None
             self._port = None
+            self._base_url = None
 
         real_port = port
         if(real_port is None):
             real_port = pymatrix.backend.base.DEFAULT_MARIX_PORT
 
-        self._session = aiohttp.ClientSession()
+        connector = self._connector if self._connector is not None \
+            else self._make_connector()
+        self._pool_statistics._attach(connector)
+        session_options = {}
+        if(self._timeout is not None):
+            session_options["timeout"] = self._timeout
+        self._session = aiohttp.ClientSession(connector=connector,
+            connector_owner=self._connector is None,
+            trace_configs=[self._make_trace_config()], **session_options)
         self._hostname = hostname
         self._port = real_port
+        self._base_url = "http://{hostname}:{port}".format(
+            hostname=hostname, port=real_port)
 
     async def disconnect(self):
         """
@@ -74,30 +348,102 @@ class HttpBackend(pymatrix.backend.base.BackendBase):
         """
         await self._session.close()
         self._session = None
+        self._pool_statistics._attach(None)
 
-    async def write_event(self, message: RestMessage):
+    async def write_event(self, message: RestMessage, raw=False):
         """
-        Writes events to the backend to send to the server
+        Writes events to the backend to send to the server, retrying as
+        allowed by the retry policy. With raw, a RawResponse is returned.
         """
+        policy = self._retry_policy
+        tracer = self._tracer
+        if(tracer is not None and not tracer.active):
+            tracer = None
+        if(tracer is not None):
+            # the query string would make a histogram per request
+            endpoint = message.endpoint if message.endpoint is not None \
+                else message.url.split("?", 1)[0]
+        attempt = 0
+        while(True):
+            attempt += 1
+            if(tracer is not None):
+                start = pymatrix.tracing.clock()
+            try:
+                response = await self._session.request(
+                    # proxy="http://localhost:8080",
+                    # verify_ssl=False,
+                    method=message.method,
+                    url=self._base_url + message.url,
+                    data=message.body,
+                    headers=message.headers
+                    )
+                body = await response.read()
+            except aiohttp.ClientConnectorError:
+                if(not policy.can_retry(message, attempt, nothing_sent=True)):
+                    self._retry_statistics.failures += 1
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if(not policy.can_retry(message, attempt)):
+                    self._retry_statistics.failures += 1
+                    raise
+            else:
+                if(tracer is not None):
+                    tracer.emit(pymatrix.tracing.TraceStageEnum.RoundTrip,
+                        pymatrix.tracing.clock() - start, len(body),
+                        endpoint)
+                if(not policy.is_retryable_status(response.status)
+                    or not policy.can_retry(message, attempt)):
+                    if(raw):
+                        return RawResponse(body, response.status,
+                            response.raw_headers)
+                    return Response(body,
+                        True if response.status >= 400 else False,
+                        response.status, response.headers)
+
+            delay = policy.get_delay(attempt)
+            self._retry_statistics.retries += 1
+            self._retry_statistics.backoff_time_total += delay
+            await asyncio.sleep(delay)
 
+    async def stream_event(self, message: RestMessage, expand_paths=(),
+        codec=None):
+        """
+        Writes an event to the server and returns the response as soon as its
+        headers are received, its body being decoded incrementally while it is
+        iterated over. See pymatrix.codec.IncrementalJsonDecoder for the
+        meaning of expand_paths. The response has to be closed if it is not
+        iterated over to the end, see StreamedResponse.
+        """
         response = await self._session.request(
-            # proxy="http://localhost:8080",
-            # verify_ssl=False,
             method=message.method,
-            url="http://{hostname}:{port}{url}".format(
-                hostname=self._hostname,
-                port=self._port,
-                url=message.url),
-            json=message.body,
+            url=self._base_url + message.url,
+            data=message.body,
             headers=message.headers
             )
 
-        return_response = Response(await response.json(),
-            True if response.status >= 400 else False)
-        return return_response
+        return StreamedResponse(response,
+            pymatrix.codec.IncrementalJsonDecoder(expand_paths, codec))
 
-    async def read_events(self):
+    async def read_events(self, next_message):
         """
-        Reads from the backend to receive new events
+        Long-polls the server, yielding each response. The following poll is
+        sent before the current response is yielded, so that it is already
+        in flight while the response is being handled.
         """
-        pass
+        message = next_message(None)
+        if(inspect.isawaitable(message)):
+            message = await message
+        pending = asyncio.ensure_future(self.write_event(message))
+        try:
+            while(pending is not None):
+                response = await pending
+                pending = None
+                message = next_message(response)
+                if(inspect.isawaitable(message)):
+                    message = await message
+                if(message is not None):
+                    pending = asyncio.ensure_future(self.write_event(message))
+                yield response
+        finally:
+            if(pending is not None):
+                pending.cancel()
@@ -0,0 +1,75 @@
+import random
+
+_IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+_RETRY_STATUSES = (502, 503, 504)
+
+class RetryStatistics:
+    """
+    Counters of the retries made by a backend
+    """
+    def __init__(self):
+        self.retries = 0
+        self.failures = 0
+        self.backoff_time_total = 0.0
+
+    def as_dict(self):
+        return {
+            "retries": self.retries,
+            "failures": self.failures,
+            "backoff_time_total": self.backoff_time_total
+            }
+
+class RetryPolicy:
+    """
+    Decides whether a failed request is sent again and how long to wait
+    before doing so. Delays grow exponentially from base_delay up to
+    max_delay; with jitter, the actual delay is drawn uniformly below it so
+    that many clients do not retry in lockstep.
+
+    Only idempotent requests are retried after a failure which may have
+    reached the server; a message can override the per-method default
+    through its 'idempotent' transport option. Failures to connect are
+    always retried since nothing was sent.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.5, max_delay=30.0,
+        multiplier=2.0, jitter=True, retry_statuses=_RETRY_STATUSES,
+        idempotent_methods=_IDEMPOTENT_METHODS):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.idempotent_methods = frozenset(idempotent_methods)
+
+    def is_idempotent(self, message):
+        idempotent = getattr(message, "idempotent", None)
+        if(idempotent is not None):
+            return idempotent
+        return message.method.upper() in self.idempotent_methods
+
+    def can_retry(self, message, attempt, nothing_sent=False):
+        """
+        Whether the message may be sent again after its attempt-th failure
+        (counting from 1)
+        """
+        if(attempt >= self.max_attempts):
+            return False
+        return nothing_sent or self.is_idempotent(message)
+
+    def is_retryable_status(self, status):
+        return status in self.retry_statuses
+
+    def get_delay(self, attempt):
+        """
+        Seconds to wait after the attempt-th failure (counting from 1)
+        """
+        delay = min(self.max_delay,
+            self.base_delay * self.multiplier ** (attempt - 1))
+        if(self.jitter):
+            delay = random.uniform(0, delay)
+        return delay
+
+# never retries anything
+NO_RETRY = RetryPolicy(max_attempts=1)
@@ -0,0 +1,301 @@
+from collections import OrderedDict
+import time
+import pymatrix.coalescing
+import pymatrix.store
+
+DEFAULT_ROOM_STATE_BUDGET = 64 * 1024 * 1024
+DEFAULT_RESPONSE_CACHE_ENTRIES = 1024
+
+_STATUS_NOT_MODIFIED = 304
+
+# rough per-object overheads, in bytes, used to estimate event sizes
+_CONTAINER_OVERHEAD = 64
+_ENTRY_OVERHEAD = 16
+_SCALAR_OVERHEAD = 32
+
+def estimate_size(value):
+    """
+    Returns a cheap estimate of the memory used by a decoded JSON value, in
+    bytes. It is meant to compare values between them rather than to be
+    exact.
+    """
+    if(isinstance(value, str)):
+        return _SCALAR_OVERHEAD + len(value)
+    if(isinstance(value, dict)):
+        return _CONTAINER_OVERHEAD + sum(
+            _ENTRY_OVERHEAD + estimate_size(key) + estimate_size(item)
+            for key, item in value.items())
+    if(isinstance(value, (list, tuple))):
+        return _CONTAINER_OVERHEAD + sum(
+            _ENTRY_OVERHEAD + estimate_size(item) for item in value)
+    return _SCALAR_OVERHEAD
+
+class CacheStatistics:
+    """
+    Counters of a cache
+    """
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+            }
+
+class _CachedRoom:
+    """
+    The state of a room, indexed by (event type, state key)
+    """
+    __slots__ = ("events", "size")
+
+    def __init__(self):
+        self.events = {}
+        self.size = _CONTAINER_OVERHEAD
+
+class RoomStateCache:
+    """
+    Keeps the current state of the rooms in memory, up to a budget of
+    max_bytes. The least recently used rooms are evicted first; they are
+    loaded back from the store when it is given, missing otherwise until
+    their full state is applied again.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_ROOM_STATE_BUDGET,
+        store: pymatrix.store.StateStoreBase=None):
+        self._max_bytes = max_bytes
+        self._store = store
+        self._rooms = OrderedDict()
+        self._size = 0
+        self._statistics = CacheStatistics()
+        # without a store, rooms whose state is only known in part
+        self._evicted = set()
+        self._has_full_state = False
+
+    @property
+    def statistics(self): return self._statistics
+    @property
+    def size(self):
+        """Estimated number of bytes used by the cached rooms"""
+        return self._size
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def __contains__(self, room_id):
+        return room_id in self._rooms
+
+    def _set_event(self, room, event):
+        key = (event["type"], event["state_key"])
+        previous = room.events.get(key, None)
+        delta = estimate_size(event)
+        if(previous is not None):
+            delta -= estimate_size(previous)
+        else:
+            delta += _ENTRY_OVERHEAD
+        room.events[key] = event
+        room.size += delta
+        self._size += delta
+
+    def _insert_room(self, room_id, events):
+        room = _CachedRoom()
+        self._rooms[room_id] = room
+        self._size += room.size
+        for event in events:
+            self._set_event(room, event)
+        return room
+
+    def _evict(self):
+        # the most recently used room is kept even if it is over the budget
+        while(self._size > self._max_bytes and len(self._rooms) > 1):
+            room_id, room = self._rooms.popitem(last=False)
+            self._size -= room.size
+            self._statistics.evictions += 1
+            if(self._store is None):
+                self._evicted.add(room_id)
+
+    def apply(self, state_events, full_state=False):
+        """
+        Applies (room id, event) state events, e.g. as returned by
+        pymatrix.store.iter_state_events. full_state tells the events are
+        the whole state of their rooms, as in the response to an initial
+        sync. With a store, rooms which are not cached are left to be loaded
+        from it, as it already holds the events. Without one, the events of
+        a room which is not cached are only applied along with its full
+        state, or if the room was joined since a full state was applied:
+        the room would otherwise only hold part of its state.
+        """
+        for room_id, event in state_events:
+            room = self._rooms.get(room_id, None)
+            if(room is None):
+                if(self._store is not None):
+                    continue
+                if(not full_state and (not self._has_full_state
+                    or room_id in self._evicted)):
+                    continue
+                self._evicted.discard(room_id)
+                room = self._insert_room(room_id, ())
+            else:
+                self._rooms.move_to_end(room_id)
+            self._set_event(room, event)
+        if(full_state):
+            self._has_full_state = True
+        self._evict()
+
+    def _get_room(self, room_id):
+        room = self._rooms.get(room_id, None)
+        if(room is not None):
+            self._statistics.hits += 1
+            self._rooms.move_to_end(room_id)
+            return room
+
+        self._statistics.misses += 1
+        if(self._store is None):
+            return None
+        state = self._store.get_room_state(room_id)
+        if(not state):
+            return None
+        room = self._insert_room(room_id, state.values())
+        self._evict()
+        return room
+
+    def get_state_event(self, room_id, event_type, state_key=""):
+        """
+        Returns a state event of a room, or None
+        """
+        room = self._get_room(room_id)
+        if(room is None):
+            return None
+        return room.events.get((event_type, state_key), None)
+
+    def get_room_state(self, room_id):
+        """
+        Returns the state of a room as a dictionary mapping
+        (event type, state key) tuples to events
+        """
+        room = self._get_room(room_id)
+        return dict(room.events) if room is not None else {}
+
+    def get_room_name(self, room_id):
+        event = self.get_state_event(room_id, "m.room.name")
+        return event.get("content", {}).get("name", None) \
+            if event is not None else None
+
+    def get_power_levels(self, room_id):
+        event = self.get_state_event(room_id, "m.room.power_levels")
+        return event.get("content", None) if event is not None else None
+
+    def get_members(self, room_id, membership="join"):
+        """
+        Returns the ids of the users whose membership of the room is the one
+        given
+        """
+        room = self._get_room(room_id)
+        if(room is None):
+            return []
+        return [state_key for (event_type, state_key), event
+            in room.events.items() if event_type == "m.room.member"
+                and event.get("content", {}).get("membership") == membership]
+
+    def clear(self):
+        self._rooms.clear()
+        self._size = 0
+        self._evicted.clear()
+        self._has_full_state = False
+
+class ResponseCacheStatistics(CacheStatistics):
+    """
+    Counters of a ResponseCache. Coalesced calls waited for the fetch of
+    another caller; revalidations are expired entries the server confirmed
+    as not modified.
+    """
+    def __init__(self):
+        super().__init__()
+        self.coalesced = 0
+        self.revalidations = 0
+
+    def as_dict(self):
+        result = super().as_dict()
+        result["coalesced"] = self.coalesced
+        result["revalidations"] = self.revalidations
+        return result
+
+class _CachedResponse:
+    __slots__ = ("response", "expires_at", "etag")
+
+    def __init__(self, response, expires_at, etag):
+        self.response = response
+        self.expires_at = expires_at
+        self.etag = etag
+
+class ResponseCache:
+    """
+    Caches the responses of endpoints returning data which rarely changes,
+    keeping at most max_entries of them. Concurrent callers missing the same
+    entry share a single fetch. Expired entries having an ETag are
+    revalidated rather than fetched again.
+    """
+
+    def __init__(self, max_entries=DEFAULT_RESPONSE_CACHE_ENTRIES,
+        clock=time.monotonic):
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._single_flight = pymatrix.coalescing.SingleFlight()
+        self._statistics = ResponseCacheStatistics()
+
+    @property
+    def statistics(self): return self._statistics
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def fetch(self, key, ttl, fetch):
+        """
+        Returns the cached response for the key if it has not expired.
+        Otherwise fetch is awaited with the ETag of the expired entry (or
+        None) and must return the response, which is cached for ttl seconds
+        unless it is an error.
+        """
+        entry = self._entries.get(key, None)
+        if(entry is not None and entry.expires_at > self._clock()):
+            self._statistics.hits += 1
+            self._entries.move_to_end(key)
+            return entry.response
+
+        if(self._single_flight.is_in_flight(key)):
+            self._statistics.coalesced += 1
+        else:
+            self._statistics.misses += 1
+        return await self._single_flight.do(key,
+            lambda: self._fetch(key, ttl, fetch, entry))
+
+    async def _fetch(self, key, ttl, fetch, entry):
+        response = await fetch(entry.etag if entry is not None else None)
+        if(entry is not None and response.status == _STATUS_NOT_MODIFIED):
+            self._statistics.revalidations += 1
+            response = entry.response
+        elif(response.is_error):
+            return response
+
+        headers = response.headers
+        self._entries[key] = _CachedResponse(response,
+            self._clock() + ttl,
+            headers.get("ETag", None) if headers is not None else None)
+        self._entries.move_to_end(key)
+        while(len(self._entries) > self._max_entries):
+            self._entries.popitem(last=False)
+            self._statistics.evictions += 1
+        return response
+
+    def invalidate(self, key=None):
+        """
+        Drops the entry of a key, or every entry without a key
+        """
+        if(key is None):
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
@@ -1,27 +1,142 @@
+import pymatrix.api
+import pymatrix.cache
 import pymatrix.injection as inject
+import pymatrix.profiling
+import pymatrix.specification.base
+import pymatrix.store
+import pymatrix.tracing
 import asyncio
 from enum import Enum
 
 class Client:
     """
-    A matrix client
+    A matrix client. With a state store, the session, the sync token and
+    the room state are persisted so that a restarted client resumes where it
+    stopped. The state of the rooms is kept up to date in a cache as events
+    are read. Logging out, or logging in as another user than the one of the
+    saved session, clears the store and the cache.
     """
-    def __init__(self, api):
+    def __init__(self, api, store: pymatrix.store.StateStoreBase=None,
+        room_state: pymatrix.cache.RoomStateCache=None,
+        profiling: pymatrix.profiling.ProfilingOptions=None):
+        """
+        profiling: enables the profiling mode, sampling the event loop from
+            a successful connect to logout; see the profiler property. A
+            tracer is given to the api if it has none, to time its calls.
+        """
         self._api = api
+        self._store = store
+        self._room_state = room_state if room_state is not None \
+            else pymatrix.cache.RoomStateCache(store=store)
+        self._profiler = None
+        if(profiling is not None):
+            if(api.tracer is None):
+                api.tracer = pymatrix.tracing.Tracer()
+            self._profiler = pymatrix.profiling.Profiler(profiling,
+                api.tracer)
+
+    @property
+    def api(self): return self._api
+    @property
+    def store(self): return self._store
+    @property
+    def room_state(self): return self._room_state
+    @property
+    def profiler(self):
+        """The pymatrix.profiling.Profiler, None unless profiling"""
+        return self._profiler
 
     async def connect(self, hostname, port=None):
-        return await self._api.connect(hostname, port)
+        result = await self._api.connect(hostname, port)
+        if(self._profiler is not None):
+            self._profiler.start()
+        return result
 
     async def login(self, username, password):
-        return await self._api.login(username, password)
+        response = await self._api.login(username, password)
+        if(self._store is not None and not isinstance(response,
+            pymatrix.specification.base.ErrorMessageBase)):
+            session = self._store.get_session()
+            # the sync token and room state are another account's
+            if(session is not None
+                and session["user_id"] != response.user_id):
+                self._store.clear()
+                self._room_state.clear()
+            self._store.set_session(response.user_id, response.access_token,
+                getattr(response, "device_id", None),
+                getattr(response, "home_server", None))
+        return response
+
+    def restore_session(self):
+        """
+        Reuses the session saved in the store instead of logging in again;
+        returns False if there is none
+        """
+        session = self._store.get_session() \
+            if self._store is not None else None
+        if(session is None or session["access_token"] is None):
+            return False
+        self._api.access_token = session["access_token"]
+        return True
+
+    async def gather(self, calls,
+        max_concurrency=pymatrix.api.DEFAULT_MAX_CONCURRENCY):
+        """
+        Runs a list of (endpoint code, kwargs dict) calls concurrently and
+        returns their results, or exceptions, in order
+        """
+        return await self._api.generic_call_many(calls, max_concurrency)
+
+    def read_events(self, since=None, timeout=30000, **kwargs):
+        """
+        Returns an asynchronous iterator over the sync responses received
+        from the server. Call its aclose() method to stop polling. With a
+        store, polling starts from the saved token unless since is given,
+        and each response is saved before being returned.
+        """
+        if(since is None and self._store is not None):
+            since = self._store.get_sync_token()
+        always_full_state = bool(kwargs.get("full_state", False))
+        return self._read_and_apply_events(
+            self._api.read_events(since, timeout, **kwargs),
+            since is None or always_full_state, always_full_state)
+
+    async def _read_and_apply_events(self, events, full_state,
+        always_full_state):
+        """
+        full_state: whether the first response holds the full state of the
+            rooms, i.e. answers an initial sync
+        """
+        try:
+            async for response in events:
+                if(not isinstance(response,
+                    pymatrix.specification.base.ErrorMessageBase)):
+                    state_events = list(
+                        pymatrix.store.iter_state_events(response.rooms))
+                    if(self._store is not None):
+                        self._store.save_sync(response.next_batch,
+                            state_events)
+                    self._room_state.apply(state_events, full_state)
+                    full_state = always_full_state
+                yield response
+        finally:
+            await events.aclose()
 
     async def logout(self):
-        await self._api.logout()
+        try:
+            await self._api.logout()
+            # the next session may be another account's
+            if(self._store is not None):
+                self._store.clear()
+            self._room_state.clear()
+        finally:
+            if(self._profiler is not None):
+                await self._profiler.stop()
 
 class ClientFactory:
 
-    def get_client(api=None):
+    def get_client(api=None, store=None, room_state=None, profiling=None):
         api_instance = api \
             if api is not None \
             else inject.get_instance(inject.DEFAULT_API_TYPE)
-        return Client(api_instance)
+        return Client(api_instance, store, room_state, profiling)
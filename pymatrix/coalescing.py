@@ -0,0 +1,53 @@
+import asyncio
+
+class SingleFlightStatistics:
+    """
+    Counters of a SingleFlight; coalesced calls waited for the call of
+    another caller instead of making their own
+    """
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced
+            }
+
+class SingleFlight:
+    """
+    Makes concurrent calls sharing the same key await a single call. The
+    result (or the exception) of that call is returned to every caller.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self._statistics = SingleFlightStatistics()
+
+    @property
+    def statistics(self): return self._statistics
+
+    def is_in_flight(self, key):
+        return key in self._in_flight
+
+    async def do(self, key, func):
+        """
+        Awaits func() unless a call with the same key is already in flight,
+        in which case its result is awaited instead
+        """
+        self._statistics.calls += 1
+        in_flight = self._in_flight.get(key, None)
+        if(in_flight is not None):
+            self._statistics.coalesced += 1
+        else:
+            in_flight = asyncio.ensure_future(self._run(key, func))
+            self._in_flight[key] = in_flight
+        # a caller being cancelled must not cancel the call of the others
+        return await asyncio.shield(in_flight)
+
+    async def _run(self, key, func):
+        try:
+            return await func()
+        finally:
+            del self._in_flight[key]
@@ -0,0 +1,368 @@
+from abc import ABCMeta, abstractmethod
+from enum import Enum
+import json
+import re
+import pymatrix.error
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+class JsonEngineEnum(Enum):
+    Stdlib = "json"
+    Orjson = "orjson"
+    Ujson = "ujson"
+
+class CodecBase(metaclass=ABCMeta):
+    """
+    Base codec. Turns the primitive structures produced by a serialiser into
+    bytes ready to be sent, and the received bytes back.
+    """
+    content_type = None
+
+    @abstractmethod
+    def encode(self, data):
+        """
+        Encodes primitive structures into bytes
+        """
+        pass
+
+    @abstractmethod
+    def decode(self, raw_data):
+        """
+        Decodes bytes into primitive structures. Empty payloads decode to None.
+        """
+        pass
+
+class StdlibJsonCodec(CodecBase):
+    """
+    JSON codec using the standard library
+    """
+    content_type = "application/json"
+
+    def encode(self, data):
+        return json.dumps(data, ensure_ascii=False,
+            separators=(",", ":")).encode("utf-8")
+
+    def decode(self, raw_data):
+        if(not raw_data):
+            return None
+        if(isinstance(raw_data, memoryview)):
+            raw_data = raw_data.tobytes()
+        return json.loads(raw_data)
+
+class OrjsonCodec(CodecBase):
+    """
+    JSON codec using orjson, which encodes straight to bytes
+    """
+    content_type = "application/json"
+
+    def encode(self, data):
+        return orjson.dumps(data)
+
+    def decode(self, raw_data):
+        if(not raw_data):
+            return None
+        return orjson.loads(raw_data)
+
+class UjsonCodec(CodecBase):
+    """
+    JSON codec using ujson
+    """
+    content_type = "application/json"
+
+    def encode(self, data):
+        return ujson.dumps(data, ensure_ascii=False,
+            escape_forward_slashes=False).encode("utf-8")
+
+    def decode(self, raw_data):
+        if(not raw_data):
+            return None
+        if(isinstance(raw_data, memoryview)):
+            raw_data = raw_data.tobytes()
+        return ujson.loads(raw_data)
+
+_engines = {
+    JsonEngineEnum.Orjson: (orjson, OrjsonCodec),
+    JsonEngineEnum.Ujson: (ujson, UjsonCodec),
+    JsonEngineEnum.Stdlib: (json, StdlibJsonCodec)
+    }
+
+def is_engine_available(engine: JsonEngineEnum):
+    return _engines[engine][0] is not None
+
+def get_codec(engine: JsonEngineEnum=None):
+    """
+    Returns a JSON codec for the specified engine. Without an engine, the
+    fastest one installed is picked.
+    """
+    if(engine is None):
+        engine = next(candidate for candidate in _engines
+            if is_engine_available(candidate))
+
+    if(not is_engine_available(engine)):
+        raise pymatrix.error.SerialisationError(
+            "The JSON engine '{}' is not installed.".format(engine.value))
+    return _engines[engine][1]()
+
+_container_token_re = re.compile(rb'[\[\]{}"]')
+_string_token_re = re.compile(rb'["\\]')
+_literal_end_re = re.compile(rb'[,\]}\s]')
+_non_whitespace_re = re.compile(rb'[^ \t\r\n]')
+
+class _Frame:
+    """
+    A container being walked through by the incremental decoder
+    """
+    __slots__ = ("path", "is_object", "state", "key", "index")
+
+    def __init__(self, path, is_object):
+        self.path = path
+        self.is_object = is_object
+        self.state = "first"
+        self.key = None
+        self.index = 0
+
+    def child_path(self):
+        return self.path + ((self.key,) if self.is_object else (self.index,))
+
+class _Capture:
+    """
+    A value (or an object key) whose bytes are being accumulated
+    """
+    __slots__ = ("start", "kind", "depth", "in_string", "is_key")
+
+    def __init__(self, start, kind, is_key=False):
+        self.start = start
+        self.kind = kind
+        self.depth = 0
+        self.in_string = False
+        self.is_key = is_key
+
+class IncrementalJsonDecoder:
+    """
+    Decodes a JSON document fed chunk by chunk, handing out its sections as
+    soon as they are complete. Objects and arrays whose path is (a prefix
+    of) one of the expand paths are walked through and their members are
+    returned one by one as (path, value) tuples; any other value is decoded
+    as a whole. Only the section being received is kept in memory.
+
+    With expand_paths=[("rooms", "join")], a sync response is returned as
+    ("next_batch",), ("rooms", "join", "!room_id"), ..., ("presence",), etc.
+    """
+
+    def __init__(self, expand_paths=(), codec: CodecBase=None):
+        self._codec = codec if codec is not None else get_codec()
+        self._expanded = set([()])
+        for path in expand_paths:
+            path = tuple(path)
+            for length in range(1, len(path) + 1):
+                self._expanded.add(path[:length])
+        self._buffer = bytearray()
+        self._position = 0
+        self._stack = []
+        self._capture = None
+        self._capture_path = None
+        self._done = False
+
+    def feed(self, chunk):
+        """
+        Feeds the next chunk of the document and returns the list of
+        sections completed by it
+        """
+        self._buffer += chunk
+        sections = []
+        self._parse(sections, False)
+        return sections
+
+    def close(self):
+        """
+        Signals the end of the document and returns the last sections
+        """
+        sections = []
+        self._parse(sections, True)
+        if(not self._done):
+            self._raise_malformed("unexpected end of document")
+        return sections
+
+    def _raise_malformed(self, reason):
+        raise pymatrix.error.SerialisationError(
+            "Malformed JSON stream: {}.".format(reason))
+
+    def _parse(self, sections, is_final):
+        while(True):
+            if(self._capture is not None):
+                if(not self._scan_capture(is_final)):
+                    break
+                self._complete_capture(sections)
+                continue
+
+            match = _non_whitespace_re.search(self._buffer, self._position)
+            if(match is None):
+                self._position = len(self._buffer)
+                break
+            self._position = match.start()
+            if(self._done):
+                self._raise_malformed("trailing data after the document")
+            self._parse_token()
+
+        # only keep what has not been consumed yet
+        keep_from = self._position if self._capture is None \
+            else self._capture.start
+        if(keep_from):
+            del self._buffer[:keep_from]
+            self._position -= keep_from
+            if(self._capture is not None):
+                self._capture.start = 0
+
+    def _parse_token(self):
+        token = self._buffer[self._position:self._position + 1]
+        frame = self._stack[-1] if self._stack else None
+
+        if(frame is None):
+            self._start_value(())
+        elif(frame.is_object and frame.state in ("first", "key")):
+            if(token == b"}" and frame.state == "first"):
+                self._position += 1
+                self._close_frame()
+            elif(token == b"\""):
+                self._capture = _Capture(self._position, "string", True)
+            else:
+                self._raise_malformed("expected an object key")
+        elif(frame.is_object and frame.state == "colon"):
+            if(token != b":"):
+                self._raise_malformed("expected ':'")
+            self._position += 1
+            frame.state = "value"
+        elif(frame.state == "first" or frame.state == "value"):
+            if(token == b"]" and frame.state == "first"):
+                self._position += 1
+                self._close_frame()
+            else:
+                self._start_value(frame.child_path())
+        else: # waiting for a comma or the end of the container
+            if(token == b","):
+                self._position += 1
+                if(frame.is_object):
+                    frame.state = "key"
+                else:
+                    frame.index += 1
+                    frame.state = "value"
+            elif(token == (b"}" if frame.is_object else b"]")):
+                self._position += 1
+                self._close_frame()
+            else:
+                self._raise_malformed("expected ',' or the end of a container")
+
+    def _start_value(self, path):
+        token = self._buffer[self._position:self._position + 1]
+        if(token in (b"{", b"[") and path in self._expanded):
+            self._stack.append(_Frame(path, token == b"{"))
+            self._position += 1
+            return
+
+        if(token in (b"{", b"[")):
+            kind = "container"
+        elif(token == b"\""):
+            kind = "string"
+        else:
+            kind = "literal"
+        self._capture = _Capture(self._position, kind)
+        self._capture_path = path
+
+    def _close_frame(self):
+        self._stack.pop()
+        self._value_done()
+
+    def _value_done(self):
+        if(self._stack):
+            self._stack[-1].state = "next"
+        else:
+            self._done = True
+
+    def _scan_string(self, capture):
+        """
+        Moves past the end of the string the position is in; returns False if
+        more data is needed
+        """
+        while(True):
+            match = _string_token_re.search(self._buffer, self._position)
+            if(match is None):
+                self._position = len(self._buffer)
+                return False
+            if(match.group() == b"\\"):
+                if(match.end() >= len(self._buffer)):
+                    self._position = match.start()
+                    return False
+                self._position = match.end() + 1
+                continue
+            self._position = match.end()
+            capture.in_string = False
+            return True
+
+    def _scan_capture(self, is_final):
+        """
+        Moves to the end of the value being captured; returns False if more
+        data is needed
+        """
+        capture = self._capture
+        if(capture.kind == "string"):
+            if(self._position == capture.start):
+                self._position += 1
+                capture.in_string = True
+            return self._scan_string(capture)
+
+        if(capture.kind == "literal"):
+            match = _literal_end_re.search(self._buffer, self._position)
+            if(match is None):
+                self._position = len(self._buffer)
+                return is_final
+            self._position = match.start()
+            return True
+
+        while(True):
+            if(capture.in_string and not self._scan_string(capture)):
+                return False
+            match = _container_token_re.search(self._buffer, self._position)
+            if(match is None):
+                self._position = len(self._buffer)
+                return False
+            self._position = match.end()
+            token = match.group()
+            if(token == b"\""):
+                capture.in_string = True
+            elif(token in (b"{", b"[")):
+                capture.depth += 1
+            else:
+                capture.depth -= 1
+                if(capture.depth == 0):
+                    return True
+
+    def _complete_capture(self, sections):
+        capture = self._capture
+        self._capture = None
+        # the codecs decode empty input as None
+        if(capture.kind == "literal" and self._position == capture.start):
+            self._raise_malformed("expected a value")
+        try:
+            value = self._codec.decode(
+                bytes(self._buffer[capture.start:self._position]))
+        except ValueError as ve:
+            raise pymatrix.error.SerialisationError(
+                "Malformed JSON stream: invalid value.") from ve
+
+        if(capture.is_key):
+            frame = self._stack[-1]
+            frame.key = value
+            frame.state = "colon"
+            return
+
+        sections.append((self._capture_path, value))
+        self._capture_path = None
+        self._value_done()
@@ -0,0 +1,151 @@
+import dis
+import pymatrix.error
+
+# opcodes that carry no meaning for the shape of an accessor
+_IGNORED_OPCODES = {"RESUME", "NOP", "CACHE", "EXTENDED_ARG"}
+_PRIMITIVE_TYPES = (int, float, str, bool)
+_missing = object()
+
+def _normalised_instructions(func):
+    """
+    Lists the (opname, argval) pairs of a function, folding the
+    version-specific superinstructions back into their simple forms
+    """
+    instructions = []
+    for instruction in dis.get_instructions(func):
+        opname = instruction.opname
+        if(opname in _IGNORED_OPCODES):
+            continue
+        if(opname == "LOAD_FAST_LOAD_FAST"):
+            instructions.extend(
+                [("LOAD_FAST", name) for name in instruction.argval])
+        elif(opname.startswith("LOAD_FAST")):
+            instructions.append(("LOAD_FAST", instruction.argval))
+        elif(opname == "RETURN_CONST"):
+            instructions.append(("LOAD_CONST", instruction.argval))
+            instructions.append(("RETURN_VALUE", None))
+        else:
+            instructions.append((opname, instruction.argval))
+    return instructions
+
+def _is_plain_function(func, nb_args):
+    code = getattr(func, "__code__", None)
+    return code is not None \
+        and code.co_argcount == nb_args \
+        and not code.co_kwonlyargcount \
+        and not func.__closure__
+
+def get_getter_backing_attribute(fget):
+    """
+    Returns the attribute name read by a getter of the form
+    'return self._attribute', None if the getter does anything else
+    """
+    if(not _is_plain_function(fget, 1)):
+        return None
+    self_name = fget.__code__.co_varnames[0]
+    instructions = _normalised_instructions(fget)
+    if(len(instructions) == 3
+        and instructions[0] == ("LOAD_FAST", self_name)
+        and instructions[1][0] == "LOAD_ATTR"
+        and instructions[2][0] == "RETURN_VALUE"):
+        return instructions[1][1]
+    return None
+
+def get_setter_backing_attribute(fset):
+    """
+    Returns the attribute name written by a setter of the form
+    'self._attribute = value', None if the setter does anything else
+    """
+    if(not _is_plain_function(fset, 2)):
+        return None
+    self_name, value_name = fset.__code__.co_varnames[:2]
+    instructions = _normalised_instructions(fset)
+    if(len(instructions) == 5
+        and instructions[0] == ("LOAD_FAST", value_name)
+        and instructions[1] == ("LOAD_FAST", self_name)
+        and instructions[2][0] == "STORE_ATTR"
+        and instructions[3] == ("LOAD_CONST", None)
+        and instructions[4][0] == "RETURN_VALUE"):
+        return instructions[2][1]
+    return None
+
+def _compile(source, function_name, namespace):
+    exec(compile(source, "<pymatrix.codegen {}>".format(function_name),
+        "exec"), namespace)
+    return namespace[function_name]
+
+def make_encoder(plan):
+    """
+    Generates a function serialising an object described by a plan. The
+    function reads the backing attributes directly whenever the getters
+    allow it and calls back into the generic serialiser for anything that
+    is not a plain primitive.
+    """
+    namespace = {"_primitive_types": _PRIMITIVE_TYPES}
+    lines = ["def encode(obj, serialise):", "    result = {}"]
+    for index, field in enumerate(plan.fields):
+        attribute = get_getter_backing_attribute(field.fget)
+        if(attribute is not None):
+            lines.append("    value = obj.{}".format(attribute))
+        else:
+            namespace["_fget_{}".format(index)] = field.fget
+            lines.append("    value = _fget_{}(obj)".format(index))
+        lines.extend([
+            "    if value is not None:",
+            "        if value.__class__ not in _primitive_types:",
+            "            value = serialise(value)",
+            "        if value is not None:",
+            "            result[{!r}] = value".format(field.name)
+            ])
+    lines.append("    return result if result else None")
+    return _compile("\n".join(lines), "encode", namespace)
+
+def make_decoder(plan):
+    """
+    Generates a function deserialising a dictionary into an object described
+    by a plan. Returns None if the plan cannot be compiled, i.e. if one of
+    its members is read-only.
+    """
+    if(any(field.fset is None for field in plan.fields)):
+        return None
+
+    namespace = {
+        "_missing": _missing,
+        "_known_names": frozenset(plan.fields_by_name),
+        "SerialisationError": pymatrix.error.SerialisationError
+        }
+    lines = ["def decode(cls, data, deserialise, fallback):"]
+    if(not plan.ignore_unknown_members):
+        lines.extend([
+            "    if not _known_names.issuperset(data):",
+            "        return fallback(data, cls)"
+            ])
+    lines.extend(["    obj = cls()", "    try:"])
+    for index, field in enumerate(plan.fields):
+        if(field.underlying_type is None):
+            conversion = "value"
+        else:
+            namespace["_type_{}".format(index)] = field.underlying_type
+            conversion = "deserialise(value, _type_{})".format(index)
+
+        attribute = get_setter_backing_attribute(field.fset)
+        if(attribute is not None):
+            assignment = "obj.{} = {}".format(attribute, conversion)
+        else:
+            namespace["_fset_{}".format(index)] = field.fset
+            assignment = "_fset_{}(obj, {})".format(index, conversion)
+
+        lines.extend([
+            "        value = data.get({!r}, _missing)".format(field.name),
+            "        if value is not _missing:",
+            "            {}".format(assignment)
+            ])
+    if(not plan.fields):
+        lines.append("        pass")
+    lines.extend([
+        "    except AttributeError as ae:",
+        "        raise SerialisationError(",
+        "            \"There was an error setting the member 'key'.\") from ae",
+        "    return obj"
+        ])
+    return _compile("\n".join(lines), "decode", namespace)
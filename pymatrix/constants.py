@@ -6,6 +6,7 @@ class ErrorStringEnum(Enum):
     NoLoginProvided = ErrorCodeBase + 1
     MalformedMessage = ErrorCodeBase + 2
     NotInSpecification = ErrorCodeBase + 3
+    IncompleteRoute = ErrorCodeBase + 4
 
 SpecLevelIndexBase = 0
 class SpecLevelEnum(Enum):
@@ -30,3 +31,5 @@ class EndpointNamesEnum(Enum):
     Account3pid = EndpointNameIndexBase + 9
     Account3pidEmailRequestToken = EndpointNameIndexBase + 10
     AccountWhoami = EndpointNameIndexBase + 11
+    Sync = EndpointNameIndexBase + 12
+    Profile = EndpointNameIndexBase + 13
@@ -1,13 +1,13 @@
-import pymatrix.api
-import pymatrix.backend.http
-import pymatrix.serialisation
-import pymatrix.specification.r0
+import pymatrix.lazy
 
-DEFAULT_BACKEND_TYPE = pymatrix.backend.http.HttpBackend
-DEFAULT_SERIALISER_TYPE = pymatrix.serialisation.JsonSerialiser
-DEFAULT_API_TYPE = pymatrix.api.RestApi
-
-SPEC_R0 = pymatrix.specification.r0.Specification
+# the default types are only imported when first read, the HTTP backend
+# importing aiohttp
+__getattr__ = pymatrix.lazy.module_getattr(__name__, {
+    "DEFAULT_BACKEND_TYPE": "pymatrix.backend.http:HttpBackend",
+    "DEFAULT_SERIALISER_TYPE": "pymatrix.serialisation:JsonSerialiser",
+    "DEFAULT_API_TYPE": "pymatrix.api:RestApi",
+    "SPEC_R0": "pymatrix.specification.r0:Specification"
+    })
 
 def get_instance(type: type):
     return type()
@@ -0,0 +1,46 @@
+import importlib
+import importlib.util
+import sys
+
+def lazy_import(name):
+    """
+    Returns a module which is only executed the first time one of its
+    attributes is read, so that importing a module depending on it costs
+    nothing until it is used. The module is registered like an imported
+    one: later imports of it get the same object.
+    """
+    module = sys.modules.get(name, None)
+    if(module is not None):
+        return module
+    spec = importlib.util.find_spec(name)
+    if(spec is None):
+        raise ModuleNotFoundError("No module named '{}'".format(name),
+            name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    parent, _, child = name.rpartition(".")
+    if(parent):
+        setattr(sys.modules[parent], child, module)
+    return module
+
+def module_getattr(module_name, attributes):
+    """
+    Returns a module level __getattr__ (PEP 562) resolving the names of
+    attributes, a dictionary of "module:attribute" strings keyed by name,
+    by importing them the first time they are read
+    """
+    def __getattr__(name):
+        target = attributes.get(name, None)
+        if(target is None):
+            raise AttributeError("module '{}' has no attribute '{}'".format(
+                module_name, name))
+        target_module, _, target_attribute = target.partition(":")
+        value = getattr(importlib.import_module(target_module),
+            target_attribute)
+        # cached, so that __getattr__ is no longer called for this name
+        setattr(sys.modules[module_name], name, value)
+        return value
+    return __getattr__
@@ -28,7 +28,9 @@ strings = {
         "identifiant Matrix, identifiant tiers (3PID) ou jeton d'API.",
         consts.ErrorStringEnum.MalformedMessage: "Message malformé.",
         consts.ErrorStringEnum.NotInSpecification: "Message non présent "
-        "dans la spécification."
+        "dans la spécification.",
+        consts.ErrorStringEnum.IncompleteRoute: "Le message doit définir "
+        "ses types de requête, de réponse et d'erreur pour être envoyé."
         },
     LocaleStringEnum.English: {
         consts.ErrorStringEnum.NoLoginProvided: "No login identifier was "
@@ -36,6 +38,8 @@ strings = {
             "Matrix identifier, third-party identifier (3PID) or API token.",
         consts.ErrorStringEnum.MalformedMessage: "Malformed message.",
         consts.ErrorStringEnum.NotInSpecification: "Message not present "
-        "in the specification."
+        "in the specification.",
+        consts.ErrorStringEnum.IncompleteRoute: "The message must define "
+        "its request, response and error types to be sent."
         }
     }
@@ -0,0 +1,363 @@
+from enum import Enum
+import http
+import threading
+import time
+import pymatrix.constants
+import pymatrix.lazy
+
+# only needed once a MetricsServer is started
+pymatrix.lazy.lazy_import("http.server")
+
+try:
+    import prometheus_client
+    import prometheus_client.core
+except ImportError:
+    prometheus_client = None
+
+# upper bounds, in seconds, of the buckets request latencies are counted in
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+    2.5, 5.0, 10.0)
+# content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_METRICS_PORT = 9464
+# status label of the requests which got no response
+STATUS_EXCEPTION = "exception"
+
+class MetricsError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+def is_prometheus_client_available():
+    return prometheus_client is not None
+
+def _label(value):
+    return value.name if isinstance(value, Enum) else str(value)
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"") \
+        .replace("\n", "\\n")
+
+def _format_value(value):
+    if(value == float("inf")):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class MetricFamily:
+    """
+    A metric and its samples, each sample being a (name, labels dict, value)
+    tuple. The name of a counter has no _total suffix; its samples do.
+    """
+    def __init__(self, name, type, documentation):
+        self.name = name
+        self.type = type
+        self.documentation = documentation
+        self.samples = []
+
+    def add_sample(self, name, labels, value):
+        self.samples.append((name, labels, value))
+
+class _LatencyHistogram:
+    __slots__ = ("count", "total", "buckets")
+
+    def __init__(self, bucket_bounds):
+        self.count = 0
+        self.total = 0.0
+        self.buckets = [0] * len(bucket_bounds)
+
+class ClientMetrics:
+    """
+    Client-side metrics of one or many ApiBase instances, in the Prometheus
+    data model: requests by endpoint and status, their latency, the errcodes
+    of the error responses, the requests in flight, the usage of connection
+    pools and how long ago a sync batch was last received. Samples may be
+    recorded from the event loop while being rendered from another thread.
+    """
+
+    def __init__(self, latency_buckets=DEFAULT_LATENCY_BUCKETS,
+        clock=time.monotonic):
+        self._latency_buckets = tuple(latency_buckets)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._latencies = {}
+        self._errors = {}
+        self._in_flight = {}
+        self._pools = {}
+        self._sync_batches = 0
+        self._sync_errors = 0
+        self._last_sync = None
+
+    def add_pool(self, statistics, name="default"):
+        """
+        Exposes the usage of a connection pool, a
+        pymatrix.backend.http.PoolStatistics read when the metrics are
+        collected; see HttpBackend.pool_statistics and
+        ClientPool.pool_statistics
+        """
+        with self._lock:
+            self._pools[name] = statistics
+
+    def remove_pool(self, name="default"):
+        with self._lock:
+            self._pools.pop(name, None)
+
+    def _request_started(self, endpoint):
+        endpoint = _label(endpoint)
+        with self._lock:
+            self._in_flight[endpoint] = self._in_flight.get(endpoint, 0) + 1
+
+    def _request_finished(self, endpoint, status, duration):
+        """
+        status: None if the request raised an exception
+        """
+        endpoint = _label(endpoint)
+        key = (endpoint,
+            str(status) if status is not None else STATUS_EXCEPTION)
+        with self._lock:
+            self._in_flight[endpoint] -= 1
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latencies.get(endpoint, None)
+            if(histogram is None):
+                histogram = _LatencyHistogram(self._latency_buckets)
+                self._latencies[endpoint] = histogram
+            histogram.count += 1
+            histogram.total += duration
+            for index, bound in enumerate(self._latency_buckets):
+                if(duration <= bound):
+                    histogram.buckets[index] += 1
+
+    def _record_errcode(self, endpoint, errcode):
+        key = (_label(endpoint), errcode if errcode is not None else "")
+        with self._lock:
+            self._errors[key] = self._errors.get(key, 0) + 1
+
+    def _record_sync(self, status, is_error=None):
+        """
+        Counts a long poll; its latency is not recorded, a long poll being
+        held by the server until there are events. is_error: whether the
+        response is an error, by default if its status is one
+        """
+        if(is_error is None):
+            is_error = status is not None and status >= 400
+        key = (_label(pymatrix.constants.EndpointNamesEnum.Sync), str(status))
+        with self._lock:
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if(is_error):
+                self._sync_errors += 1
+            else:
+                self._sync_batches += 1
+                self._last_sync = self._clock()
+
+    def collect(self):
+        """
+        Returns the current values as a list of MetricFamily
+        """
+        with self._lock:
+            families = []
+
+            requests = MetricFamily("pymatrix_requests", "counter",
+                "Requests sent, by endpoint and response status")
+            for (endpoint, status), value in sorted(self._requests.items()):
+                requests.add_sample("pymatrix_requests_total",
+                    {"endpoint": endpoint, "status": status}, value)
+            families.append(requests)
+
+            latency = MetricFamily("pymatrix_request_duration_seconds",
+                "histogram",
+                "Time from sending a request to receiving its response, "
+                "including retries")
+            for endpoint, histogram in sorted(self._latencies.items()):
+                for bound, count in zip(self._latency_buckets,
+                    histogram.buckets):
+                    latency.add_sample(
+                        "pymatrix_request_duration_seconds_bucket",
+                        {"endpoint": endpoint, "le": _format_value(bound)},
+                        count)
+                latency.add_sample("pymatrix_request_duration_seconds_bucket",
+                    {"endpoint": endpoint, "le": "+Inf"}, histogram.count)
+                latency.add_sample("pymatrix_request_duration_seconds_sum",
+                    {"endpoint": endpoint}, histogram.total)
+                latency.add_sample("pymatrix_request_duration_seconds_count",
+                    {"endpoint": endpoint}, histogram.count)
+            families.append(latency)
+
+            errors = MetricFamily("pymatrix_errors", "counter",
+                "Error responses, by endpoint and errcode")
+            for (endpoint, errcode), value in sorted(self._errors.items()):
+                errors.add_sample("pymatrix_errors_total",
+                    {"endpoint": endpoint, "errcode": errcode}, value)
+            families.append(errors)
+
+            in_flight = MetricFamily("pymatrix_requests_in_flight", "gauge",
+                "Requests waiting for their response")
+            for endpoint, value in sorted(self._in_flight.items()):
+                in_flight.add_sample("pymatrix_requests_in_flight",
+                    {"endpoint": endpoint}, value)
+            families.append(in_flight)
+
+            families.extend(self._collect_pools())
+
+            sync = MetricFamily("pymatrix_sync_batches", "counter",
+                "Sync responses received, by outcome")
+            sync.add_sample("pymatrix_sync_batches_total",
+                {"outcome": "success"}, self._sync_batches)
+            sync.add_sample("pymatrix_sync_batches_total",
+                {"outcome": "error"}, self._sync_errors)
+            families.append(sync)
+            if(self._last_sync is not None):
+                lag = MetricFamily("pymatrix_sync_lag_seconds", "gauge",
+                    "Time since the last sync batch was received")
+                lag.add_sample("pymatrix_sync_lag_seconds", {},
+                    self._clock() - self._last_sync)
+                families.append(lag)
+            return families
+
+    def _collect_pools(self):
+        connections = MetricFamily("pymatrix_pool_connections", "gauge",
+            "Connections of the pool, by state")
+        created = MetricFamily("pymatrix_pool_connections_created", "counter",
+            "Connections opened by the pool")
+        reused = MetricFamily("pymatrix_pool_connections_reused", "counter",
+            "Requests sent over an already open connection")
+        waits = MetricFamily("pymatrix_pool_waits", "counter",
+            "Requests which waited for a free connection")
+        wait_time = MetricFamily("pymatrix_pool_wait_seconds", "counter",
+            "Time spent waiting for a free connection")
+        for name, statistics in sorted(self._pools.items()):
+            usage = statistics.as_dict()
+            for state in ("idle", "acquired"):
+                connections.add_sample("pymatrix_pool_connections",
+                    {"pool": name, "state": state}, usage[state])
+            created.add_sample("pymatrix_pool_connections_created_total",
+                {"pool": name}, usage["connections_created"])
+            reused.add_sample("pymatrix_pool_connections_reused_total",
+                {"pool": name}, usage["connections_reused"])
+            waits.add_sample("pymatrix_pool_waits_total",
+                {"pool": name}, usage["wait_count"])
+            wait_time.add_sample("pymatrix_pool_wait_seconds_total",
+                {"pool": name}, usage["wait_time_total"])
+        return [connections, created, reused, waits, wait_time]
+
+    def render(self):
+        """
+        Returns the metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for family in self.collect():
+            name = family.name + "_total" if family.type == "counter" \
+                else family.name
+            lines.append("# HELP {} {}".format(name, family.documentation))
+            lines.append("# TYPE {} {}".format(name, family.type))
+            for sample_name, labels, value in family.samples:
+                if(labels):
+                    sample_name += "{" + ",".join(
+                        "{}=\"{}\"".format(label, _escape(label_value))
+                        for label, label_value in labels.items()) + "}"
+                lines.append("{} {}".format(sample_name,
+                    _format_value(value)))
+        return "\n".join(lines) + "\n"
+
+    def register(self, registry=None):
+        """
+        Registers the metrics with a prometheus_client registry, the default
+        one if None, e.g. to serve them along with the other metrics of the
+        process or push them with prometheus_client.push_to_gateway
+        """
+        if(prometheus_client is None):
+            raise MetricsError("prometheus_client is not installed")
+        collector = _PrometheusCollector(self)
+        (registry if registry is not None
+            else prometheus_client.REGISTRY).register(collector)
+        return collector
+
+    def push(self, gateway, job, **kwargs):
+        """
+        Pushes the metrics to a Prometheus push gateway; kwargs are passed
+        on to prometheus_client.push_to_gateway
+        """
+        if(prometheus_client is None):
+            raise MetricsError("prometheus_client is not installed")
+        registry = prometheus_client.CollectorRegistry()
+        self.register(registry)
+        prometheus_client.push_to_gateway(gateway, job, registry, **kwargs)
+
+class _PrometheusCollector:
+    def __init__(self, metrics):
+        self._metrics = metrics
+
+    def collect(self):
+        for family in self._metrics.collect():
+            metric = prometheus_client.core.Metric(family.name,
+                family.documentation, family.type)
+            for name, labels, value in family.samples:
+                metric.add_sample(name, labels, value)
+            yield metric
+
+class _MetricsRequestHandlerMixin:
+    """
+    Request handling of a MetricsServer, mixed with
+    http.server.BaseHTTPRequestHandler when the server starts
+    """
+    metrics = None
+    path_served = None
+
+    def do_GET(self):
+        if(self.path.split("?", 1)[0] != self.path_served):
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class MetricsServer:
+    """
+    Serves metrics to Prometheus from a thread of its own, so that scrapes
+    are answered even while the event loop is busy
+    """
+
+    def __init__(self, metrics: ClientMetrics, hostname="localhost",
+        port=DEFAULT_METRICS_PORT, path="/metrics"):
+        """
+        port: 0 to pick a free port, see the port property once started
+        """
+        self._metrics = metrics
+        self._hostname = hostname
+        self._port = port
+        self._path = path
+        self._server = None
+        self._thread = None
+
+    @property
+    def port(self):
+        if(self._server is None):
+            return self._port
+        return self._server.server_address[1]
+    @property
+    def running(self): return self._server is not None
+
+    def start(self):
+        if(self._server is not None):
+            return
+        handler = type("MetricsRequestHandler",
+            (_MetricsRequestHandlerMixin, http.server.BaseHTTPRequestHandler),
+            {"metrics": self._metrics, "path_served": self._path})
+        self._server = http.server.ThreadingHTTPServer(
+            (self._hostname, self._port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever,
+            name="pymatrix-metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if(self._server is None):
+            return
+        self._server.shutdown()
+        self._thread.join()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
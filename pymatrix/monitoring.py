@@ -0,0 +1,93 @@
+import asyncio
+import time
+
+DEFAULT_LAG_INTERVAL = 0.1
+# upper bounds, in seconds, of the buckets lags are counted in
+DEFAULT_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+class LoopLagStatistics:
+    """
+    Lags measured by a LoopLagMonitor, in seconds. buckets maps each upper
+    bound to the number of lags up to it; lags above the last bound are only
+    counted in samples.
+    """
+    def __init__(self, bucket_bounds=DEFAULT_LAG_BUCKETS):
+        self.samples = 0
+        self.lag_total = 0.0
+        self.lag_max = 0.0
+        self.lag_last = 0.0
+        self.buckets = dict((bound, 0) for bound in bucket_bounds)
+
+    def _record(self, lag):
+        self.samples += 1
+        self.lag_total += lag
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_last = lag
+        for bound in self.buckets:
+            if(lag <= bound):
+                self.buckets[bound] += 1
+
+    @property
+    def lag_mean(self):
+        return self.lag_total / self.samples if self.samples else 0.0
+
+    def as_dict(self):
+        return {
+            "samples": self.samples,
+            "lag_mean": self.lag_mean,
+            "lag_max": self.lag_max,
+            "lag_last": self.lag_last,
+            "buckets": dict(self.buckets)
+            }
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a callback scheduled every
+    interval seconds, i.e. how long coroutines are kept waiting by code
+    blocking the loop
+    """
+
+    def __init__(self, interval=DEFAULT_LAG_INTERVAL,
+        bucket_bounds=DEFAULT_LAG_BUCKETS):
+        self._interval = interval
+        self._statistics = LoopLagStatistics(bucket_bounds)
+        self._task = None
+        self._last_tick = None
+
+    @property
+    def statistics(self): return self._statistics
+    @property
+    def running(self): return self._task is not None
+    @property
+    def interval(self): return self._interval
+    @property
+    def last_tick(self):
+        """
+        time.perf_counter() value when the loop last ran the measuring
+        callback, None before it first ran; readable from other threads
+        """
+        return self._last_tick
+
+    def start(self):
+        """
+        Starts measuring; must be called while the event loop is running
+        """
+        if(self._task is None):
+            self._last_tick = time.perf_counter()
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if(self._task is not None):
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while(True):
+            expected = time.perf_counter() + self._interval
+            await asyncio.sleep(self._interval)
+            self._last_tick = time.perf_counter()
+            self._statistics._record(max(0.0, self._last_tick - expected))
@@ -0,0 +1,191 @@
+import pymatrix.api
+import pymatrix.backend.http
+import pymatrix.client
+import pymatrix.serialisation
+import pymatrix.specification.r0
+import asyncio
+
+class ClientPoolError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+class AccountUsage:
+    """
+    Resources used by one account of a ClientPool
+    """
+    def __init__(self):
+        self.sync_responses = 0
+        self.sync_errors = 0
+
+    def as_dict(self, client):
+        result = {
+            "sync_responses": self.sync_responses,
+            "sync_errors": self.sync_errors,
+            "rooms_cached": len(client.room_state),
+            "room_state_bytes": client.room_state.size
+            }
+        backend = client.api.backend
+        if(isinstance(backend, pymatrix.backend.http.HttpBackend)):
+            result["connections_created"] = \
+                backend.pool_statistics.connections_created
+            result["connections_reused"] = \
+                backend.pool_statistics.connections_reused
+            result["retries"] = backend.retry_statistics.retries
+        return result
+
+class _Account:
+    __slots__ = ("client", "usage")
+
+    def __init__(self, client):
+        self.client = client
+        self.usage = AccountUsage()
+
+class ClientPool:
+    """
+    Runs many accounts in the same event loop. The clients it creates share
+    one connection pool, serialiser and specification, so that each account
+    only costs its own session and state.
+    """
+
+    def __init__(self,
+        pool_options: pymatrix.backend.http.ConnectionPoolOptions=None,
+        serialiser=None, specification=None):
+        self._pool_options = pool_options if pool_options is not None \
+            else pymatrix.backend.http.ConnectionPoolOptions()
+        self._serialiser = serialiser if serialiser is not None \
+            else pymatrix.serialisation.JsonSerialiser()
+        self._specification = specification if specification is not None \
+            else pymatrix.specification.r0.Specification()
+        self._connector = None
+        self._pool_statistics = pymatrix.backend.http.PoolStatistics()
+        self._accounts = {}
+
+    @property
+    def pool_statistics(self):
+        """Usage of the shared connection pool; only its open, idle and
+        acquired counts are tracked"""
+        return self._pool_statistics
+
+    def __len__(self):
+        return len(self._accounts)
+
+    def __contains__(self, account_id):
+        return account_id in self._accounts
+
+    def get_client(self, account_id):
+        account = self._accounts.get(account_id, None)
+        if(account is None):
+            raise ClientPoolError(
+                "No account '{}' in the pool.".format(account_id))
+        return account.client
+
+    def _get_connector(self):
+        if(self._connector is None or self._connector.closed):
+            # created on first use as it needs a running event loop
+            self._connector = pymatrix.backend.http.make_connector(
+                self._pool_options)
+            self._pool_statistics._attach(self._connector)
+        return self._connector
+
+    def add_client(self, account_id, client):
+        """
+        Adds a client built elsewhere to the pool, e.g. one using its own
+        backend
+        """
+        if(account_id in self._accounts):
+            raise ClientPoolError(
+                "The account '{}' is already in the pool.".format(account_id))
+        self._accounts[account_id] = _Account(client)
+        return client
+
+    async def create_client(self, account_id, hostname, port=None,
+        store=None, retry_policy=None, timeout=None):
+        """
+        Creates a client using the shared resources, connects it and adds
+        it to the pool. It still has to log in or restore its session.
+        """
+        backend = pymatrix.backend.http.HttpBackend(
+            retry_policy=retry_policy, timeout=timeout,
+            connector=self._get_connector())
+        client = pymatrix.client.Client(pymatrix.api.RestApi(backend,
+            self._serialiser, self._specification), store)
+        self.add_client(account_id, client)
+        await client.connect(hostname, port)
+        return client
+
+    async def remove_client(self, account_id):
+        """
+        Logs the client out and removes it from the pool
+        """
+        client = self.get_client(account_id)
+        del self._accounts[account_id]
+        await client.logout()
+
+    async def read_events(self, timeout=30000, **kwargs):
+        """
+        Runs the sync loops of every account in the pool concurrently and
+        yields (account id, response) tuples as responses are received. An
+        account whose loop fails yields its exception in place of a response
+        and stops. The responses wait to be consumed in a queue holding as
+        many of them as there are accounts, which one busy account may fill
+        on its own; once it is full, every loop waits for the consumer, so a
+        slow consumer slows down the polls rather than piling up responses.
+        Call aclose() to stop every loop.
+        """
+        accounts = list(self._accounts.items())
+        queue = asyncio.Queue(maxsize=max(1, len(accounts)))
+        finished = object()
+
+        async def pump(account_id, account):
+            events = account.client.read_events(timeout=timeout, **kwargs)
+            try:
+                async for response in events:
+                    account.usage.sync_responses += 1
+                    await queue.put((account_id, response))
+            except Exception as e:
+                account.usage.sync_errors += 1
+                await queue.put((account_id, e))
+            finally:
+                await events.aclose()
+            # not reached once cancelled, when nothing reads the queue anymore
+            await queue.put((account_id, finished))
+
+        tasks = [asyncio.ensure_future(pump(account_id, account))
+            for account_id, account in accounts]
+        running = len(tasks)
+        try:
+            while(running > 0):
+                account_id, response = await queue.get()
+                if(response is finished):
+                    running -= 1
+                    continue
+                yield (account_id, response)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def get_usage(self):
+        """
+        Returns the resources used by each account, keyed by account id,
+        and by the shared pool under the None key
+        """
+        usage = dict((account_id, account.usage.as_dict(account.client))
+            for account_id, account in self._accounts.items())
+        usage[None] = {
+            "accounts": len(self._accounts),
+            "open_connections": self._pool_statistics.open,
+            "idle_connections": self._pool_statistics.idle
+            }
+        return usage
+
+    async def close(self):
+        """
+        Logs every client out and closes the shared connection pool
+        """
+        for account_id in list(self._accounts):
+            await self.remove_client(account_id)
+        if(self._connector is not None):
+            await self._connector.close()
+            self._connector = None
+            self._pool_statistics._attach(None)
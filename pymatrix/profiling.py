@@ -0,0 +1,289 @@
+import pymatrix.lazy
+import pymatrix.monitoring
+import pymatrix.tracing
+import asyncio
+import collections
+import io
+import sys
+import threading
+import time
+import traceback
+
+# only needed when a profile window is taken
+cProfile = pymatrix.lazy.lazy_import("cProfile")
+pstats = pymatrix.lazy.lazy_import("pstats")
+
+DEFAULT_SLOW_CALLBACK_THRESHOLD = 0.1
+DEFAULT_REPORT_INTERVAL = 60.0
+# slow callbacks kept for the reports, the oldest being dropped first
+DEFAULT_MAX_SLOW_CALLBACKS = 20
+DEFAULT_STACK_LIMIT = 30
+
+# stages spent running code in the process rather than waiting for the
+# server
+_SERIALISATION_STAGES = (
+    pymatrix.tracing.TraceStageEnum.Build,
+    pymatrix.tracing.TraceStageEnum.Serialise,
+    pymatrix.tracing.TraceStageEnum.Decode,
+    pymatrix.tracing.TraceStageEnum.Deserialise)
+_IO_STAGES = (pymatrix.tracing.TraceStageEnum.Send,)
+
+class ProfilingError(Exception):
+    def __init__(self, message):
+        super().__init__(message)
+
+class ProfilingOptions:
+    """
+    Settings of the profiling mode of a Client
+    """
+    lag_interval = None
+    slow_callback_threshold = None
+    report_interval = None
+    report_stream = None
+    on_report = None
+    max_slow_callbacks = None
+    stack_limit = None
+
+    def __init__(self,
+        lag_interval=pymatrix.monitoring.DEFAULT_LAG_INTERVAL,
+        slow_callback_threshold=DEFAULT_SLOW_CALLBACK_THRESHOLD,
+        report_interval=DEFAULT_REPORT_INTERVAL, report_stream=None,
+        on_report=None, max_slow_callbacks=DEFAULT_MAX_SLOW_CALLBACKS,
+        stack_limit=DEFAULT_STACK_LIMIT):
+        """
+        lag_interval: seconds between two measures of the loop lag
+        slow_callback_threshold: seconds the loop has to be blocked for the
+            code blocking it to be recorded
+        report_interval: seconds between two periodic reports, None for
+            reports on demand only
+        report_stream: text stream periodic reports are written to
+        on_report: callable receiving each periodic ProfileReport
+        stack_limit: frames kept of the stack of a slow callback
+        """
+        self.lag_interval = lag_interval
+        self.slow_callback_threshold = slow_callback_threshold
+        self.report_interval = report_interval
+        self.report_stream = report_stream
+        self.on_report = on_report
+        self.max_slow_callbacks = max_slow_callbacks
+        self.stack_limit = stack_limit
+
+class SlowCallback:
+    """
+    Code which kept the event loop blocked, with the stack it was caught
+    running; duration is a lower bound until the loop runs again
+    """
+    def __init__(self, started_at, duration, stack):
+        self.started_at = started_at
+        self.duration = duration
+        self.stack = stack
+
+    def as_dict(self):
+        return {
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "stack": list(self.stack)
+            }
+
+class ProfileReport:
+    """
+    What a Profiler measured since it started
+    """
+    def __init__(self, elapsed, loop_lag, slow_callbacks, stages):
+        """
+        loop_lag: the LoopLagStatistics as a dictionary
+        slow_callbacks: the most recent SlowCallback instances
+        stages: (count, duration total) tuples keyed by TraceStageEnum
+        """
+        self.elapsed = elapsed
+        self.loop_lag = loop_lag
+        self.slow_callbacks = slow_callbacks
+        self.stages = stages
+
+    @property
+    def serialisation_time(self):
+        return sum(self.stages[stage][1] for stage in _SERIALISATION_STAGES
+            if stage in self.stages)
+
+    @property
+    def io_time(self):
+        return sum(self.stages[stage][1] for stage in _IO_STAGES
+            if stage in self.stages)
+
+    def as_dict(self):
+        return {
+            "elapsed": self.elapsed,
+            "loop_lag": self.loop_lag,
+            "slow_callbacks": [slow_callback.as_dict()
+                for slow_callback in self.slow_callbacks],
+            "stages": dict((stage.value,
+                {"count": count, "duration_total": duration})
+                for stage, (count, duration) in self.stages.items()),
+            "serialisation_time": self.serialisation_time,
+            "io_time": self.io_time
+            }
+
+    def format(self):
+        lines = [
+            "profile over {:.1f}s".format(self.elapsed),
+            "loop lag: mean {:.2f}ms, max {:.2f}ms over {} samples".format(
+                self.loop_lag["lag_mean"] * 1000,
+                self.loop_lag["lag_max"] * 1000, self.loop_lag["samples"]),
+            "serialisation {:.3f}s, i/o {:.3f}s".format(
+                self.serialisation_time, self.io_time)
+            ]
+        for stage, (count, duration) in self.stages.items():
+            lines.append("  {}: {} calls, {:.3f}s".format(stage.value, count,
+                duration))
+        lines.append("{} slow callbacks".format(len(self.slow_callbacks)))
+        for slow_callback in self.slow_callbacks:
+            lines.append("  blocked {:.3f}s at:".format(
+                slow_callback.duration))
+            lines.extend("    " + line
+                for frame in slow_callback.stack
+                for line in frame.rstrip("\n").split("\n"))
+        return "\n".join(lines) + "\n"
+
+class Profiler:
+    """
+    Samples a running event loop: its lag, the code blocking it for longer
+    than a threshold, caught with its stack by a watchdog thread, and, if
+    given a tracer, the time calls spend serialising versus waiting for the
+    server. cProfile windows can be taken on demand.
+    """
+
+    def __init__(self, options: ProfilingOptions=None,
+        tracer: pymatrix.tracing.Tracer=None):
+        self._options = options if options is not None \
+            else ProfilingOptions()
+        self._tracer = tracer
+        self._monitor = pymatrix.monitoring.LoopLagMonitor(
+            self._options.lag_interval)
+        self._stage_observer = pymatrix.tracing.HistogramObserver()
+        self._slow_callbacks = collections.deque(
+            maxlen=self._options.max_slow_callbacks)
+        self._started_at = None
+        self._loop_thread_id = None
+        self._watchdog = None
+        self._stopping = threading.Event()
+        self._report_task = None
+        self._cprofile = None
+
+    @property
+    def running(self): return self._started_at is not None
+    @property
+    def options(self): return self._options
+
+    def start(self):
+        """
+        Starts sampling; must be called while the event loop is running
+        """
+        if(self._started_at is not None):
+            return
+        self._started_at = time.perf_counter()
+        self._loop_thread_id = threading.get_ident()
+        self._monitor.start()
+        if(self._tracer is not None):
+            self._tracer.add_observer(self._stage_observer)
+        self._stopping.clear()
+        self._watchdog = threading.Thread(target=self._watch,
+            name="pymatrix-profiler", daemon=True)
+        self._watchdog.start()
+        if(self._options.report_interval is not None):
+            self._report_task = asyncio.ensure_future(self._report_forever())
+
+    async def stop(self):
+        if(self._started_at is None):
+            return
+        if(self._report_task is not None):
+            self._report_task.cancel()
+            try:
+                await self._report_task
+            except asyncio.CancelledError:
+                pass
+            self._report_task = None
+        self._stopping.set()
+        self._watchdog.join()
+        self._watchdog = None
+        if(self._tracer is not None):
+            self._tracer.remove_observer(self._stage_observer)
+        await self._monitor.stop()
+        self._started_at = None
+
+    def report(self):
+        """
+        Returns a ProfileReport of what was measured so far
+        """
+        stages = {}
+        for stage in pymatrix.tracing.TraceStageEnum:
+            histogram = self._stage_observer.get_histogram(stage)
+            if(histogram is not None):
+                stages[stage] = (histogram.count, histogram.duration_total)
+        elapsed = time.perf_counter() - self._started_at \
+            if self._started_at is not None else 0.0
+        return ProfileReport(elapsed, self._monitor.statistics.as_dict(),
+            list(self._slow_callbacks), stages)
+
+    async def profile(self, duration, path=None):
+        """
+        Runs cProfile on the event loop thread for duration seconds while
+        the loop keeps running, and returns the pstats.Stats; they are also
+        dumped to path if given, for pstats or snakeviz
+        """
+        if(self._cprofile is not None):
+            raise ProfilingError("a profile is already being taken")
+        self._cprofile = cProfile.Profile()
+        try:
+            self._cprofile.enable()
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                self._cprofile.disable()
+            stats = pstats.Stats(self._cprofile, stream=io.StringIO())
+        finally:
+            self._cprofile = None
+        if(path is not None):
+            stats.dump_stats(path)
+        return stats
+
+    async def _report_forever(self):
+        while(True):
+            await asyncio.sleep(self._options.report_interval)
+            report = self.report()
+            if(self._options.report_stream is not None):
+                self._options.report_stream.write(report.format())
+                self._options.report_stream.flush()
+            if(self._options.on_report is not None):
+                self._options.on_report(report)
+
+    def _watch(self):
+        """
+        Runs in the watchdog thread: the loop is blocked when the monitor
+        misses its tick by more than the threshold, and the stack of the
+        loop thread is then what blocks it
+        """
+        threshold = self._options.slow_callback_threshold
+        interval = self._monitor.interval
+        stalled_tick = None
+        slow_callback = None
+        while(not self._stopping.wait(min(threshold, interval) / 2)):
+            last_tick = self._monitor.last_tick
+            now = time.perf_counter()
+            if(slow_callback is not None):
+                if(last_tick != stalled_tick):
+                    slow_callback.duration = max(slow_callback.duration,
+                        last_tick - stalled_tick - interval)
+                    slow_callback = None
+                else:
+                    slow_callback.duration = now - stalled_tick - interval
+                continue
+            if(last_tick is None or now - last_tick - interval <= threshold):
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id, None)
+            if(frame is None):
+                continue
+            stalled_tick = last_tick
+            slow_callback = SlowCallback(time.time() - (now - last_tick),
+                now - last_tick - interval,
+                traceback.format_stack(frame, self._options.stack_limit))
+            self._slow_callbacks.append(slow_callback)
@@ -0,0 +1,124 @@
+import asyncio
+import time
+
+class TokenBucket:
+    """
+    Lets requests through at a given rate, with bursts up to a capacity.
+    The rate adapts to the server: it is cut when the server reports a rate
+    limit and slowly grows back with each request that goes through.
+    """
+
+    def __init__(self, rate, capacity, min_rate, max_rate,
+        increase_step, decrease_factor):
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0
+        # waiters queue on the lock instead of all polling the bucket
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity,
+            self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        """
+        Waits until a request may be sent; returns the time waited
+        """
+        started_at = time.monotonic()
+        async with self._lock:
+            while(True):
+                now = time.monotonic()
+                if(now < self._blocked_until):
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+                self._refill(now)
+                if(self._tokens >= 1):
+                    self._tokens -= 1
+                    return time.monotonic() - started_at
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def penalise(self, retry_after):
+        """
+        Registers a rate limit answer: nothing goes through for retry_after
+        seconds and the rate is cut
+        """
+        self._blocked_until = max(self._blocked_until,
+            time.monotonic() + retry_after)
+        self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+        self._tokens = 0
+
+    def reward(self):
+        """
+        Registers a request that went through without being rate limited
+        """
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+class SchedulerStatistics:
+    """
+    Counters of a RateLimitScheduler
+    """
+    def __init__(self):
+        self.requests = 0
+        self.rate_limited = 0
+        self.queued_time_total = 0.0
+
+    def as_dict(self):
+        return {
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "queued_time_total": self.queued_time_total
+            }
+
+class RateLimitScheduler:
+    """
+    Paces outbound requests with a token bucket per key (the endpoint) whose
+    rate is learned from the rate limits reported by the server. Rate
+    limited requests are queued again after the delay asked by the server.
+    """
+
+    def __init__(self, initial_rate=10.0, burst=10, min_rate=0.1,
+        max_rate=100.0, increase_step=0.1, decrease_factor=0.5,
+        max_retries=5):
+        self._bucket_settings = (initial_rate, burst, min_rate, max_rate,
+            increase_step, decrease_factor)
+        self._max_retries = max_retries
+        self._buckets = {}
+        self._statistics = SchedulerStatistics()
+
+    @property
+    def statistics(self): return self._statistics
+
+    def get_bucket(self, key):
+        bucket = self._buckets.get(key, None)
+        if(bucket is None):
+            bucket = TokenBucket(*self._bucket_settings)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def schedule(self, key, send, get_retry_after):
+        """
+        Sends a request once its bucket allows it. send is a coroutine
+        function sending the request and get_retry_after returns the delay
+        in seconds asked by the server in a response, None if it was not
+        rate limited. After max_retries, the rate limited response is
+        returned as is.
+        """
+        bucket = self.get_bucket(key)
+        for attempt in range(0, self._max_retries + 1):
+            self._statistics.queued_time_total += await bucket.acquire()
+            self._statistics.requests += 1
+            response = await send()
+            retry_after = get_retry_after(response)
+            if(retry_after is None):
+                bucket.reward()
+                return response
+            self._statistics.rate_limited += 1
+            bucket.penalise(retry_after)
+        return response
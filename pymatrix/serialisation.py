@@ -1,6 +1,10 @@
 from abc import ABCMeta, abstractmethod
+import pymatrix.codec
+import pymatrix.codegen
 import pymatrix.error
+import builtins
 import inspect
+import weakref
 
 class SerialisableProperty(property):
     underlying_type = None
@@ -31,6 +35,63 @@ def serialisable(arg):
         return make_with_type
     return make_no_type(arg)
 
+def _get_backing_attribute(name, member):
+    attribute = pymatrix.codegen.get_getter_backing_attribute(member.fget)
+    if(attribute is None and member.fset is not None):
+        attribute = pymatrix.codegen.get_setter_backing_attribute(member.fset)
+    return attribute if attribute is not None else "_{}".format(name)
+
+def _make_slotted(cls, extra_slots):
+    """
+    Rebuilds a class with __slots__ holding the backing attributes of its
+    serialisable members, so that its instances have no __dict__
+    """
+    inherited_slots = set()
+    for base in cls.__mro__[1:]:
+        inherited_slots.update(getattr(base, "__slots__", ()))
+
+    slots = []
+    for name, member in cls.__dict__.items():
+        if(is_serialisable(member)):
+            slots.append(_get_backing_attribute(name, member))
+    slots.extend(extra_slots)
+    slots = tuple(sorted(set(slots) - inherited_slots))
+
+    namespace = dict(cls.__dict__)
+    namespace.pop("__dict__", None)
+    namespace.pop("__weakref__", None)
+    namespace["__slots__"] = slots
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+
+    # methods using super() refer to the class they were defined in
+    for member in namespace.values():
+        functions = [member.fget, member.fset, member.fdel] \
+            if isinstance(member, property) else [member]
+        for function in functions:
+            for cell in getattr(function, "__closure__", None) or ():
+                if(cell.cell_contents is cls):
+                    cell.cell_contents = slotted_cls
+    return slotted_cls
+
+def serialisable_class(ignore_unknown_members=False, slots=False,
+    extra_slots=()):
+    """
+    Class decorator setting how a serialisable type is handled.
+    ignore_unknown_members: skip the JSON members the type does not declare
+        instead of raising a SerialisationError
+    slots: give the type __slots__ made of the backing attributes of its
+        serialisable members (found from trivial accessors, '_' + the
+        member name otherwise) for smaller and faster instances
+    extra_slots: other attributes to make room for in a slotted type
+    """
+    def decorate(cls):
+        if(slots):
+            cls = _make_slotted(cls, extra_slots)
+        cls.__serialisable_ignore_unknown__ = ignore_unknown_members
+        invalidate_serialisation_plan(cls)
+        return cls
+    return decorate
+
 def is_serialisable(member):
     return isinstance(member, SerialisableProperty)
 
@@ -41,16 +102,177 @@ def get_serialisable_field_metadata(type):
     return dict(serialisable_members)
 
 def get_serialisables(obj):
-    serialisable_members =  get_serialisable_field_metadata(obj.__class__)
-    return [(name, member.fget(obj)) for name, member
-        in serialisable_members.items()]
+    plan = get_serialisation_plan(obj.__class__)
+    return [(field.name, field.fget(obj)) for field in plan.fields]
+
+
+class SerialisableField:
+    """
+    Compiled description of a single serialisable member of a type
+    """
+    __slots__ = ("name", "fget", "fset", "underlying_type")
+
+    def __init__(self, name, member):
+        self.name = name
+        self.fget = member.fget
+        self.fset = member.fset
+        self.underlying_type = member.underlying_type
 
+class SerialisationPlan:
+    """
+    The serialisable layout of a type, computed once by reflection and then
+    reused for every de/serialisation of an instance of that type
+    """
+    # the plan must not reference its type: it is the value of a weak-keyed
+    # cache entry and would otherwise keep the key alive
+    __slots__ = ("fields", "fields_by_name", "ignore_unknown_members",
+        "_encoder", "_decoder", "__weakref__")
+
+    def __init__(self, type):
+        self.fields = tuple(SerialisableField(name, member) for name, member
+            in get_serialisable_field_metadata(type).items())
+        self.fields_by_name = dict(
+            (field.name, field) for field in self.fields)
+        self.ignore_unknown_members = getattr(type,
+            "__serialisable_ignore_unknown__", False)
+        self._encoder = None
+        self._decoder = None
+
+    @property
+    def encoder(self):
+        """
+        The generated serialisation function of the type, compiled on first
+        access
+        """
+        if(self._encoder is None):
+            self._encoder = pymatrix.codegen.make_encoder(self)
+        return self._encoder
+
+    @property
+    def decoder(self):
+        """
+        The generated deserialisation function of the type, compiled on first
+        access. False if the type cannot be handled by generated code.
+        """
+        if(self._decoder is None):
+            self._decoder = pymatrix.codegen.make_decoder(self) or False
+        return self._decoder
+
+# plans are keyed weakly by class so that types created on the fly (local
+# classes, proxies...) do not stay alive only because they were serialised
+_plan_cache = weakref.WeakKeyDictionary()
+
+def get_serialisation_plan(type):
+    """
+    Returns the cached serialisation plan of a type, building it on first use
+    """
+    try:
+        return _plan_cache[type]
+    except KeyError:
+        plan = SerialisationPlan(type)
+        _plan_cache[type] = plan
+        return plan
+
+def invalidate_serialisation_plan(type=None):
+    """
+    Drops the cached plan of a type (or of all types if none is given). Must
+    be called if serialisable members are added to a class after it was
+    first de/serialised.
+    """
+    if(type is None):
+        _plan_cache.clear()
+    else:
+        _plan_cache.pop(type, None)
+
+
+def _make_lazy_property(field):
+    """
+    Wraps a serialisable member so that its pending raw value is only
+    deserialised when the member is first read, then kept
+    """
+    name = field.name
+    fget = field.fget
+    fset = field.fset
+    underlying_type = field.underlying_type
+
+    def lazy_getter(obj):
+        lazy_state = obj._serialisable_pending
+        if(lazy_state is not None and name in lazy_state[1]):
+            deserialise, pending = lazy_state
+            # only dropped once converted, for a failure to be raised again
+            # on the next read rather than the default being returned
+            fset(obj, deserialise(pending[name], underlying_type))
+            del pending[name]
+        return fget(obj)
+
+    def lazy_setter(obj, value):
+        lazy_state = obj._serialisable_pending
+        if(lazy_state is not None):
+            lazy_state[1].pop(name, None)
+        fset(obj, value)
+
+    return SerialisableProperty(fget=lazy_getter,
+        fset=lazy_setter if fset is not None else None,
+        underlying_type=underlying_type)
+
+def _new_object(type):
+    return type.__new__(type)
+
+def _reduce_lazy(obj):
+    """
+    __reduce__ of the lazy types: the pending members are deserialised and
+    the object is pickled as an instance of its base type, which unlike the
+    lazy type can be found by name when unpickled
+    """
+    lazy_state = obj._serialisable_pending
+    if(lazy_state is not None):
+        for name in list(lazy_state[1]):
+            getattr(obj, name)
+    slots = {}
+    for cls in builtins.type(obj).__mro__:
+        names = cls.__dict__.get("__slots__", ())
+        for name in ((names,) if isinstance(names, str) else names):
+            if(name in ("_serialisable_pending", "__dict__", "__weakref__")
+                or name in slots or not hasattr(obj, name)):
+                continue
+            slots[name] = getattr(obj, name)
+    return (_new_object, (builtins.type(obj).__bases__[0],),
+        (getattr(obj, "__dict__", None) or None, slots or None))
+
+def get_lazy_type(type):
+    """
+    Returns the subclass of a type used for lazy deserialisation: its
+    members with an underlying type are only deserialised on first access
+    """
+    lazy_type = type.__dict__.get("__serialisable_lazy_type__", None)
+    if(lazy_type is None):
+        namespace = {
+            "__slots__": ("_serialisable_pending",),
+            "__qualname__": type.__qualname__,
+            "__module__": type.__module__,
+            "__reduce__": _reduce_lazy
+            }
+        for field in get_serialisation_plan(type).fields:
+            if(field.underlying_type is not None):
+                namespace[field.name] = _make_lazy_property(field)
+        lazy_type = builtins.type(type.__name__, (type,), namespace)
+        # the lazy type and its base reference each other, this cycle is
+        # collected along with the base
+        setattr(type, "__serialisable_lazy_type__", lazy_type)
+    return lazy_type
 
 class SerialiserBase(metaclass=ABCMeta):
     """
-    Base serialiser. Describes methods.
+    Base serialiser. Describes methods. The codec turns the serialised
+    structures into bytes and back.
     """
 
+    def __init__(self, codec: pymatrix.codec.CodecBase):
+        self._codec = codec
+
+    @property
+    def codec(self): return self._codec
+
     @abstractmethod
     def deserialise(self, json_data, type: type):
         """
@@ -62,11 +284,37 @@ class SerialiserBase(metaclass=ABCMeta):
     def serialise(self, object):
         pass
 
+    def dumps(self, object):
+        """
+        Serialises an object model straight to bytes, None if there is
+        nothing to send
+        """
+        serialised = self.serialise(object)
+        if(serialised is None):
+            return None
+        return self._codec.encode(serialised)
+
+    def loads(self, raw_data, type: type):
+        """
+        Deserialises bytes into an object model
+        """
+        return self.deserialise(self._codec.decode(raw_data), type)
+
 class JsonSerialiser(SerialiserBase):
     """
-    De/serialises the events from/to JSON
+    De/serialises the events from/to JSON. With generate_code, serialisable
+    types are handled by functions generated for each of them instead of the
+    generic reflection-based path. With lazy, deserialised objects keep the
+    raw JSON of their complex members and only convert it when the member
+    is first read.
     """
 
+    def __init__(self, generate_code=False, codec=None, lazy=False):
+        super().__init__(codec if codec is not None
+            else pymatrix.codec.get_codec())
+        self._generate_code = generate_code
+        self._lazy = lazy
+
     def _is_primitive(self, obj):
         return isinstance(obj, (int, float, str, bool))
     def _is_collection(self, obj):
@@ -78,17 +326,57 @@ class JsonSerialiser(SerialiserBase):
         if(self._is_collection(json_data)):
             return [self.deserialise(item, type) for item in json_data]
 
-        expected_members = get_serialisable_field_metadata(type)
+        if(self._lazy):
+            return self._deserialise_lazy_object(json_data, type)
+        plan = get_serialisation_plan(type)
+        if(self._generate_code and json_data.__class__ is dict):
+            decoder = plan.decoder
+            if(decoder):
+                return decoder(type, json_data, self.deserialise,
+                    self._deserialise_object)
+        return self._deserialise_object(json_data, type)
+
+    def _deserialise_lazy_object(self, json_data, type: type):
+        plan = get_serialisation_plan(type)
+        expected_members = plan.fields_by_name
+        obj = get_lazy_type(type)()
+        pending = {}
+        for key, val in json_data.items():
+            field = expected_members.get(key, None)
+            if(field is not None):
+                try:
+                    if(field.fset is None):
+                        raise AttributeError("can't set attribute")
+                    if(field.underlying_type is None or val is None):
+                        field.fset(obj, val)
+                    else:
+                        pending[key] = val
+                except AttributeError as ae:
+                    raise pymatrix.error.SerialisationError(
+                        "There was an error setting the member 'key'.") from ae
+            elif(not plan.ignore_unknown_members):
+                raise pymatrix.error.SerialisationError(
+                    "There is no serialisable member of name 'key'.")
+        obj._serialisable_pending = (self.deserialise, pending) \
+            if pending else None
+        return obj
+
+    def _deserialise_object(self, json_data, type: type):
+        plan = get_serialisation_plan(type)
+        expected_members = plan.fields_by_name
         obj = type()
         for key, val in json_data.items():
-            if(key in expected_members):
+            field = expected_members.get(key, None)
+            if(field is not None):
                 try:
-                    obj.__setattr__(key, self.deserialise(val,
-                        expected_members[key].underlying_type))
+                    if(field.fset is None):
+                        raise AttributeError("can't set attribute")
+                    field.fset(obj, self.deserialise(val,
+                        field.underlying_type))
                 except AttributeError as ae:
                     raise pymatrix.error.SerialisationError(
                         "There was an error setting the member 'key'.") from ae
-            else:
+            elif(not plan.ignore_unknown_members):
                 raise pymatrix.error.SerialisationError(
                     "There is no serialisable member of name 'key'.")
         return obj
@@ -104,11 +392,14 @@ class JsonSerialiser(SerialiserBase):
             return dict([(sub_member_name, self.serialise(sub_value))
                     for sub_member_name, sub_value in object.items()])
 
+        plan = get_serialisation_plan(object.__class__)
+        if(self._generate_code):
+            return plan.encoder(object, self.serialise)
+
         return_object = {}
-        serialisable_members = get_serialisables(object)
-        for member_name, value in serialisable_members:
-            serialised_value = self.serialise(value)
+        for field in plan.fields:
+            serialised_value = self.serialise(field.fget(object))
             if(serialised_value is not None):
-                return_object[member_name] = serialised_value
+                return_object[field.name] = serialised_value
 
         return None if return_object == {} else return_object
@@ -1,5 +1,9 @@
 from abc import ABCMeta, abstractmethod
+from collections import namedtuple
+from types import MappingProxyType
 import pymatrix.localisation
+import pymatrix.serialisation
+import urllib.parse
 
 class RequestMessageBase:
     def __init__(self, type, transport_options=None):
@@ -12,10 +16,20 @@ class RequestMessageBase:
     @property
     def transport_options(self): return self._transport_options
 
+    @property
+    def path_parameters(self):
+        """
+        The values of the {name} fields of the endpoint path, if any
+        """
+        return None
+
+@pymatrix.serialisation.serialisable_class(ignore_unknown_members=True,
+    slots=True)
 class ErrorMessageBase:
-    def __init__(self, errcode=None, error=None):
+    def __init__(self, errcode=None, error=None, retry_after_ms=None):
         self._errcode = errcode
         self._error = error
+        self._retry_after_ms = retry_after_ms
 
     @pymatrix.serialisation.serialisable
     def errcode(self): return self._errcode
@@ -25,28 +39,102 @@ class ErrorMessageBase:
     def error(self): return self._error
     @error.setter
     def error(self, value): self._error = value
+    @pymatrix.serialisation.serialisable
+    def retry_after_ms(self): return self._retry_after_ms
+    @retry_after_ms.setter
+    def retry_after_ms(self, value): self._retry_after_ms = value
 
 
-class SpecificationBase(metaclass=ABCMeta):
+def freeze_transport_options(options):
+    """
+    Returns a read-only view of transport options, e.g. {"http": {...}},
+    for them to be shared by every request message of an endpoint
+    """
+    return MappingProxyType(dict((transport, MappingProxyType(dict(values)))
+        for transport, values in options.items()))
+
+def format_path(path, **parameters):
+    """
+    Fills the {name} fields of a path template with the escaped parameters
+    """
+    return path.format(**dict(
+        (name, urllib.parse.quote(str(value), safe=""))
+        for name, value in parameters.items()))
+
+class Route(namedtuple("Route", ["endpoint_code", "request_type",
+    "response_type", "error_type", "method", "path", "idempotent",
+    "cache_ttl"])):
+    """
+    Everything needed to dispatch a call to an endpoint, compiled once by
+    the specification. The path may be a template with {name} fields; it is
+    None if the specification defines no transport options, the request
+    message then carrying its own. cache_ttl is the number of seconds a
+    response may be cached for, None if it must not be.
+    """
+    __slots__ = ()
+
+    def format_path(self, **parameters):
+        return format_path(self.path, **parameters)
 
-    message_code_type = {}
+class SpecificationBase(metaclass=ABCMeta):
 
     def __init__(self):
+        self.message_code_type = {}
         self._define_message_types()
+        self._incomplete_codes = frozenset()
+        self._routes = MappingProxyType(self._compile_routes())
 
     @abstractmethod
     def _define_message_types(self): pass
 
+    def _get_transport_options(self, message_code):
+        """
+        Returns the transport options of an endpoint, e.g. its HTTP method
+        and path. Should be overridden by specifications defining them.
+        """
+        return None
+
+    def _compile_routes(self):
+        routes = {}
+        incomplete_codes = []
+        for message_code, types_tuple in self.message_code_type.items():
+            if(not isinstance(types_tuple, tuple) or len(types_tuple) != 3):
+                # can be looked up but not called, see get_route
+                incomplete_codes.append(message_code)
+                continue
+            http_options = (self._get_transport_options(message_code)
+                or {}).get("http", {})
+            routes[message_code] = Route(message_code, *types_tuple,
+                method=http_options.get("method", None),
+                path=http_options.get("endpoint", None),
+                idempotent=http_options.get("idempotent", None),
+                cache_ttl=http_options.get("cache_ttl", None))
+        self._incomplete_codes = frozenset(incomplete_codes)
+        return routes
+
+    def _raise_not_in_specification(self):
+        raise pymatrix.error.SpecificationError(
+            pymatrix.localisation.Localisation.get_message(
+                pymatrix.constants.ErrorStringEnum.NotInSpecification
+            )
+        )
+
     def get_message_types(self, message_code):
         types_tuple = self.message_code_type.get(message_code, None)
         if(types_tuple is None):
-            raise pymatrix.error.SpecificationError(
-                pymatrix.localisation.Localisation.get_message(
-                    pymatrix.constants.ErrorStringEnum.NotInSpecification
-                )
-            )
+            self._raise_not_in_specification()
         return types_tuple
 
+    def get_route(self, message_code):
+        route = self._routes.get(message_code, None)
+        if(route is None):
+            if(message_code in self._incomplete_codes):
+                raise pymatrix.error.SpecificationError(
+                    pymatrix.localisation.Localisation.get_message(
+                        pymatrix.constants.ErrorStringEnum.IncompleteRoute))
+            self._raise_not_in_specification()
+        return route
+
     def get_message(self, message_code, **kwargs):
         impl_req_type, impl_resp_type = \
             self.get_message_types(message_code)
@@ -1,21 +1,74 @@
 import pymatrix.constants
 import pymatrix.specification.base
+import pymatrix.specification.r0.account
 import pymatrix.specification.r0.login
+import pymatrix.specification.r0.profile
+import pymatrix.specification.r0.sync
+import pymatrix.specification.r0.versions
 import inspect
 
 endpoints = {
     pymatrix.constants.EndpointNamesEnum.Versions:
         "/_matrix/client/versions",
     pymatrix.constants.EndpointNamesEnum.Login:
-        "/_matrix/client/r0/login"
+        "/_matrix/client/r0/login",
+    pymatrix.constants.EndpointNamesEnum.AccountWhoami:
+        "/_matrix/client/r0/account/whoami",
+    pymatrix.constants.EndpointNamesEnum.Sync:
+        "/_matrix/client/r0/sync",
+    pymatrix.constants.EndpointNamesEnum.Profile:
+        "/_matrix/client/r0/profile/{user_id}"
     }
 
+# cache_ttl is in seconds; only set on GET endpoints returning data which
+# rarely changes
+transport_options = {
+    pymatrix.constants.EndpointNamesEnum.Versions:
+        {"http": {"endpoint": endpoints[pymatrix.constants.EndpointNamesEnum.Versions],
+            "method": "GET", "cache_ttl": 3600}},
+    pymatrix.constants.EndpointNamesEnum.AccountWhoami:
+        {"http": {"endpoint": endpoints[pymatrix.constants.EndpointNamesEnum.AccountWhoami],
+            "method": "GET", "cache_ttl": 300}},
+    pymatrix.constants.EndpointNamesEnum.Profile:
+        {"http": {"endpoint": endpoints[pymatrix.constants.EndpointNamesEnum.Profile],
+            "method": "GET", "cache_ttl": 60}},
+    pymatrix.constants.EndpointNamesEnum.Login:
+        {"http": {"endpoint": endpoints[pymatrix.constants.EndpointNamesEnum.Login],
+            "method": "POST"}},
+    pymatrix.constants.EndpointNamesEnum.Sync:
+        {"http": {"endpoint": endpoints[pymatrix.constants.EndpointNamesEnum.Sync],
+            "method": "GET"}}
+    }
+# shared by every request message of an endpoint, hence read-only
+transport_options = dict(
+    (code, pymatrix.specification.base.freeze_transport_options(options))
+    for code, options in transport_options.items())
+
 class Specification(pymatrix.specification.base.SpecificationBase):
 
     def _define_message_types(self):
         self.message_code_type = {
+            pymatrix.constants.EndpointNamesEnum.Versions:
+                (pymatrix.specification.r0.versions.VersionsRequestMessage,
+                 pymatrix.specification.r0.versions.VersionsResponseMessage,
+                 pymatrix.specification.base.ErrorMessageBase),
+            pymatrix.constants.EndpointNamesEnum.AccountWhoami:
+                (pymatrix.specification.r0.account.WhoamiRequestMessage,
+                 pymatrix.specification.r0.account.WhoamiResponseMessage,
+                 pymatrix.specification.base.ErrorMessageBase),
+            pymatrix.constants.EndpointNamesEnum.Profile:
+                (pymatrix.specification.r0.profile.ProfileRequestMessage,
+                 pymatrix.specification.r0.profile.ProfileResponseMessage,
+                 pymatrix.specification.base.ErrorMessageBase),
             pymatrix.constants.EndpointNamesEnum.Login:
                 (pymatrix.specification.r0.login.LoginRequestMessage,
                  pymatrix.specification.r0.login.LoginResponseMessage,
+                 pymatrix.specification.base.ErrorMessageBase),
+            pymatrix.constants.EndpointNamesEnum.Sync:
+                (pymatrix.specification.r0.sync.SyncRequestMessage,
+                 pymatrix.specification.r0.sync.SyncResponseMessage,
                  pymatrix.specification.base.ErrorMessageBase)
         }
+
+    def _get_transport_options(self, message_code):
+        return transport_options.get(message_code, None)
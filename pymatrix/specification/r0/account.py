@@ -0,0 +1,20 @@
+import pymatrix.constants
+import pymatrix.specification.r0
+
+class WhoamiRequestMessage(pymatrix.specification.base.RequestMessageBase):
+    def __init__(self):
+        super().__init__(None,
+            pymatrix.specification.r0.transport_options[
+                pymatrix.constants.EndpointNamesEnum.AccountWhoami]
+        )
+
+@pymatrix.serialisation.serialisable_class(ignore_unknown_members=True,
+    slots=True)
+class WhoamiResponseMessage:
+    def __init__(self, user_id=None):
+        self._user_id = user_id
+
+    @pymatrix.serialisation.serialisable
+    def user_id(self): return self._user_id
+    @user_id.setter
+    def user_id(self, value): self._user_id = value
@@ -45,15 +45,8 @@ class LoginRequestMessage(pymatrix.specification.base.RequestMessageBase):
         self._initial_device_display_name = initial_device_display_name
 
         super().__init__(type,
-            {
-                "http":
-                {
-                    "endpoint":
-                        pymatrix.specification.r0.endpoints[pymatrix.constants.EndpointNamesEnum.Login],
-                    "method":
-                        "POST"
-                    }
-                }
+            pymatrix.specification.r0.transport_options[
+                pymatrix.constants.EndpointNamesEnum.Login]
         )
 
     @pymatrix.serialisation.serialisable
@@ -78,6 +71,7 @@ class LoginRequestMessage(pymatrix.specification.base.RequestMessageBase):
     def initial_device_display_name(self):
         return self._initial_device_display_name
 
+@pymatrix.serialisation.serialisable_class(slots=True)
 class LoginResponseMessage:
 
     @pymatrix.serialisation.serialisable
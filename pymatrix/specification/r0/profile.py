@@ -0,0 +1,35 @@
+import pymatrix.constants
+import pymatrix.specification.r0
+
+class ProfileRequestMessage(pymatrix.specification.base.RequestMessageBase):
+    def __init__(self, user_id):
+        # part of the path rather than of the serialised message
+        self._user_id = user_id
+
+        super().__init__(None,
+            pymatrix.specification.r0.transport_options[
+                pymatrix.constants.EndpointNamesEnum.Profile]
+        )
+
+    @property
+    def user_id(self): return self._user_id
+
+    @property
+    def path_parameters(self): return {"user_id": self._user_id}
+
+@pymatrix.serialisation.serialisable_class(ignore_unknown_members=True,
+    slots=True)
+class ProfileResponseMessage:
+    def __init__(self, displayname=None, avatar_url=None):
+        self._displayname = displayname
+        self._avatar_url = avatar_url
+
+    @pymatrix.serialisation.serialisable
+    def displayname(self): return self._displayname
+    @displayname.setter
+    def displayname(self, value): self._displayname = value
+
+    @pymatrix.serialisation.serialisable
+    def avatar_url(self): return self._avatar_url
+    @avatar_url.setter
+    def avatar_url(self, value): self._avatar_url = value
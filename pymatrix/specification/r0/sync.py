@@ -0,0 +1,124 @@
+import pymatrix.constants
+import pymatrix.specification.r0
+
+class SyncRequestMessage(pymatrix.specification.base.RequestMessageBase):
+    def __init__(self, since=None, timeout=None, filter=None,
+        full_state=None, set_presence=None):
+
+        self._since = since
+        self._timeout = timeout
+        self._filter = filter
+        self._full_state = full_state
+        self._set_presence = set_presence
+
+        super().__init__(None,
+            pymatrix.specification.r0.transport_options[
+                pymatrix.constants.EndpointNamesEnum.Sync]
+        )
+
+    @pymatrix.serialisation.serialisable
+    def since(self): return self._since
+
+    @pymatrix.serialisation.serialisable
+    def timeout(self): return self._timeout
+
+    @pymatrix.serialisation.serialisable
+    def filter(self): return self._filter
+
+    @pymatrix.serialisation.serialisable
+    def full_state(self): return self._full_state
+
+    @pymatrix.serialisation.serialisable
+    def set_presence(self): return self._set_presence
+
+@pymatrix.serialisation.serialisable_class(ignore_unknown_members=True,
+    slots=True)
+class EventsMessage:
+    """
+    A list of raw events, e.g. the presence updates
+    """
+    def __init__(self, events=None):
+        self._events = events
+
+    @pymatrix.serialisation.serialisable
+    def events(self): return self._events
+    @events.setter
+    def events(self, value): self._events = value
+
+@pymatrix.serialisation.serialisable_class(ignore_unknown_members=True,
+    slots=True)
+class RoomsMessage:
+    """
+    The rooms updates of a sync, each member maps room ids to the raw
+    updates of the room
+    """
+    def __init__(self, join=None, invite=None, leave=None):
+        self._join = join
+        self._invite = invite
+        self._leave = leave
+
+    @pymatrix.serialisation.serialisable
+    def join(self): return self._join
+    @join.setter
+    def join(self, value): self._join = value
+
+    @pymatrix.serialisation.serialisable
+    def invite(self): return self._invite
+    @invite.setter
+    def invite(self, value): self._invite = value
+
+    @pymatrix.serialisation.serialisable
+    def leave(self): return self._leave
+    @leave.setter
+    def leave(self, value): self._leave = value
+
+@pymatrix.serialisation.serialisable_class(ignore_unknown_members=True,
+    slots=True)
+class SyncResponseMessage:
+    def __init__(self, next_batch=None, rooms=None, presence=None,
+        account_data=None, to_device=None, device_lists=None,
+        device_one_time_keys_count=None):
+        self._next_batch = next_batch
+        self._rooms = rooms
+        self._presence = presence
+        self._account_data = account_data
+        self._to_device = to_device
+        self._device_lists = device_lists
+        self._device_one_time_keys_count = device_one_time_keys_count
+
+    @pymatrix.serialisation.serialisable
+    def next_batch(self): return self._next_batch
+    @next_batch.setter
+    def next_batch(self, value): self._next_batch = value
+
+    @pymatrix.serialisation.serialisable(RoomsMessage)
+    def rooms(self): return self._rooms
+    @rooms.setter
+    def rooms(self, value): self._rooms = value
+
+    @pymatrix.serialisation.serialisable(EventsMessage)
+    def presence(self): return self._presence
+    @presence.setter
+    def presence(self, value): self._presence = value
+
+    @pymatrix.serialisation.serialisable(EventsMessage)
+    def account_data(self): return self._account_data
+    @account_data.setter
+    def account_data(self, value): self._account_data = value
+
+    @pymatrix.serialisation.serialisable(EventsMessage)
+    def to_device(self): return self._to_device
+    @to_device.setter
+    def to_device(self, value): self._to_device = value
+
+    @pymatrix.serialisation.serialisable
+    def device_lists(self): return self._device_lists
+    @device_lists.setter
+    def device_lists(self, value): self._device_lists = value
+
+    @pymatrix.serialisation.serialisable
+    def device_one_time_keys_count(self):
+        return self._device_one_time_keys_count
+    @device_one_time_keys_count.setter
+    def device_one_time_keys_count(self, value):
+        self._device_one_time_keys_count = value
@@ -0,0 +1,26 @@
+import pymatrix.constants
+import pymatrix.specification.r0
+
+class VersionsRequestMessage(pymatrix.specification.base.RequestMessageBase):
+    def __init__(self):
+        super().__init__(None,
+            pymatrix.specification.r0.transport_options[
+                pymatrix.constants.EndpointNamesEnum.Versions]
+        )
+
+@pymatrix.serialisation.serialisable_class(ignore_unknown_members=True,
+    slots=True)
+class VersionsResponseMessage:
+    def __init__(self, versions=None, unstable_features=None):
+        self._versions = versions
+        self._unstable_features = unstable_features
+
+    @pymatrix.serialisation.serialisable
+    def versions(self): return self._versions
+    @versions.setter
+    def versions(self, value): self._versions = value
+
+    @pymatrix.serialisation.serialisable
+    def unstable_features(self): return self._unstable_features
+    @unstable_features.setter
+    def unstable_features(self, value): self._unstable_features = value
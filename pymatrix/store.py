@@ -0,0 +1,226 @@
+from abc import ABCMeta, abstractmethod
+import sqlite3
+import pymatrix.codec
+
+def iter_state_events(rooms):
+    """
+    Yields the (room id, event) tuples of the state events found in the rooms
+    member of a sync response, in the order they are to be applied
+    """
+    if(rooms is None):
+        return
+    sections = (
+        (rooms.join, ("state", "timeline")),
+        (rooms.leave, ("state", "timeline")),
+        (rooms.invite, ("invite_state",))
+        )
+    for room_updates, names in sections:
+        for room_id, update in (room_updates or {}).items():
+            for name in names:
+                for event in (update.get(name) or {}).get("events") or ():
+                    if("state_key" in event and "type" in event):
+                        yield (room_id, event)
+
+class StateStoreBase(metaclass=ABCMeta):
+    """
+    Base class for a store persisting the state of a client between two
+    runs: its session, the token to resume syncing from and the current
+    state of its rooms, indexed by (event type, state key). A store holds
+    the state of one account at a time. Stores are synchronous as they are
+    expected to be local.
+    """
+
+    @abstractmethod
+    def get_session(self):
+        """
+        Returns the saved session as a dictionary with the user_id,
+        access_token, device_id and home_server keys, or None
+        """
+        pass
+
+    @abstractmethod
+    def set_session(self, user_id, access_token, device_id=None,
+        home_server=None):
+        pass
+
+    @abstractmethod
+    def clear_session(self):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        """
+        Forgets everything: the session, the sync token and the room state
+        """
+        pass
+
+    @abstractmethod
+    def get_sync_token(self):
+        """
+        Returns the next_batch token of the last sync saved, or None
+        """
+        pass
+
+    @abstractmethod
+    def save_sync(self, next_batch, state_events=()):
+        """
+        Atomically applies the (room id, event) state events of a sync
+        response and saves its next_batch token
+        """
+        pass
+
+    @abstractmethod
+    def get_room_state(self, room_id):
+        """
+        Returns the state of a room as a dictionary mapping
+        (event type, state key) tuples to events
+        """
+        pass
+
+    @abstractmethod
+    def get_state_event(self, room_id, event_type, state_key=""):
+        """
+        Returns a state event of a room, or None
+        """
+        pass
+
+    def close(self):
+        pass
+
+class MemoryStateStore(StateStoreBase):
+    """
+    A store keeping everything in memory, lost when the process exits
+    """
+
+    def __init__(self):
+        self._session = None
+        self._sync_token = None
+        self._rooms = {}
+
+    def get_session(self):
+        return dict(self._session) if self._session is not None else None
+
+    def set_session(self, user_id, access_token, device_id=None,
+        home_server=None):
+        self._session = {
+            "user_id": user_id,
+            "access_token": access_token,
+            "device_id": device_id,
+            "home_server": home_server
+            }
+
+    def clear_session(self):
+        self._session = None
+
+    def clear(self):
+        self._session = None
+        self._sync_token = None
+        self._rooms = {}
+
+    def get_sync_token(self):
+        return self._sync_token
+
+    def save_sync(self, next_batch, state_events=()):
+        for room_id, event in state_events:
+            self._rooms.setdefault(room_id, {})[
+                (event["type"], event["state_key"])] = event
+        self._sync_token = next_batch
+
+    def get_room_state(self, room_id):
+        return dict(self._rooms.get(room_id, {}))
+
+    def get_state_event(self, room_id, event_type, state_key=""):
+        return self._rooms.get(room_id, {}).get((event_type, state_key), None)
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    user_id TEXT,
+    access_token TEXT,
+    device_id TEXT,
+    home_server TEXT
+    );
+CREATE TABLE IF NOT EXISTS sync (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    next_batch TEXT
+    );
+CREATE TABLE IF NOT EXISTS room_state (
+    room_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    state_key TEXT NOT NULL,
+    event BLOB NOT NULL,
+    PRIMARY KEY (room_id, type, state_key)
+    ) WITHOUT ROWID;
+"""
+
+class SqliteStateStore(StateStoreBase):
+    """
+    A store persisting to a SQLite database file. Events are stored encoded
+    with the given codec. The database is opened in WAL mode, so that saving
+    a sync only appends to the journal.
+    """
+
+    def __init__(self, path, codec: pymatrix.codec.CodecBase=None):
+        self._codec = codec if codec is not None \
+            else pymatrix.codec.get_codec()
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SQLITE_SCHEMA)
+
+    def get_session(self):
+        row = self._connection.execute("SELECT user_id, access_token, "
+            "device_id, home_server FROM session WHERE id = 0").fetchone()
+        if(row is None):
+            return None
+        return dict(zip(("user_id", "access_token", "device_id",
+            "home_server"), row))
+
+    def set_session(self, user_id, access_token, device_id=None,
+        home_server=None):
+        self._connection.execute("INSERT OR REPLACE INTO session (id, "
+            "user_id, access_token, device_id, home_server) "
+            "VALUES (0, ?, ?, ?, ?)",
+            (user_id, access_token, device_id, home_server))
+
+    def clear_session(self):
+        self._connection.execute("DELETE FROM session")
+
+    def clear(self):
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.execute("DELETE FROM session")
+            self._connection.execute("DELETE FROM sync")
+            self._connection.execute("DELETE FROM room_state")
+
+    def get_sync_token(self):
+        row = self._connection.execute(
+            "SELECT next_batch FROM sync WHERE id = 0").fetchone()
+        return row[0] if row is not None else None
+
+    def save_sync(self, next_batch, state_events=()):
+        encode = self._codec.encode
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany("INSERT OR REPLACE INTO room_state "
+                "(room_id, type, state_key, event) VALUES (?, ?, ?, ?)",
+                ((room_id, event["type"], event["state_key"], encode(event))
+                    for room_id, event in state_events))
+            self._connection.execute("INSERT OR REPLACE INTO sync "
+                "(id, next_batch) VALUES (0, ?)", (next_batch,))
+
+    def get_room_state(self, room_id):
+        decode = self._codec.decode
+        return dict(((event_type, state_key), decode(event))
+            for event_type, state_key, event in self._connection.execute(
+                "SELECT type, state_key, event FROM room_state "
+                "WHERE room_id = ?", (room_id,)))
+
+    def get_state_event(self, room_id, event_type, state_key=""):
+        row = self._connection.execute("SELECT event FROM room_state "
+            "WHERE room_id = ? AND type = ? AND state_key = ?",
+            (room_id, event_type, state_key)).fetchone()
+        return self._codec.decode(row[0]) if row is not None else None
+
+    def close(self):
+        self._connection.close()
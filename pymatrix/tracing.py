@@ -0,0 +1,160 @@
+from abc import ABCMeta, abstractmethod
+from enum import Enum
+import time
+
+# upper bounds, in seconds, of the buckets durations are counted in
+DEFAULT_DURATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1,
+    0.5, 1.0, 5.0)
+
+class TraceStageEnum(Enum):
+    # the request message is built from the call arguments
+    Build = "build"
+    # the request is formatted for the backend, its body serialised
+    Serialise = "serialise"
+    # the backend is waited for, including queueing and retries
+    Send = "send"
+    # one attempt of the backend to send a request and read its response
+    RoundTrip = "round_trip"
+    # the response body is decoded into primitive structures
+    Decode = "decode"
+    # the primitive structures are turned into the response message
+    Deserialise = "deserialise"
+
+class TraceObserverBase(metaclass=ABCMeta):
+    """
+    Base class of the observers receiving the durations of the stages of
+    the calls
+    """
+
+    @abstractmethod
+    def on_stage(self, stage: TraceStageEnum, duration, size=None,
+        endpoint=None):
+        """
+        Called once a stage is complete. duration is in seconds; size is the
+        number of bytes handled by the stage, if any; endpoint is the
+        endpoint code of the call, or the path of the request, without its
+        query string, for the stages traced by a backend when the request
+        does not tell its endpoint.
+        """
+        pass
+
+class Tracer:
+    """
+    Dispatches stage durations to the registered observers. Without
+    observers the tracer is inactive and callers skip taking timings
+    altogether. An observer raising an exception does not fail the call
+    being traced nor keep the other observers from being called; the
+    exceptions are only counted.
+    """
+
+    def __init__(self, observers=()):
+        self._observers = list(observers)
+        self._observer_errors = 0
+
+    @property
+    def active(self): return len(self._observers) > 0
+    @property
+    def observer_errors(self): return self._observer_errors
+
+    def add_observer(self, observer: TraceObserverBase):
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: TraceObserverBase):
+        self._observers.remove(observer)
+
+    def emit(self, stage: TraceStageEnum, duration, size=None, endpoint=None):
+        for observer in self._observers:
+            try:
+                observer.on_stage(stage, duration, size, endpoint)
+            except Exception:
+                self._observer_errors += 1
+
+# the clock used to measure stages
+clock = time.perf_counter
+
+class Histogram:
+    """
+    Distribution of durations, in seconds, and of the bytes handled
+    """
+    def __init__(self, bucket_bounds=DEFAULT_DURATION_BUCKETS):
+        self.count = 0
+        self.duration_total = 0.0
+        self.duration_max = 0.0
+        self.size_total = 0
+        self.buckets = dict((bound, 0) for bound in bucket_bounds)
+
+    def _record(self, duration, size):
+        self.count += 1
+        self.duration_total += duration
+        self.duration_max = max(self.duration_max, duration)
+        if(size is not None):
+            self.size_total += size
+        for bound in self.buckets:
+            if(duration <= bound):
+                self.buckets[bound] += 1
+
+    @property
+    def duration_mean(self):
+        return self.duration_total / self.count if self.count else 0.0
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "duration_total": self.duration_total,
+            "duration_mean": self.duration_mean,
+            "duration_max": self.duration_max,
+            "size_total": self.size_total,
+            "buckets": dict(self.buckets)
+            }
+
+class HistogramObserver(TraceObserverBase):
+    """
+    Aggregates the stage durations in histograms per (stage, endpoint)
+    """
+
+    def __init__(self, bucket_bounds=DEFAULT_DURATION_BUCKETS):
+        self._bucket_bounds = bucket_bounds
+        self._histograms = {}
+
+    def on_stage(self, stage, duration, size=None, endpoint=None):
+        histogram = self._histograms.get((stage, endpoint), None)
+        if(histogram is None):
+            histogram = Histogram(self._bucket_bounds)
+            self._histograms[(stage, endpoint)] = histogram
+        histogram._record(duration, size)
+
+    def get_histogram(self, stage: TraceStageEnum, endpoint=None):
+        """
+        Returns the histogram of a stage for an endpoint, or across every
+        endpoint if none is given; None if the stage was never traced
+        """
+        if(endpoint is not None):
+            return self._histograms.get((stage, endpoint), None)
+        merged = None
+        for (histogram_stage, histogram_endpoint), histogram \
+            in self._histograms.items():
+            if(histogram_stage != stage):
+                continue
+            if(merged is None):
+                merged = Histogram(self._bucket_bounds)
+            merged.count += histogram.count
+            merged.duration_total += histogram.duration_total
+            merged.duration_max = max(merged.duration_max,
+                histogram.duration_max)
+            merged.size_total += histogram.size_total
+            for bound, count in histogram.buckets.items():
+                merged.buckets[bound] += count
+        return merged
+
+    def as_dict(self):
+        """
+        Returns the histograms keyed by stage value, then by endpoint
+        """
+        result = {}
+        for (stage, endpoint), histogram in self._histograms.items():
+            name = endpoint.name if isinstance(endpoint, Enum) else endpoint
+            result.setdefault(stage.value, {})[name] = histogram.as_dict()
+        return result
+
+    def clear(self):
+        self._histograms.clear()
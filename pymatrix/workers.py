@@ -0,0 +1,290 @@
+import pymatrix.codec
+import pymatrix.pool
+import pymatrix.specification.base
+import pymatrix.store
+import asyncio
+import multiprocessing
+import multiprocessing.connection
+import os
+import time
+import zlib
+
+DEFAULT_MAX_RESTARTS = 5
+DEFAULT_POLL_INTERVAL = 0.1
+
+_KIND_EVENTS = "events"
+_KIND_ERROR = "error"
+
+class WorkerError(Exception):
+    """
+    An error reported by a worker about one of its accounts
+    """
+    def __init__(self, message):
+        super().__init__(message)
+
+class AccountConfig:
+    """
+    What a worker process needs to run the sync loop of an account. Without
+    an access token, the account logs in with its user and password unless
+    its store holds a session. A store path makes a restarted worker resume
+    from the last saved sync token.
+    """
+    def __init__(self, account_id, hostname, port=None, user=None,
+        password=None, access_token=None, store_path=None):
+        self.account_id = account_id
+        self.hostname = hostname
+        self.port = port
+        self.user = user
+        self.password = password
+        self.access_token = access_token
+        self.store_path = store_path
+
+def get_timeline_events(account_id, response):
+    """
+    Default worker handler: returns the [room id, event] pairs of the
+    timelines of the joined rooms, or None if there are none
+    """
+    rooms = response.rooms
+    events = [[room_id, event]
+        for room_id, update in ((rooms.join or {}) if rooms is not None
+            else {}).items()
+        for event in (update.get("timeline") or {}).get("events") or ()]
+    return events if events else None
+
+def get_shard(account_id, nb_shards):
+    """
+    Returns the index of the shard of an account; stable across processes
+    and runs, unlike hash()
+    """
+    return zlib.crc32(account_id.encode("utf-8")) % nb_shards
+
+async def _work(accounts, connection, handler, engine, sync_options):
+    codec = pymatrix.codec.get_codec(engine)
+    pool = pymatrix.pool.ClientPool()
+    try:
+        for account in accounts:
+            store = pymatrix.store.SqliteStateStore(account.store_path) \
+                if account.store_path is not None else None
+            client = await pool.create_client(account.account_id,
+                account.hostname, account.port, store=store)
+            if(account.access_token is not None):
+                client.api.access_token = account.access_token
+            elif(not client.restore_session()):
+                response = await client.login(account.user, account.password)
+                if(isinstance(response,
+                    pymatrix.specification.base.ErrorMessageBase)):
+                    connection.send((_KIND_ERROR, account.account_id,
+                        "Login failed: {}".format(response.errcode)))
+                    await pool.remove_client(account.account_id)
+
+        events = pool.read_events(**sync_options)
+        try:
+            async for account_id, response in events:
+                if(isinstance(response, Exception)):
+                    connection.send((_KIND_ERROR, account_id,
+                        repr(response)))
+                elif(isinstance(response,
+                    pymatrix.specification.base.ErrorMessageBase)):
+                    connection.send((_KIND_ERROR, account_id,
+                        "Sync failed: {}".format(response.errcode)))
+                else:
+                    result = handler(account_id, response)
+                    if(result is not None):
+                        connection.send((_KIND_EVENTS, account_id,
+                            codec.encode(result)))
+        finally:
+            await events.aclose()
+    finally:
+        await pool.close()
+
+def _run_worker(accounts, connection, handler, engine, sync_options):
+    try:
+        asyncio.run(_work(accounts, connection, handler, engine,
+            sync_options))
+    finally:
+        connection.close()
+
+class WorkerStatistics:
+    """
+    Counters of a WorkerSupervisor
+    """
+    def __init__(self):
+        self.messages = 0
+        self.bytes_received = 0
+        self.restarts = 0
+
+    def as_dict(self):
+        return {
+            "messages": self.messages,
+            "bytes_received": self.bytes_received,
+            "restarts": self.restarts
+            }
+
+class _Worker:
+    __slots__ = ("accounts", "process", "connection", "restarts")
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.process = None
+        self.connection = None
+        self.restarts = 0
+
+class WorkerSupervisor:
+    """
+    Spreads the sync loops of many accounts over worker processes so that
+    decoding and deserialising responses scales with the number of cores.
+    Each worker runs a ClientPool for its shard of accounts and passes
+    every sync response to handler, a picklable function of
+    (account id, response) returning what to send back to the parent, or
+    None. Results are encoded by the JSON codec and sent through a pipe per
+    worker, so that a worker being killed cannot block the others. Workers
+    which crash are restarted up to max_restarts times each, once what they
+    sent before crashing is read.
+    """
+
+    def __init__(self, accounts, nb_workers=None,
+        handler=get_timeline_events,
+        engine: pymatrix.codec.JsonEngineEnum=None,
+        max_restarts=DEFAULT_MAX_RESTARTS, mp_context=None, **sync_options):
+        """
+        mp_context: the multiprocessing context or start method name, the
+            platform default otherwise
+        sync_options: arguments of the sync loops, e.g. timeout
+        """
+        nb_workers = nb_workers if nb_workers is not None \
+            else os.cpu_count() or 1
+        shards = [[] for i in range(0, nb_workers)]
+        for account in accounts:
+            shards[get_shard(account.account_id, nb_workers)].append(account)
+        self._workers = [_Worker(shard) for shard in shards if shard]
+        self._handler = handler
+        self._engine = engine
+        self._codec = pymatrix.codec.get_codec(engine)
+        self._max_restarts = max_restarts
+        self._context = mp_context \
+            if isinstance(mp_context, multiprocessing.context.BaseContext) \
+            else multiprocessing.get_context(mp_context)
+        self._sync_options = sync_options
+        self._running = False
+        self._statistics = WorkerStatistics()
+
+    @property
+    def statistics(self): return self._statistics
+    @property
+    def nb_workers(self): return len(self._workers)
+
+    def get_processes(self):
+        return [worker.process for worker in self._workers]
+
+    def _drain(self, worker):
+        """
+        Returns the messages left in the pipe of a worker which exited, and
+        closes it
+        """
+        messages = []
+        if(worker.connection is None):
+            return messages
+        try:
+            while(worker.connection.poll()):
+                messages.append(worker.connection.recv())
+        except (EOFError, OSError):
+            pass
+        worker.connection.close()
+        worker.connection = None
+        return messages
+
+    def _start_worker(self, worker):
+        worker.connection, child_connection = self._context.Pipe(False)
+        worker.process = self._context.Process(target=_run_worker,
+            args=(worker.accounts, child_connection, self._handler,
+                self._engine, self._sync_options),
+            daemon=True)
+        worker.process.start()
+        # only the worker writes to it
+        child_connection.close()
+
+    def start(self):
+        self._running = True
+        for worker in self._workers:
+            self._start_worker(worker)
+
+    def _restart_crashed_workers(self):
+        """
+        Returns the messages the restarted workers sent before crashing
+        """
+        messages = []
+        for worker in self._workers:
+            # a worker exiting normally has no sync loop left to run
+            if(worker.process.is_alive() or worker.process.exitcode == 0
+                or worker.restarts >= self._max_restarts):
+                continue
+            messages.extend(self._drain(worker))
+            worker.restarts += 1
+            self._statistics.restarts += 1
+            self._start_worker(worker)
+        return messages
+
+    def _get_result(self, kind, account_id, payload):
+        self._statistics.messages += 1
+        if(kind == _KIND_ERROR):
+            return (account_id, WorkerError(payload))
+        self._statistics.bytes_received += len(payload)
+        return (account_id, self._codec.decode(payload))
+
+    async def read_events(self, poll_interval=DEFAULT_POLL_INTERVAL):
+        """
+        Yields the (account id, result) tuples sent by the workers, result
+        being the decoded output of the handler or a WorkerError. Workers
+        are checked for crashes every poll_interval seconds. Once every
+        worker has exited and none can be restarted anymore, the stream ends
+        if they all exited normally, and raises a WorkerError otherwise.
+        """
+        loop = asyncio.get_event_loop()
+        last_check = time.monotonic()
+        while(self._running):
+            if(time.monotonic() - last_check >= poll_interval):
+                last_check = time.monotonic()
+                for message in self._restart_crashed_workers():
+                    yield self._get_result(*message)
+                if(not any(worker.process.is_alive()
+                    for worker in self._workers)):
+                    for worker in self._workers:
+                        for message in self._drain(worker):
+                            yield self._get_result(*message)
+                    crashed = sum(1 for worker in self._workers
+                        if worker.process.exitcode != 0)
+                    if(crashed > 0):
+                        raise WorkerError("{} of {} workers crashed and "
+                            "were not restarted".format(crashed,
+                                len(self._workers)))
+                    return
+            workers = dict((worker.connection, worker)
+                for worker in self._workers if worker.connection is not None)
+            ready = await loop.run_in_executor(None,
+                multiprocessing.connection.wait, list(workers), poll_interval)
+            for connection in ready:
+                try:
+                    kind, account_id, payload = connection.recv()
+                except (EOFError, OSError):
+                    # the worker exited, it is restarted if it crashed
+                    connection.close()
+                    workers[connection].connection = None
+                    continue
+
+                yield self._get_result(kind, account_id, payload)
+
+    def stop(self, timeout=5.0):
+        """
+        Stops every worker
+        """
+        self._running = False
+        for worker in self._workers:
+            if(worker.process is not None):
+                worker.process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            if(worker.process is not None):
+                worker.process.join(max(0, deadline - time.monotonic()))
+            if(worker.connection is not None):
+                worker.connection.close()
+                worker.connection = None
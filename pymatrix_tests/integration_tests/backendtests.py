@@ -0,0 +1,147 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.integration_tests.helpers.mock_matrix_server import StaticResponseHTTPRequestHandler
+import pymatrix.backend.http
+import pymatrix.backend.retry
+import pymatrix.tracing
+import asyncio
+import http
+import http.server
+import threading
+
+server_hostname = "localhost"
+server_port = 49993
+nb_requests_served = 4
+
+class HttpBackendTests(TestClassBase):
+
+    backend = None
+    server = None
+    worker_thread = None
+
+    def _serve(self):
+        for i in range(0, nb_requests_served):
+            self.server.handle_request()
+
+    def test_method_init(self):
+        self.tracer = pymatrix.tracing.Tracer()
+        self.server = http.server.HTTPServer((server_hostname, server_port), StaticResponseHTTPRequestHandler)
+        self.server.timeout = 0.1 # will hang for .1 second max
+        self.worker_thread = threading.Thread(target=self._serve)
+        self.worker_thread.start()
+
+        self.backend = pymatrix.backend.http.HttpBackend(
+            pymatrix.backend.http.ConnectionPoolOptions(limit=10,
+                limit_per_host=4, keepalive_timeout=5.0),
+            pymatrix.backend.retry.RetryPolicy(max_attempts=3,
+                base_delay=0.001),
+            tracer=self.tracer)
+        asyncio.get_event_loop(). \
+            run_until_complete(self.backend.connect(server_hostname, server_port))
+
+    def test_method_cleanup(self):
+        asyncio.get_event_loop().run_until_complete(self.backend.disconnect())
+        self.worker_thread.join()
+        self.server.server_close()
+
+        # securely reset the state
+        StaticResponseHTTPRequestHandler.response_body = None
+        StaticResponseHTTPRequestHandler.status_code = None
+
+    @testmethod
+    def T_connect_applies_pool_options(self):
+        # arrange
+        connector = self.backend._session.connector
+
+        # assert
+        assert connector.limit == 10
+        assert connector.limit_per_host == 4
+
+    @testmethod
+    def T_write_event_updates_pool_statistics(self):
+        # arrange
+        StaticResponseHTTPRequestHandler.setup_response(
+            http.HTTPStatus.OK, "{}")
+
+        # act
+        response = asyncio.get_event_loop().run_until_complete(
+            self.backend.write_event(pymatrix.backend.http.RestMessage(
+                url="/_matrix/client/versions")))
+
+        # assert
+        statistics = self.backend.pool_statistics
+        assert not response.is_error
+        assert statistics.connections_created == 1
+        assert statistics.acquired == 0
+        assert statistics.as_dict()["open"] == statistics.idle
+
+    @testmethod
+    def T_write_event_retries_idempotent_request_on_unavailable(self):
+        # arrange
+        StaticResponseHTTPRequestHandler.setup_response(
+            http.HTTPStatus.SERVICE_UNAVAILABLE, "{}")
+
+        # act
+        response = asyncio.get_event_loop().run_until_complete(
+            self.backend.write_event(pymatrix.backend.http.RestMessage(
+                url="/_matrix/client/versions")))
+
+        # assert
+        assert response.status == http.HTTPStatus.SERVICE_UNAVAILABLE
+        assert len(StaticResponseHTTPRequestHandler.requested_paths) == 3
+        assert self.backend.retry_statistics.retries == 2
+
+    @testmethod
+    def T_write_event_does_not_retry_non_idempotent_request(self):
+        # arrange
+        StaticResponseHTTPRequestHandler.setup_response(
+            http.HTTPStatus.SERVICE_UNAVAILABLE, "{}")
+
+        # act
+        response = asyncio.get_event_loop().run_until_complete(
+            self.backend.write_event(pymatrix.backend.http.RestMessage(
+                url="/_matrix/client/r0/login", method="POST", body=b"{}")))
+
+        # assert
+        assert response.is_error
+        assert len(StaticResponseHTTPRequestHandler.requested_paths) == 1
+        assert self.backend.retry_statistics.retries == 0
+
+    @testmethod
+    def T_write_event_raw_returns_body_untouched(self):
+        # arrange
+        StaticResponseHTTPRequestHandler.setup_response(
+            http.HTTPStatus.OK, '{"versions": ["r0.6.1"]}')
+
+        # act
+        response = asyncio.get_event_loop().run_until_complete(
+            self.backend.write_event(pymatrix.backend.http.RestMessage(
+                url="/_matrix/client/versions"), raw=True))
+
+        # assert
+        assert isinstance(response, pymatrix.backend.http.RawResponse)
+        assert isinstance(response.body, memoryview)
+        assert response.tobytes() == b'{"versions": ["r0.6.1"]}'
+        assert response.status == http.HTTPStatus.OK
+        assert response.headers["content-type"] == "application/json"
+
+    @testmethod
+    def T_write_event_traces_every_attempt(self):
+        # arrange
+        StaticResponseHTTPRequestHandler.setup_response(
+            http.HTTPStatus.SERVICE_UNAVAILABLE, "{}")
+        observer = pymatrix.tracing.HistogramObserver()
+        self.tracer.add_observer(observer)
+
+        # act
+        asyncio.get_event_loop().run_until_complete(
+            self.backend.write_event(pymatrix.backend.http.RestMessage(
+                url="/_matrix/client/versions?since=s1")))
+
+        # assert
+        # traced by path, whatever the query string
+        histogram = observer.get_histogram(
+            pymatrix.tracing.TraceStageEnum.RoundTrip,
+            "/_matrix/client/versions")
+        assert histogram.count == 3
+        assert histogram.size_total == 6
+        assert histogram.duration_total > 0
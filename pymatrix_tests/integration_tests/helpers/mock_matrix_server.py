@@ -8,10 +8,12 @@ class StaticResponseHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
     """
     status_code = None
     response_body = None
+    requested_paths = []
 
     def setup_response(status_code, response_body):
         StaticResponseHTTPRequestHandler.status_code = status_code
         StaticResponseHTTPRequestHandler.response_body = response_body
+        StaticResponseHTTPRequestHandler.requested_paths = []
 
     def __init__(self, request, client_address, server):
         if(StaticResponseHTTPRequestHandler.status_code is None
@@ -20,6 +22,7 @@ class StaticResponseHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
         super().__init__(request, client_address, server)
 
     def send_static_response(self):
+        StaticResponseHTTPRequestHandler.requested_paths.append(self.path)
         self.send_response_only(StaticResponseHTTPRequestHandler.status_code)
         self.send_header("Content-Type", "application/json")
         self.end_headers()
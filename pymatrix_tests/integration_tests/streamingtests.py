@@ -0,0 +1,87 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.integration_tests.helpers.mock_matrix_server import StaticResponseHTTPRequestHandler
+import pymatrix.backend.http
+import asyncio
+import http
+import http.server
+import threading
+
+server_hostname = "localhost"
+server_port = 49993
+
+class StreamingTests(TestClassBase):
+
+    backend = None
+    server = None
+    worker_thread = None
+
+    def test_method_init(self):
+        self.server = http.server.HTTPServer((server_hostname, server_port), StaticResponseHTTPRequestHandler)
+        self.server.timeout = 0.1 # will hang for .1 second max
+        self.worker_thread = threading.Thread(target=self.server.handle_request)
+        self.worker_thread.start()
+
+        self.backend = pymatrix.backend.http.HttpBackend()
+        asyncio.get_event_loop(). \
+            run_until_complete(self.backend.connect(server_hostname, server_port))
+
+    def test_method_cleanup(self):
+        asyncio.get_event_loop().run_until_complete(self.backend.disconnect())
+        self.worker_thread.join()
+        self.server.server_close()
+
+        # securely reset the state
+        StaticResponseHTTPRequestHandler.response_body = None
+        StaticResponseHTTPRequestHandler.status_code = None
+
+    async def _stream(self, expand_paths):
+        response = await self.backend.stream_event(
+            pymatrix.backend.http.RestMessage(url="/_matrix/client/r0/sync"),
+            expand_paths)
+        return (response.is_error,
+            [section async for section in response])
+
+    @testmethod
+    def T_stream_event_should_yield_sections(self):
+        # arrange
+        response_json = "{\"next_batch\": \"s1\", \"rooms\": {\"join\": " \
+            "{\"!a:localhost\": {\"timeline\": {\"events\": []}}, " \
+            "\"!b:localhost\": {}}}}"
+        StaticResponseHTTPRequestHandler.setup_response(
+            http.HTTPStatus.OK, response_json)
+
+        # act
+        is_error, sections = asyncio.get_event_loop() \
+            .run_until_complete(self._stream([("rooms", "join")]))
+
+        # assert
+        assert not is_error
+        assert sections == [
+            (("next_batch",), "s1"),
+            (("rooms", "join", "!a:localhost"), {"timeline": {"events": []}}),
+            (("rooms", "join", "!b:localhost"), {})
+            ]
+
+    @testmethod
+    def T_stream_event_closed_early_releases_connection(self):
+        # arrange
+        StaticResponseHTTPRequestHandler.setup_response(http.HTTPStatus.OK,
+            "{\"next_batch\": \"s1\", \"rooms\": {\"join\": "
+            "{\"!a:localhost\": {}, \"!b:localhost\": {}}}}")
+
+        async def stream_first_section():
+            async with await self.backend.stream_event(
+                pymatrix.backend.http.RestMessage(
+                    url="/_matrix/client/r0/sync"),
+                [("rooms", "join")]) as response:
+                async for section in response:
+                    return response, section
+
+        # act
+        response, section = asyncio.get_event_loop().run_until_complete(
+            stream_first_section())
+
+        # assert
+        assert section == (("next_batch",), "s1")
+        assert response.closed
+        assert self.backend.pool_statistics.acquired == 0
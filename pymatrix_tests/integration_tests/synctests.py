@@ -0,0 +1,98 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.integration_tests.helpers.mock_matrix_server import StaticResponseHTTPRequestHandler
+import pymatrix.client
+import pymatrix.specification.base
+import pymatrix.specification.r0.sync
+import asyncio
+import http
+import http.server
+import threading
+
+server_hostname = "localhost"
+server_port = 49993
+nb_requests_served = 2
+
+class SyncTests(TestClassBase):
+
+    client = None
+    server = None
+    worker_thread = None
+
+    def _serve(self):
+        for i in range(0, nb_requests_served):
+            self.server.handle_request()
+
+    def test_method_init(self):
+        self.server = http.server.HTTPServer((server_hostname, server_port), StaticResponseHTTPRequestHandler)
+        self.server.timeout = 0.1 # will hang for .1 second max
+        self.worker_thread = threading.Thread(target=self._serve)
+        self.worker_thread.start()
+
+        self.client = pymatrix.client.ClientFactory.get_client()
+        asyncio.get_event_loop(). \
+            run_until_complete(self.client.connect(server_hostname, server_port))
+
+    def test_method_cleanup(self):
+        asyncio.get_event_loop().run_until_complete(self.client.logout())
+        self.worker_thread.join()
+        self.server.server_close()
+
+        # securely reset the state
+        StaticResponseHTTPRequestHandler.response_body = None
+        StaticResponseHTTPRequestHandler.status_code = None
+
+    async def _read(self, nb_responses):
+        responses = []
+        events = self.client.read_events(timeout=1000)
+        try:
+            async for response in events:
+                responses.append(response)
+                if(len(responses) == nb_responses):
+                    break
+        finally:
+            await events.aclose()
+        return responses
+
+    @testmethod
+    def T_read_events_should_poll_with_since_token(self):
+        # arrange
+        response_json = "{\"next_batch\": \"s72595_4483\", \"rooms\": " \
+            "{\"join\": {\"!a:localhost\": {}}}, \"presence\": " \
+            "{\"events\": []}, \"unknown_member\": 1}"
+        StaticResponseHTTPRequestHandler.setup_response(
+            http.HTTPStatus.OK, response_json)
+
+        # act
+        responses = asyncio.get_event_loop() \
+            .run_until_complete(self._read(2))
+
+        # assert
+        assert len(responses) == 2
+        for response in responses:
+            assert isinstance(response,
+                pymatrix.specification.r0.sync.SyncResponseMessage)
+            assert response.next_batch == "s72595_4483"
+            assert response.rooms.join == {"!a:localhost": {}}
+            assert response.presence.events == []
+        paths = StaticResponseHTTPRequestHandler.requested_paths
+        assert paths[0] == "/_matrix/client/r0/sync?timeout=1000"
+        assert paths[1] == \
+            "/_matrix/client/r0/sync?since=s72595_4483&timeout=1000"
+
+    @testmethod
+    def T_read_events_should_stop_on_error(self):
+        # arrange
+        response_json = "{\"errcode\": \"M_UNKNOWN_TOKEN\", " \
+            "\"error\": \"Unrecognised access token.\"}"
+        StaticResponseHTTPRequestHandler.setup_response(
+            http.HTTPStatus.UNAUTHORIZED, response_json)
+
+        # act
+        responses = asyncio.get_event_loop() \
+            .run_until_complete(self._read(2))
+
+        # assert
+        assert len(responses) == 1
+        assert isinstance(responses[0],
+            pymatrix.specification.base.ErrorMessageBase)
+        assert responses[0].errcode == "M_UNKNOWN_TOKEN"
@@ -0,0 +1,144 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.integration_tests.helpers.mock_matrix_server import StaticResponseHTTPRequestHandler
+import pymatrix.workers
+import asyncio
+import http
+import http.server
+import threading
+import time
+
+server_hostname = "localhost"
+server_port = 49993
+
+message_event = {"type": "m.room.message", "sender": "@user:localhost",
+    "content": {"body": "hello"}}
+
+class WorkerSupervisorTests(TestClassBase):
+
+    server = None
+    worker_thread = None
+    supervisor = None
+
+    def test_method_init(self):
+        StaticResponseHTTPRequestHandler.setup_response(http.HTTPStatus.OK,
+            "{\"next_batch\": \"s1\", \"rooms\": {\"join\": {\"!a:localhost\": "
+            "{\"timeline\": {\"events\": [{\"type\": \"m.room.message\", "
+            "\"sender\": \"@user:localhost\", "
+            "\"content\": {\"body\": \"hello\"}}]}}}}}")
+        self.server = http.server.ThreadingHTTPServer(
+            (server_hostname, server_port), StaticResponseHTTPRequestHandler)
+        self.worker_thread = threading.Thread(target=self.server.serve_forever,
+            kwargs={"poll_interval": 0.05})
+        self.worker_thread.start()
+
+    def test_method_cleanup(self):
+        if(self.supervisor is not None):
+            self.supervisor.stop()
+        self.server.shutdown()
+        self.worker_thread.join()
+        self.server.server_close()
+
+        # securely reset the state
+        StaticResponseHTTPRequestHandler.response_body = None
+        StaticResponseHTTPRequestHandler.status_code = None
+
+    def _make_supervisor(self, account_ids, nb_workers, **kwargs):
+        # fork, as spawned workers would re-run the test runner module
+        self.supervisor = pymatrix.workers.WorkerSupervisor(
+            [pymatrix.workers.AccountConfig(account_id, server_hostname,
+                server_port, access_token="token_" + account_id)
+                for account_id in account_ids],
+            nb_workers, mp_context="fork", timeout=100, **kwargs)
+        self.supervisor.start()
+
+    async def _read(self, until):
+        received = []
+        events = self.supervisor.read_events(poll_interval=0.05)
+        try:
+            async for account_id, result in events:
+                received.append((account_id, result))
+                if(until(received)):
+                    break
+        finally:
+            await events.aclose()
+        return received
+
+    def _read_with_timeout(self, until):
+        return asyncio.get_event_loop().run_until_complete(
+            asyncio.wait_for(self._read(until), 10))
+
+    @testmethod
+    def T_workers_deliver_events_of_every_account(self):
+        # arrange
+        account_ids = ["account_{}".format(index) for index in range(0, 4)]
+        self._make_supervisor(account_ids, 2)
+
+        # act
+        received = self._read_with_timeout(lambda received:
+            set(account_id for account_id, result in received)
+                == set(account_ids))
+
+        # assert
+        assert self.supervisor.nb_workers == len(set(
+            pymatrix.workers.get_shard(account_id, 2)
+            for account_id in account_ids))
+        for account_id, result in received:
+            assert result == [["!a:localhost", message_event]]
+        assert self.supervisor.statistics.bytes_received > 0
+
+    @testmethod
+    def T_crashed_worker_is_restarted(self):
+        # arrange
+        self._make_supervisor(["account"], 1, max_restarts=1)
+        self._read_with_timeout(lambda received: len(received) >= 1)
+        process = self.supervisor.get_processes()[0]
+
+        # act
+        process.kill()
+        process.join()
+        self._read_with_timeout(
+            lambda received: self.supervisor.statistics.restarts == 1
+                and self.supervisor.get_processes()[0] is not process)
+
+        # assert
+        assert self.supervisor.get_processes()[0].is_alive()
+        assert self.supervisor.statistics.restarts == 1
+
+    @testmethod
+    def T_crashed_worker_events_are_read_before_stream_ends(self):
+        # arrange
+        self._make_supervisor(["account"], 1, max_restarts=0)
+        process = self.supervisor.get_processes()[0]
+        time.sleep(0.5)
+
+        # act
+        process.kill()
+        process.join()
+        received = []
+        error = None
+
+        async def read_all():
+            async for account_id, result in self.supervisor.read_events(
+                poll_interval=0.05):
+                received.append(result)
+        try:
+            asyncio.get_event_loop().run_until_complete(
+                asyncio.wait_for(read_all(), 10))
+        except pymatrix.workers.WorkerError as e:
+            error = e
+
+        # assert
+        assert error is not None
+        assert len(received) > 0
+        assert self.supervisor.statistics.restarts == 0
+
+    @testmethod
+    def T_get_shard_is_stable(self):
+        # act
+        shards = [pymatrix.workers.get_shard("@user_{}:localhost".format(index),
+            4) for index in range(0, 100)]
+
+        # assert
+        assert shards == [pymatrix.workers.get_shard(
+            "@user_{}:localhost".format(index), 4) for index in range(0, 100)]
+        assert set(shards) == set([0, 1, 2, 3])
@@ -0,0 +1,288 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.tests.helpers.fake_backend import FakeBackend
+import pymatrix.api
+import pymatrix.backend.http
+import pymatrix.cache
+import pymatrix.coalescing
+import pymatrix.constants
+import pymatrix.error
+import pymatrix.metrics
+import pymatrix.specification.base
+import pymatrix.specification.r0.login
+import pymatrix.tracing
+import asyncio
+import concurrent.futures
+import json
+import threading
+
+def login_handler(message):
+    user = json.loads(message.body)["user"]
+    if(user == "wrong_user"):
+        return (403, b'{"errcode": "M_FORBIDDEN", "error": "Forbidden"}')
+    return (200, json.dumps({"user_id": "@{}:localhost".format(user),
+        "access_token": "token_{}".format(user)}).encode("utf-8"))
+
+class ApiBaseTests(TestClassBase):
+
+    def test_method_init(self):
+        self.backend = FakeBackend(login_handler, delay=0.001)
+        self.api = pymatrix.api.RestApi(backend=self.backend)
+
+    @testmethod
+    def T_generic_call_many_return_results_in_order(self):
+        # arrange
+        users = ["user_{}".format(index) for index in range(0, 20)]
+        calls = [(pymatrix.constants.EndpointNamesEnum.Login,
+            {"user": user, "password": "password"}) for user in users]
+
+        # act
+        results = asyncio.get_event_loop().run_until_complete(
+            self.api.generic_call_many(calls, max_concurrency=4))
+
+        # assert
+        assert [result.user_id for result in results] == \
+            ["@{}:localhost".format(user) for user in users]
+        assert [json.loads(message.body)["user"] for message
+            in self.backend.messages] == users
+        assert self.backend.max_in_flight == 4
+
+    @testmethod
+    def T_generic_call_many_failure_does_not_cancel_batch(self):
+        # arrange
+        calls = [
+            (pymatrix.constants.EndpointNamesEnum.Login,
+                {"user": "user_1", "password": "password"}),
+            (pymatrix.constants.EndpointNamesEnum.Login, {}),
+            (pymatrix.constants.EndpointNamesEnum.Register, {}),
+            (pymatrix.constants.EndpointNamesEnum.Login,
+                {"user": "wrong_user", "password": "password"}),
+            (pymatrix.constants.EndpointNamesEnum.Login,
+                {"user": "user_2", "password": "password"})
+            ]
+
+        # act
+        results = asyncio.get_event_loop().run_until_complete(
+            self.api.generic_call_many(calls))
+
+        # assert
+        assert isinstance(results[0],
+            pymatrix.specification.r0.login.LoginResponseMessage)
+        assert isinstance(results[1], pymatrix.error.SpecificationError)
+        assert isinstance(results[2], pymatrix.error.SpecificationError)
+        assert isinstance(results[3],
+            pymatrix.specification.base.ErrorMessageBase)
+        assert results[4].user_id == "@user_2:localhost"
+
+    @testmethod
+    def T_generic_call_raw_skips_deserialisation(self):
+        # arrange
+        serialiser = self.api._serialiser
+        loads = serialiser.loads
+        serialiser.loads = None # any deserialisation would fail
+
+        # act
+        try:
+            response = asyncio.get_event_loop().run_until_complete(
+                self.api.generic_call_raw(
+                    pymatrix.constants.EndpointNamesEnum.Login,
+                    user="user_1", password="password"))
+        finally:
+            serialiser.loads = loads
+
+        # assert
+        assert isinstance(response, pymatrix.backend.http.RawResponse)
+        assert not response.is_error
+        assert json.loads(response.tobytes())["access_token"] == "token_user_1"
+        assert response.headers == {"content-type": "application/json"}
+
+    @testmethod
+    def T_generic_call_caches_get_endpoints_with_ttl(self):
+        # arrange
+        backend = FakeBackend(lambda message: (200,
+            b'{"displayname": "User"}'), delay=0.001)
+        api = pymatrix.api.RestApi(backend=backend,
+            response_cache=pymatrix.cache.ResponseCache())
+        calls = [(pymatrix.constants.EndpointNamesEnum.Profile,
+            {"user_id": "@user:localhost"})] * 5
+
+        # act
+        results = asyncio.get_event_loop().run_until_complete(
+            api.generic_call_many(calls))
+        api.access_token = "ABCDE"
+        asyncio.get_event_loop().run_until_complete(api.generic_call(
+            pymatrix.constants.EndpointNamesEnum.Profile,
+            user_id="@user:localhost"))
+
+        # assert
+        assert [result.displayname for result in results] == ["User"] * 5
+        assert len(results) == len(set(id(result) for result in results))
+        assert [message.url for message in backend.messages] == \
+            ["/_matrix/client/r0/profile/%40user%3Alocalhost"] * 2
+        assert api.response_cache.statistics.as_dict()["coalesced"] == 4
+
+    @testmethod
+    def T_generic_call_coalesces_identical_idempotent_calls(self):
+        # arrange
+        def handler(message):
+            if(message.method == "POST"):
+                return login_handler(message)
+            return (200, b'{"displayname": "User"}')
+        backend = FakeBackend(handler, delay=0.001)
+        api = pymatrix.api.RestApi(backend=backend,
+            single_flight=pymatrix.coalescing.SingleFlight())
+        calls = [(pymatrix.constants.EndpointNamesEnum.Profile,
+            {"user_id": "@user:localhost"})] * 3 \
+            + [(pymatrix.constants.EndpointNamesEnum.Profile,
+            {"user_id": "@other:localhost"})] \
+            + [(pymatrix.constants.EndpointNamesEnum.Login,
+            {"user": "user_1", "password": "password"})] * 2
+
+        # act
+        results = asyncio.get_event_loop().run_until_complete(
+            api.generic_call_many(calls))
+
+        # assert
+        assert [result.displayname for result in results[:4]] == \
+            ["User"] * 4
+        assert results[0] is not results[1]
+        assert sorted(message.method for message in backend.messages) == \
+            ["GET", "GET", "POST", "POST"]
+        assert api.single_flight.statistics.coalesced == 2
+
+    @testmethod
+    def T_large_responses_are_deserialised_out_of_the_loop(self):
+        # arrange
+        api = pymatrix.api.RestApi(backend=self.backend, offload_threshold=80)
+        loads = api._serialiser.loads
+        threads = []
+        def recording_loads(*args):
+            threads.append(threading.get_ident())
+            return loads(*args)
+        api._serialiser.loads = recording_loads
+
+        # act
+        short = asyncio.get_event_loop().run_until_complete(api.generic_call(
+            pymatrix.constants.EndpointNamesEnum.Login,
+            user="u", password="password"))
+        long = asyncio.get_event_loop().run_until_complete(api.generic_call(
+            pymatrix.constants.EndpointNamesEnum.Login,
+            user="user_" + "x" * 80, password="password"))
+
+        # assert
+        assert short.user_id == "@u:localhost"
+        assert long.user_id == "@user_{}:localhost".format("x" * 80)
+        assert threads[0] == threading.get_ident()
+        assert threads[1] != threading.get_ident()
+        assert api.offloaded_count == 1
+
+    @testmethod
+    def T_responses_are_decoded_in_a_process_executor(self):
+        # arrange
+        def handler(message):
+            if(message.method == "POST"):
+                return login_handler(message)
+            return (200, b'{"next_batch": "s1"}')
+        tracer = pymatrix.tracing.Tracer()
+        executor = concurrent.futures.ProcessPoolExecutor(1)
+        api = pymatrix.api.RestApi(backend=FakeBackend(handler),
+            executor=executor, offload_threshold=0, tracer=tracer)
+
+        async def run():
+            untraced = await api.generic_call(
+                pymatrix.constants.EndpointNamesEnum.Login,
+                user="user_1", password="password")
+            tracer.add_observer(pymatrix.tracing.HistogramObserver())
+            traced = await api.generic_call(
+                pymatrix.constants.EndpointNamesEnum.Login,
+                user="user_2", password="password")
+            events = api.read_events()
+            try:
+                sync = await events.__anext__()
+            finally:
+                await events.aclose()
+            return untraced, traced, sync
+
+        # act
+        try:
+            untraced, traced, sync = \
+                asyncio.get_event_loop().run_until_complete(run())
+        finally:
+            executor.shutdown()
+
+        # assert
+        assert untraced.user_id == "@user_1:localhost"
+        assert traced.user_id == "@user_2:localhost"
+        assert sync.next_batch == "s1"
+        assert api.offloaded_count >= 5
+
+    @testmethod
+    def T_undecodable_error_bodies_are_returned_as_errors(self):
+        # arrange
+        bodies = iter([b"<html>Bad Gateway</html>", b""])
+        api = pymatrix.api.RestApi(backend=FakeBackend(
+            lambda message: (502, next(bodies))))
+
+        async def read_events():
+            return [response async for response in api.read_events()]
+
+        # act
+        html = asyncio.get_event_loop().run_until_complete(api.generic_call(
+            pymatrix.constants.EndpointNamesEnum.Login,
+            user="user", password="password"))
+        responses = asyncio.get_event_loop().run_until_complete(read_events())
+
+        # assert
+        for error in [html] + responses:
+            assert isinstance(error,
+                pymatrix.specification.base.ErrorMessageBase)
+            assert error.errcode == pymatrix.api.UNDECODABLE_ERRCODE
+            assert "502" in error.error
+        assert len(responses) == 1
+
+    @testmethod
+    def T_undecodable_sync_bodies_stop_polling(self):
+        for body in [b"", b"[]", b"not json"]:
+            # arrange
+            metrics = pymatrix.metrics.ClientMetrics()
+            backend = FakeBackend(lambda message: (200, body))
+            api = pymatrix.api.RestApi(backend=backend, metrics=metrics)
+
+            async def read_events():
+                return [response async for response in api.read_events()]
+
+            # act
+            responses = asyncio.get_event_loop().run_until_complete(
+                read_events())
+
+            # assert
+            assert len(responses) == 1
+            assert len(backend.messages) == 1
+            assert isinstance(responses[0],
+                pymatrix.specification.base.ErrorMessageBase)
+            assert responses[0].errcode == pymatrix.api.UNDECODABLE_ERRCODE
+            assert "200" in responses[0].error
+            assert 'pymatrix_sync_batches_total{outcome="error"} 1' \
+                in metrics.render().splitlines()
+
+    @testmethod
+    def T_generic_call_uses_message_options_without_route_path(self):
+        # arrange
+        class CustomSpec(pymatrix.specification.base.SpecificationBase):
+            def _define_message_types(self):
+                self.message_code_type = {
+                    pymatrix.constants.EndpointNamesEnum.Login:
+                        (pymatrix.specification.r0.login.LoginRequestMessage,
+                        pymatrix.specification.r0.login.LoginResponseMessage,
+                        pymatrix.specification.base.ErrorMessageBase)}
+        api = pymatrix.api.RestApi(backend=self.backend,
+            specification=CustomSpec())
+
+        # act
+        response = asyncio.get_event_loop().run_until_complete(
+            api.generic_call(pymatrix.constants.EndpointNamesEnum.Login,
+                user="user_1", password="password"))
+
+        # assert
+        assert response.user_id == "@user_1:localhost"
+        assert self.backend.messages[0].url == "/_matrix/client/r0/login"
+        assert self.backend.messages[0].method == "POST"
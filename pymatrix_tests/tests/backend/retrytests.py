@@ -0,0 +1,56 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+import pymatrix.backend.http
+import pymatrix.backend.retry
+
+class RetryPolicyTests(TestClassBase):
+
+    @testmethod
+    def T_get_delay_no_jitter_grows_exponentially_up_to_max(self):
+        # arrange
+        policy = pymatrix.backend.retry.RetryPolicy(base_delay=0.5,
+            max_delay=3, multiplier=2, jitter=False)
+
+        # act
+        delays = [policy.get_delay(attempt) for attempt in range(1, 6)]
+
+        # assert
+        assert delays == [0.5, 1, 2, 3, 3]
+
+    @testmethod
+    def T_get_delay_with_jitter_stays_below_curve(self):
+        # arrange
+        policy = pymatrix.backend.retry.RetryPolicy(base_delay=0.5,
+            multiplier=2, jitter=True)
+
+        for attempt in range(1, 5):
+            # act
+            delay = policy.get_delay(attempt)
+
+            # assert
+            assert 0 <= delay <= 0.5 * 2 ** (attempt - 1)
+
+    @testmethod
+    def T_can_retry_depends_on_method_idempotency(self):
+        # arrange
+        policy = pymatrix.backend.retry.RetryPolicy(max_attempts=3)
+        get_message = pymatrix.backend.http.RestMessage("/", method="GET")
+        post_message = pymatrix.backend.http.RestMessage("/", method="POST")
+
+        # assert
+        assert policy.can_retry(get_message, 1)
+        assert not policy.can_retry(post_message, 1)
+        assert policy.can_retry(post_message, 1, nothing_sent=True)
+        assert not policy.can_retry(get_message, 3)
+
+    @testmethod
+    def T_can_retry_message_override_wins(self):
+        # arrange
+        policy = pymatrix.backend.retry.RetryPolicy()
+        post_message = pymatrix.backend.http.RestMessage("/", method="POST",
+            idempotent=True)
+        put_message = pymatrix.backend.http.RestMessage("/", method="PUT",
+            idempotent=False)
+
+        # assert
+        assert policy.can_retry(post_message, 1)
+        assert not policy.can_retry(put_message, 1)
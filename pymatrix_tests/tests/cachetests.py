@@ -0,0 +1,220 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.tests.storetests import member_event, name_event
+import pymatrix.backend.http
+import pymatrix.cache
+import pymatrix.store
+import asyncio
+
+class RoomStateCacheTests(TestClassBase):
+
+    @testmethod
+    def T_apply_indexes_state_by_type_and_state_key(self):
+        # arrange
+        cache = pymatrix.cache.RoomStateCache()
+
+        # act
+        cache.apply(full_state=True, state_events=[
+            ("!a:localhost", name_event("first")),
+            ("!a:localhost", member_event("@a:localhost", "join")),
+            ("!a:localhost", member_event("@b:localhost", "join")),
+            ("!a:localhost", member_event("@b:localhost", "leave")),
+            ("!a:localhost", name_event("second")),
+            ("!a:localhost", {"type": "m.room.power_levels",
+                "state_key": "", "content": {"users_default": 0}})])
+
+        # assert
+        assert cache.get_room_name("!a:localhost") == "second"
+        assert cache.get_members("!a:localhost") == ["@a:localhost"]
+        assert cache.get_members("!a:localhost", "leave") == ["@b:localhost"]
+        assert cache.get_power_levels("!a:localhost") == \
+            {"users_default": 0}
+        assert cache.statistics.hits == 4
+        assert cache.statistics.misses == 0
+
+    @testmethod
+    def T_miss_on_unknown_room(self):
+        # arrange
+        cache = pymatrix.cache.RoomStateCache()
+
+        # act
+        name = cache.get_room_name("!unknown:localhost")
+
+        # assert
+        assert name is None
+        assert cache.statistics.misses == 1
+        assert len(cache) == 0
+
+    @testmethod
+    def T_least_recently_used_rooms_are_evicted(self):
+        # arrange
+        room_size = pymatrix.cache.RoomStateCache()
+        room_size.apply([("!a:localhost", name_event("name"))], True)
+        cache = pymatrix.cache.RoomStateCache(
+            max_bytes=room_size.size * 2)
+        cache.apply([("!a:localhost", name_event("name")),
+            ("!b:localhost", name_event("name"))], True)
+
+        # act
+        cache.get_room_name("!a:localhost")
+        cache.apply([("!c:localhost", name_event("name"))])
+
+        # assert
+        assert "!a:localhost" in cache
+        assert "!b:localhost" not in cache
+        assert "!c:localhost" in cache
+        assert cache.size <= room_size.size * 2
+        assert cache.statistics.evictions == 1
+
+    @testmethod
+    def T_partial_state_of_uncached_rooms_is_skipped(self):
+        # arrange
+        room_size = pymatrix.cache.RoomStateCache()
+        room_size.apply([("!a:localhost", name_event("name"))], True)
+        cache = pymatrix.cache.RoomStateCache(max_bytes=room_size.size)
+        cache.apply([("!a:localhost", name_event("name")),
+            ("!b:localhost", name_event("name"))], True)
+
+        # act
+        cache.apply([("!a:localhost",
+            member_event("@a:localhost", "join"))])
+        before_full_state = pymatrix.cache.RoomStateCache()
+        before_full_state.apply([("!a:localhost",
+            member_event("@a:localhost", "join"))])
+
+        # assert
+        assert "!a:localhost" not in cache
+        assert cache.get_room_name("!a:localhost") is None
+        assert cache.statistics.hits == 0
+        assert len(before_full_state) == 0
+
+    @testmethod
+    def T_size_follows_replaced_events(self):
+        # arrange
+        cache = pymatrix.cache.RoomStateCache()
+        cache.apply([("!a:localhost", name_event("short"))], True)
+        size = cache.size
+
+        # act
+        cache.apply([("!a:localhost", name_event("a much longer name"))])
+        cache.apply([("!a:localhost", name_event("short"))])
+
+        # assert
+        assert cache.size == size
+
+    @testmethod
+    def T_evicted_rooms_are_loaded_from_store(self):
+        # arrange
+        store = pymatrix.store.MemoryStateStore()
+        state_events = [("!a:localhost", name_event("name")),
+            ("!a:localhost", member_event("@a:localhost", "join"))]
+        store.save_sync("s1", state_events)
+        cache = pymatrix.cache.RoomStateCache(store=store)
+        cache.apply(state_events)
+
+        # act
+        name = cache.get_room_name("!a:localhost")
+        members = cache.get_members("!a:localhost")
+
+        # assert
+        assert name == "name"
+        assert members == ["@a:localhost"]
+        assert cache.statistics.misses == 1
+        assert cache.statistics.hits == 1
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class ResponseCacheTests(TestClassBase):
+
+    def test_method_init(self):
+        self.clock = FakeClock()
+        self.cache = pymatrix.cache.ResponseCache(max_entries=2,
+            clock=self.clock)
+        self.etags = []
+
+    def _make_fetch(self, status=200, body=b"{}", etag=None, delay=0):
+        async def fetch(previous_etag):
+            self.etags.append(previous_etag)
+            await asyncio.sleep(delay)
+            return pymatrix.backend.http.Response(body, status >= 400, status,
+                {"ETag": etag} if etag is not None else None)
+        return fetch
+
+    def _fetch(self, key, ttl, fetch):
+        return asyncio.get_event_loop().run_until_complete(
+            self.cache.fetch(key, ttl, fetch))
+
+    @testmethod
+    def T_fetch_caches_until_ttl(self):
+        # act
+        first = self._fetch("key", 10, self._make_fetch(body=b"1"))
+        self.clock.now = 9
+        second = self._fetch("key", 10, self._make_fetch(body=b"2"))
+        self.clock.now = 10
+        third = self._fetch("key", 10, self._make_fetch(body=b"3"))
+
+        # assert
+        assert [first.body, second.body, third.body] == [b"1", b"1", b"3"]
+        assert self.cache.statistics.hits == 1
+        assert self.cache.statistics.misses == 2
+
+    @testmethod
+    def T_fetch_does_not_cache_errors(self):
+        # act
+        self._fetch("key", 10, self._make_fetch(status=500))
+        response = self._fetch("key", 10, self._make_fetch(body=b"1"))
+
+        # assert
+        assert response.body == b"1"
+        assert len(self.cache) == 1
+
+    @testmethod
+    def T_concurrent_misses_share_one_fetch(self):
+        # arrange
+        fetch = self._make_fetch(body=b"1", delay=0.01)
+
+        # act
+        responses = asyncio.get_event_loop().run_until_complete(
+            asyncio.gather(*[self.cache.fetch("key", 10, fetch)
+                for i in range(0, 5)]))
+
+        # assert
+        assert len(self.etags) == 1
+        assert all(response is responses[0] for response in responses)
+        assert self.cache.statistics.misses == 1
+        assert self.cache.statistics.coalesced == 4
+
+    @testmethod
+    def T_expired_entry_is_revalidated_with_etag(self):
+        # arrange
+        first = self._fetch("key", 10, self._make_fetch(body=b"1",
+            etag="\"v1\""))
+        self.clock.now = 20
+
+        # act
+        second = self._fetch("key", 10, self._make_fetch(status=304,
+            body=b""))
+        self.clock.now = 25
+        third = self._fetch("key", 10, self._make_fetch(body=b"2"))
+
+        # assert
+        assert self.etags == [None, "\"v1\""]
+        assert second is first
+        assert third is first
+        assert self.cache.statistics.revalidations == 1
+
+    @testmethod
+    def T_least_recently_used_entries_are_evicted(self):
+        # act
+        for key in ["a", "b", "a", "c"]:
+            self._fetch(key, 10, self._make_fetch())
+
+        # assert
+        assert len(self.cache) == 2
+        assert self.cache.statistics.evictions == 1
+        self._fetch("a", 10, self._make_fetch())
+        assert self.cache.statistics.hits == 2
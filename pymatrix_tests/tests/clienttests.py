@@ -0,0 +1,170 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.tests.helpers.fake_backend import FakeBackend
+import pymatrix.api
+import pymatrix.client
+import pymatrix.store
+import asyncio
+import json
+import urllib.parse
+
+def matrix_handler(message):
+    if(message.method == "POST"):
+        return (200, b'{"user_id": "@user:localhost", '
+            b'"access_token": "ABCDE", "device_id": "DEVICE"}')
+    query = urllib.parse.parse_qs(urllib.parse.urlparse(message.url).query)
+    since = int(query.get("since", ["s0"])[0][1:])
+    return (200, json.dumps({"next_batch": "s{}".format(since + 1),
+        "rooms": {"join": {"!a:localhost": {"state": {"events": [
+            {"type": "m.room.name", "state_key": "",
+                "content": {"name": "name {}".format(since)}}]}}}}
+        }).encode("utf-8"))
+
+class ClientStoreTests(TestClassBase):
+
+    def test_method_init(self):
+        self.store = pymatrix.store.MemoryStateStore()
+
+    def _make_client(self):
+        backend = FakeBackend(matrix_handler)
+        return (pymatrix.client.ClientFactory.get_client(
+            pymatrix.api.RestApi(backend=backend), self.store), backend)
+
+    async def _read(self, client, nb_responses):
+        responses = []
+        events = client.read_events()
+        try:
+            async for response in events:
+                responses.append(response)
+                if(len(responses) == nb_responses):
+                    break
+        finally:
+            await events.aclose()
+        return responses
+
+    @testmethod
+    def T_login_saves_session(self):
+        # arrange
+        client, backend = self._make_client()
+
+        # act
+        asyncio.get_event_loop().run_until_complete(
+            client.login("user", "password"))
+
+        # assert
+        assert self.store.get_session()["access_token"] == "ABCDE"
+        assert self.store.get_session()["device_id"] == "DEVICE"
+
+    @testmethod
+    def T_restarted_client_resumes_from_store(self):
+        # arrange
+        client, backend = self._make_client()
+        asyncio.get_event_loop().run_until_complete(
+            client.login("user", "password"))
+        asyncio.get_event_loop().run_until_complete(self._read(client, 2))
+
+        # act
+        client, backend = self._make_client()
+        restored = client.restore_session()
+        responses = asyncio.get_event_loop().run_until_complete(
+            self._read(client, 1))
+
+        # assert
+        assert restored
+        assert backend.messages[0].url.startswith(
+            "/_matrix/client/r0/sync?since=s2&")
+        assert backend.messages[0].headers["Authorization"] == "Bearer ABCDE"
+        assert responses[0].next_batch == "s3"
+        assert self.store.get_sync_token() == "s3"
+        assert self.store.get_state_event("!a:localhost", "m.room.name") \
+            ["content"]["name"] == "name 2"
+        assert client.room_state.get_room_name("!a:localhost") == "name 2"
+
+    @testmethod
+    def T_logout_clears_store(self):
+        # arrange
+        client, backend = self._make_client()
+        asyncio.get_event_loop().run_until_complete(
+            client.login("user", "password"))
+        asyncio.get_event_loop().run_until_complete(self._read(client, 1))
+
+        # act
+        asyncio.get_event_loop().run_until_complete(client.logout())
+
+        # assert
+        assert self.store.get_session() is None
+        assert self.store.get_sync_token() is None
+        assert client.room_state.get_room_name("!a:localhost") is None
+
+    @testmethod
+    def T_login_as_another_user_clears_store(self):
+        # arrange
+        self.store.set_session("@other:localhost", "FGHIJ")
+        self.store.save_sync("s5", [("!b:localhost", {"type": "m.room.name",
+            "state_key": "", "content": {"name": "other"}})])
+        client, backend = self._make_client()
+
+        # act
+        asyncio.get_event_loop().run_until_complete(
+            client.login("user", "password"))
+
+        # assert
+        assert self.store.get_session()["user_id"] == "@user:localhost"
+        assert self.store.get_sync_token() is None
+        assert client.room_state.get_room_name("!b:localhost") is None
+
+    @testmethod
+    def T_restore_session_without_session(self):
+        # arrange
+        client, backend = self._make_client()
+
+        # act
+        restored = client.restore_session()
+
+        # assert
+        assert not restored
+
+    @testmethod
+    def T_read_events_updates_room_state_without_store(self):
+        # arrange
+        client = pymatrix.client.ClientFactory.get_client(
+            pymatrix.api.RestApi(backend=FakeBackend(matrix_handler)))
+
+        # act
+        asyncio.get_event_loop().run_until_complete(self._read(client, 2))
+
+        # assert
+        assert client.room_state.get_room_name("!a:localhost") == "name 1"
+        assert client.room_state.statistics.hits == 1
+
+    @testmethod
+    def T_logout_clears_room_state(self):
+        # arrange
+        client = pymatrix.client.ClientFactory.get_client(
+            pymatrix.api.RestApi(backend=FakeBackend(matrix_handler)))
+        asyncio.get_event_loop().run_until_complete(
+            client.login("user", "password"))
+        asyncio.get_event_loop().run_until_complete(self._read(client, 1))
+
+        # act
+        asyncio.get_event_loop().run_until_complete(client.logout())
+
+        # assert
+        assert client.room_state.get_room_name("!a:localhost") is None
+        assert len(client.room_state) == 0
+
+    @testmethod
+    def T_read_events_offloads_large_sync_responses(self):
+        # arrange
+        api = pymatrix.api.RestApi(backend=FakeBackend(matrix_handler),
+            offload_threshold=0)
+        client = pymatrix.client.ClientFactory.get_client(api)
+
+        # act
+        responses = asyncio.get_event_loop().run_until_complete(
+            self._read(client, 2))
+
+        # assert
+        assert [response.next_batch for response in responses] == \
+            ["s1", "s2"]
+        # each response is decoded, then deserialised
+        assert api.offloaded_count == 4
@@ -0,0 +1,72 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+import pymatrix.coalescing
+import asyncio
+
+class SingleFlightTests(TestClassBase):
+
+    def test_method_init(self):
+        self.single_flight = pymatrix.coalescing.SingleFlight()
+        self.nb_calls = 0
+
+    async def _call(self, result):
+        self.nb_calls += 1
+        await asyncio.sleep(0.01)
+        if(isinstance(result, Exception)):
+            raise result
+        return result
+
+    @testmethod
+    def T_do_coalesces_concurrent_calls_with_same_key(self):
+        # act
+        results = asyncio.get_event_loop().run_until_complete(asyncio.gather(
+            *[self.single_flight.do(key, lambda key=key: self._call(key))
+                for key in ["a", "a", "b", "a"]]))
+
+        # assert
+        assert results == ["a", "a", "b", "a"]
+        assert self.nb_calls == 2
+        assert self.single_flight.statistics.as_dict() == \
+            {"calls": 4, "coalesced": 2}
+        assert not self.single_flight.is_in_flight("a")
+
+    @testmethod
+    def T_do_calls_again_once_completed(self):
+        # act
+        for i in range(0, 2):
+            asyncio.get_event_loop().run_until_complete(
+                self.single_flight.do("a", lambda: self._call("a")))
+
+        # assert
+        assert self.nb_calls == 2
+        assert self.single_flight.statistics.coalesced == 0
+
+    @testmethod
+    def T_do_raises_exception_to_every_caller(self):
+        # act
+        results = asyncio.get_event_loop().run_until_complete(asyncio.gather(
+            *[self.single_flight.do("a",
+                lambda: self._call(ValueError("failed"))) for i in range(0, 3)],
+            return_exceptions=True))
+
+        # assert
+        assert self.nb_calls == 1
+        assert all(isinstance(result, ValueError) for result in results)
+
+    @testmethod
+    def T_cancelled_caller_does_not_cancel_others(self):
+        # arrange
+        async def run():
+            first = asyncio.ensure_future(
+                self.single_flight.do("a", lambda: self._call("a")))
+            second = asyncio.ensure_future(
+                self.single_flight.do("a", lambda: self._call("a")))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        # act
+        result = asyncio.get_event_loop().run_until_complete(run())
+
+        # assert
+        assert result == "a"
+        assert self.nb_calls == 1
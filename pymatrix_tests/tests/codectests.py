@@ -0,0 +1,215 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.framework.asserts import Assert
+import pymatrix.codec
+import pymatrix.error
+import pymatrix.serialisation
+
+def get_available_engines():
+    return [engine for engine in pymatrix.codec.JsonEngineEnum
+        if pymatrix.codec.is_engine_available(engine)]
+
+class CodecTests(TestClassBase):
+
+    @testmethod
+    def T_get_codec_no_engine_return_codec(self):
+        # act
+        codec = pymatrix.codec.get_codec()
+
+        # assert
+        assert isinstance(codec, pymatrix.codec.CodecBase)
+
+    @testmethod
+    def T_encode_all_engines_return_identical_bytes(self):
+        # arrange
+        data = {"user_id": "@local_username:localhost", "count": 2,
+            "list": [1.5, True, None], "url": "https://matrix.org/é"}
+        expected = pymatrix.codec.get_codec(
+            pymatrix.codec.JsonEngineEnum.Stdlib).encode(data)
+
+        for engine in get_available_engines():
+            # act
+            encoded = pymatrix.codec.get_codec(engine).encode(data)
+
+            # assert
+            assert isinstance(encoded, bytes)
+            assert encoded == expected
+
+    @testmethod
+    def T_decode_all_engines_return_primitives(self):
+        # arrange
+        raw_data = "{\"user_id\": \"@me:localhost\", \"list\": [1, null]}" \
+            .encode("utf-8")
+        expected = {"user_id": "@me:localhost", "list": [1, None]}
+
+        for engine in get_available_engines():
+            codec = pymatrix.codec.get_codec(engine)
+
+            # act & assert
+            assert codec.decode(raw_data) == expected
+            assert codec.decode(memoryview(raw_data)) == expected
+
+    @testmethod
+    def T_decode_empty_payload_return_None(self):
+        for engine in get_available_engines():
+            # act
+            decoded = pymatrix.codec.get_codec(engine).decode(b"")
+
+            # assert
+            assert decoded is None
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_get_codec_engine_not_installed_throw(self):
+        # arrange
+        engine = pymatrix.codec.JsonEngineEnum.Orjson
+        saved_engines = dict(pymatrix.codec._engines)
+        pymatrix.codec._engines[engine] = (None, pymatrix.codec.OrjsonCodec)
+
+        # act
+        try:
+            pymatrix.codec.get_codec(engine)
+        finally:
+            pymatrix.codec._engines.update(saved_engines)
+
+class SerialiserCodecTests(TestClassBase):
+
+    def test_method_init(self):
+        self._serialiser = pymatrix.serialisation.JsonSerialiser(
+            codec=pymatrix.codec.get_codec(
+                pymatrix.codec.JsonEngineEnum.Stdlib))
+
+    @testmethod
+    def T_dumps_object_return_bytes(self):
+        # arrange
+        class CustomType:
+            @pymatrix.serialisation.serialisable
+            def int_field(self): return 1
+            @pymatrix.serialisation.serialisable
+            def string_field(self): return "one"
+
+        # act
+        dumped = self._serialiser.dumps(CustomType())
+
+        # assert
+        assert dumped == b'{"int_field":1,"string_field":"one"}'
+
+    @testmethod
+    def T_dumps_nothing_to_serialise_return_None(self):
+        # arrange
+        class CustomType: pass
+
+        # act
+        dumped = self._serialiser.dumps(CustomType())
+
+        # assert
+        assert dumped is None
+
+    @testmethod
+    def T_loads_bytes_return_object(self):
+        # arrange
+        class FlatType:
+            @pymatrix.serialisation.serialisable
+            def member_one(self): return self._member_one
+            @member_one.setter
+            def member_one(self, value): self._member_one = value
+
+        # act
+        obj = self._serialiser.loads(b'{"member_one": 1}', FlatType)
+
+        # assert
+        assert isinstance(obj, FlatType)
+        assert obj.member_one == 1
+
+class IncrementalJsonDecoderTests(TestClassBase):
+
+    sync_json = ("{\"next_batch\": \"s72595_4483_1934\", \"rooms\": {"
+        "\"join\": {\"!a:localhost\": {\"timeline\": {\"events\": [{\"type\":"
+        " \"m.room.message\", \"content\": {\"body\": \"a \\\"}]\\\\ [\"}}]}},"
+        " \"!b:localhost\": {}}, \"leave\": {}}, \"presence\": {\"events\": "
+        "[]}, \"full\": true, \"nothing\": null, \"count\": -1.5e3}") \
+        .encode("utf-8")
+
+    def _decode(self, raw_data, chunk_size, expand_paths=()):
+        decoder = pymatrix.codec.IncrementalJsonDecoder(expand_paths)
+        sections = []
+        for index in range(0, len(raw_data), chunk_size):
+            sections.extend(decoder.feed(raw_data[index:index + chunk_size]))
+        sections.extend(decoder.close())
+        return sections
+
+    @testmethod
+    def T_decode_no_expand_path_return_top_level_members(self):
+        # act
+        sections = self._decode(self.sync_json, 4096)
+
+        # assert
+        assert [path for path, value in sections] == [("next_batch",),
+            ("rooms",), ("presence",), ("full",), ("nothing",), ("count",)]
+        assert dict((path[0], value) for path, value in sections) == \
+            pymatrix.codec.get_codec().decode(self.sync_json)
+
+    @testmethod
+    def T_decode_expand_path_return_nested_members(self):
+        # arrange
+        expected = pymatrix.codec.get_codec().decode(self.sync_json)
+
+        # act
+        sections = self._decode(self.sync_json, 4096, [("rooms", "join")])
+
+        # assert
+        assert [path for path, value in sections][:4] == [("next_batch",),
+            ("rooms", "join", "!a:localhost"),
+            ("rooms", "join", "!b:localhost"), ("rooms", "leave")]
+        assert sections[1][1] == expected["rooms"]["join"]["!a:localhost"]
+
+    @testmethod
+    def T_decode_any_chunk_size_return_same_sections(self):
+        # arrange
+        expected = self._decode(self.sync_json, 4096, [("rooms", "join")])
+
+        for chunk_size in [1, 2, 3, 7, 64]:
+            # act
+            sections = self._decode(self.sync_json, chunk_size,
+                [("rooms", "join")])
+
+            # assert
+            assert sections == expected
+
+    @testmethod
+    def T_decode_expanded_array_return_items(self):
+        # act
+        sections = self._decode(b"[1, \"two\", {\"three\": 3}]", 2, [()])
+
+        # assert
+        assert sections == [((0,), 1), ((1,), "two"), ((2,), {"three": 3})]
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_decode_truncated_document_throw(self):
+        # act
+        self._decode(self.sync_json[:-10], 4096)
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_decode_trailing_data_throw(self):
+        # act
+        self._decode(b"{\"a\": 1} {", 4096)
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_decode_member_without_value_throw(self):
+        # act
+        self._decode(b"{\"a\":}", 4096)
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_decode_trailing_comma_in_expanded_array_throw(self):
+        # act
+        self._decode(b"[1,]", 4096, [()])
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_decode_expanded_member_without_value_throw(self):
+        # act
+        self._decode(b"{\"rooms\":{\"join\":{\"!r\":}}}", 4096,
+            [("rooms", "join")])
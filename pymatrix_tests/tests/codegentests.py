@@ -0,0 +1,206 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.framework.asserts import Assert
+import pymatrix.codegen
+import pymatrix.error
+import pymatrix.serialisation
+import pymatrix.specification.base
+import pymatrix.specification.r0.login
+import json
+
+class CodegenTests(TestClassBase):
+
+    @testmethod
+    def T_getter_backing_attribute_simple_getter_return_name(self):
+        # arrange
+        def getter(self): return self._member
+
+        # act
+        attribute = pymatrix.codegen.get_getter_backing_attribute(getter)
+
+        # assert
+        assert attribute == "_member"
+
+    @testmethod
+    def T_getter_backing_attribute_computed_getter_return_None(self):
+        # arrange
+        def getter(self): return self._member + 1
+
+        # act
+        attribute = pymatrix.codegen.get_getter_backing_attribute(getter)
+
+        # assert
+        assert attribute is None
+
+    @testmethod
+    def T_setter_backing_attribute_simple_setter_return_name(self):
+        # arrange
+        def setter(self, value): self._member = value
+
+        # act
+        attribute = pymatrix.codegen.get_setter_backing_attribute(setter)
+
+        # assert
+        assert attribute == "_member"
+
+    @testmethod
+    def T_setter_backing_attribute_validating_setter_return_None(self):
+        # arrange
+        def setter(self, value): self._member = int(value)
+
+        # act
+        attribute = pymatrix.codegen.get_setter_backing_attribute(setter)
+
+        # assert
+        assert attribute is None
+
+    @testmethod
+    def T_make_decoder_readonly_member_return_None(self):
+        # arrange
+        class CustomType:
+            @pymatrix.serialisation.serialisable
+            def int_member(self): return 123
+        plan = pymatrix.serialisation.get_serialisation_plan(CustomType)
+
+        # act
+        decoder = pymatrix.codegen.make_decoder(plan)
+
+        # assert
+        assert decoder is None
+
+class GeneratedJsonSerialiserTests(TestClassBase):
+    """
+    The generated code path must give results identical to the generic one
+    """
+
+    def test_method_init(self):
+        self._serialiser = pymatrix.serialisation.JsonSerialiser()
+        self._generated_serialiser = pymatrix.serialisation.JsonSerialiser(
+            generate_code=True)
+
+    def _assert_identical_serialisation(self, obj):
+        expected = json.dumps(self._serialiser.serialise(obj))
+        generated = json.dumps(self._generated_serialiser.serialise(obj))
+        assert generated == expected
+
+    @testmethod
+    def T_serialise_login_request_identical_to_generic(self):
+        # arrange
+        request = pymatrix.specification.r0.login.LoginRequestMessage(
+            user="local_username", password="correct_password",
+            device_id="DEVICE123")
+
+        # act & assert
+        self._assert_identical_serialisation(request)
+
+    @testmethod
+    def T_serialise_error_message_identical_to_generic(self):
+        # arrange
+        error = pymatrix.specification.base.ErrorMessageBase(
+            errcode="M_FORBIDDEN", error="Forbidden")
+
+        # act & assert
+        self._assert_identical_serialisation(error)
+
+    @testmethod
+    def T_serialise_complex_object_identical_to_generic(self):
+        # arrange
+        class CustomEndType:
+            @pymatrix.serialisation.serialisable
+            def this_member(self): return 0
+        class CustomSubType:
+            def __init__(self): self._collection = ["string 1", "string 2"]
+            @pymatrix.serialisation.serialisable
+            def sub_int_member(self): return 456
+            @pymatrix.serialisation.serialisable
+            def collection_strings(self): return self._collection
+            @pymatrix.serialisation.serialisable
+            def dict_member(self): return {"key": CustomEndType()}
+            @pymatrix.serialisation.serialisable
+            def null_member(self): return None
+        class CustomType:
+            @pymatrix.serialisation.serialisable
+            def int_field(self): return 1
+            @pymatrix.serialisation.serialisable
+            def other_field(self): return [CustomSubType(), CustomSubType()]
+            @pymatrix.serialisation.serialisable
+            def empty_field(self): return object()
+
+        # act & assert
+        self._assert_identical_serialisation(CustomType())
+
+    @testmethod
+    def T_deserialise_login_response_identical_to_generic(self):
+        # arrange
+        response_json = {"user_id": "@local_username:localhost",
+            "access_token": "ABCDE123456", "home_server": "localhost",
+            "device_id": "DEVICE123"}
+        response_type = pymatrix.specification.r0.login.LoginResponseMessage
+
+        # act
+        expected = self._serialiser.deserialise(response_json, response_type)
+        generated = self._generated_serialiser.deserialise(response_json,
+            response_type)
+
+        # assert
+        assert isinstance(generated, response_type)
+        assert json.dumps(self._serialiser.serialise(generated)) == \
+            json.dumps(self._serialiser.serialise(expected))
+
+    @testmethod
+    def T_deserialise_complex_json_return_complex_object(self):
+        # arrange
+        complex_json = {"member_one": 1,
+            "member_two": [{"sub_member": "abc"}, {"sub_member": "def"}]}
+        class SubType:
+            @pymatrix.serialisation.serialisable
+            def sub_member(self): return self._sub_member
+            @sub_member.setter
+            def sub_member(self, value): self._sub_member = value
+        class ComplexType:
+            @pymatrix.serialisation.serialisable
+            def member_one(self): return self._member_one
+            @member_one.setter
+            def member_one(self, value): self._member_one = str(value)
+            @pymatrix.serialisation.serialisable(SubType)
+            def member_two(self): return self._member_two
+            @member_two.setter
+            def member_two(self, value): self._member_two = value
+
+        # act
+        obj = self._generated_serialiser.deserialise(complex_json,
+            ComplexType)
+
+        # assert
+        assert isinstance(obj, ComplexType)
+        assert obj.member_one == "1"
+        assert [sub.sub_member for sub in obj.member_two] == ["abc", "def"]
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_deserialise_unknown_member_throw(self):
+        # arrange
+        flat_json = {"member_one": 1, "member_two": "two"}
+        class FlatType:
+            @pymatrix.serialisation.serialisable
+            def member_one(self): return self._member_one
+            @member_one.setter
+            def member_one(self, value): self._member_one = value
+
+        # act
+        obj = self._generated_serialiser.deserialise(flat_json, FlatType)
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_deserialise_readonly_member_falls_back_and_throw(self):
+        # arrange
+        flat_json = {"member_one": 1, "member_two": "two"}
+        class FlatType:
+            @pymatrix.serialisation.serialisable
+            def member_one(self): return self._member_one
+            @member_one.setter
+            def member_one(self, value): self._member_one = value
+            @pymatrix.serialisation.serialisable
+            def member_two(self): return self._member_two
+
+        # act
+        obj = self._generated_serialiser.deserialise(flat_json, FlatType)
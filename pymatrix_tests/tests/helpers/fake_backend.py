@@ -0,0 +1,49 @@
+import pymatrix.backend.base
+import pymatrix.backend.http
+import asyncio
+import inspect
+
+class FakeBackend(pymatrix.backend.base.BackendBase):
+    """
+    An in-process backend answering every message through a handler, for
+    exercising the API layer without a server. The handler receives the
+    message and returns a (status, body bytes) tuple.
+    """
+
+    def __init__(self, handler, delay=0):
+        self.handler = handler
+        self.delay = delay
+        self.messages = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def connect(self, hostname, port):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def write_event(self, message, raw=False):
+        self.messages.append(message)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            status, body = self.handler(message)
+        finally:
+            self.in_flight -= 1
+        if(raw):
+            return pymatrix.backend.http.RawResponse(body, status,
+                ((b"Content-Type", b"application/json"),))
+        return pymatrix.backend.http.Response(body, status >= 400, status)
+
+    async def read_events(self, next_message):
+        message = next_message(None)
+        if(inspect.isawaitable(message)):
+            message = await message
+        while(message is not None):
+            response = await self.write_event(message)
+            message = next_message(response)
+            if(inspect.isawaitable(message)):
+                message = await message
+            yield response
@@ -0,0 +1,137 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.framework.asserts import Assert
+import pymatrix.error
+import pymatrix.serialisation
+import pymatrix.specification.r0.sync
+import pickle
+
+class LazyJsonSerialiserTests(TestClassBase):
+
+    def test_method_init(self):
+        self._serialiser = pymatrix.serialisation.JsonSerialiser(lazy=True)
+        self.nb_sub_objects = 0
+        test = self
+
+        class SubType:
+            def __init__(self): test.nb_sub_objects += 1
+            @pymatrix.serialisation.serialisable
+            def sub_member(self): return self._sub_member
+            @sub_member.setter
+            def sub_member(self, value): self._sub_member = value
+        @pymatrix.serialisation.serialisable_class(slots=True)
+        class ComplexType:
+            @pymatrix.serialisation.serialisable
+            def member_one(self): return self._member_one
+            @member_one.setter
+            def member_one(self, value): self._member_one = value
+            @pymatrix.serialisation.serialisable(SubType)
+            def member_two(self): return self._member_two
+            @member_two.setter
+            def member_two(self, value): self._member_two = value
+            @pymatrix.serialisation.serialisable(SubType)
+            def member_list(self): return self._member_list
+            @member_list.setter
+            def member_list(self, value): self._member_list = value
+
+        self.sub_type = SubType
+        self.complex_type = ComplexType
+        self.complex_json = {"member_one": 1,
+            "member_two": {"sub_member": "abc"},
+            "member_list": [{"sub_member": "d"}, {"sub_member": "e"}]}
+
+    @testmethod
+    def T_deserialise_lazy_nested_objects_not_built_until_read(self):
+        # act
+        obj = self._serialiser.deserialise(self.complex_json,
+            self.complex_type)
+
+        # assert
+        assert isinstance(obj, self.complex_type)
+        assert obj.member_one == 1
+        assert self.nb_sub_objects == 0
+
+    @testmethod
+    def T_deserialise_lazy_nested_object_built_once_on_read(self):
+        # arrange
+        obj = self._serialiser.deserialise(self.complex_json,
+            self.complex_type)
+
+        # act
+        first_read = obj.member_two
+        second_read = obj.member_two
+
+        # assert
+        assert isinstance(first_read, self.sub_type)
+        assert first_read.sub_member == "abc"
+        assert first_read is second_read
+        assert self.nb_sub_objects == 1
+
+    @testmethod
+    def T_deserialise_lazy_set_member_discards_raw_value(self):
+        # arrange
+        obj = self._serialiser.deserialise(self.complex_json,
+            self.complex_type)
+
+        # act
+        obj.member_two = None
+
+        # assert
+        assert obj.member_two is None
+        assert self.nb_sub_objects == 0
+
+    @testmethod
+    def T_serialise_lazy_object_same_as_source(self):
+        # arrange
+        obj = self._serialiser.deserialise(self.complex_json,
+            self.complex_type)
+
+        # act
+        serialised = pymatrix.serialisation.JsonSerialiser().serialise(obj)
+
+        # assert
+        assert serialised == self.complex_json
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
+    def T_deserialise_lazy_unknown_member_throw(self):
+        # arrange
+        self.complex_json["unknown"] = 1
+
+        # act
+        self._serialiser.deserialise(self.complex_json, self.complex_type)
+
+    @testmethod
+    def T_deserialise_lazy_failed_read_raises_again(self):
+        # arrange
+        self.complex_json["member_two"] = {"unknown": 1}
+        obj = self._serialiser.deserialise(self.complex_json,
+            self.complex_type)
+        errors = []
+
+        # act
+        for i in range(0, 2):
+            try:
+                obj.member_two
+            except pymatrix.error.SerialisationError as se:
+                errors.append(se)
+
+        # assert
+        assert len(errors) == 2
+
+    @testmethod
+    def T_pickle_lazy_object_return_base_type(self):
+        # arrange
+        sync_type = pymatrix.specification.r0.sync.SyncResponseMessage
+        obj = self._serialiser.deserialise({"next_batch": "s1",
+            "rooms": {"join": {"!a:localhost": {}}},
+            "presence": {"events": [{"type": "m.presence"}]}}, sync_type)
+
+        # act
+        copy = pickle.loads(pickle.dumps(obj))
+
+        # assert
+        assert type(copy) is sync_type
+        assert copy.next_batch == "s1"
+        assert copy.rooms.join == {"!a:localhost": {}}
+        assert copy.presence.events == [{"type": "m.presence"}]
+        assert copy.account_data is None
@@ -0,0 +1,62 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+import pymatrix.api
+import pymatrix.injection
+import pymatrix.lazy
+import subprocess
+import sys
+
+def run_fresh(code):
+    """Runs code in a fresh interpreter and returns what it printed"""
+    return subprocess.run([sys.executable, "-c", code], capture_output=True,
+        text=True, check=True).stdout.split()
+
+class LazyImportTests(TestClassBase):
+
+    @testmethod
+    def T_importing_client_does_not_load_aiohttp(self):
+        # act
+        output = run_fresh("import sys, pymatrix.client, pymatrix.injection; "
+            "print('aiohttp.client' in sys.modules)")
+
+        # assert
+        assert output == ["False"]
+
+    @testmethod
+    def T_lazy_module_is_loaded_on_first_attribute_read(self):
+        # act
+        output = run_fresh("import sys, pymatrix.lazy; "
+            "module = pymatrix.lazy.lazy_import('json.tool'); "
+            "import json; "
+            "print('argparse' in sys.modules, json.tool is module); "
+            "module.main; "
+            "print('argparse' in sys.modules)")
+
+        # assert
+        assert output == ["False", "True", "True"]
+
+    @testmethod
+    def T_lazy_import_of_missing_module_raises(self):
+        # act
+        try:
+            pymatrix.lazy.lazy_import("pymatrix.missing_module")
+            raised = False
+        except ModuleNotFoundError:
+            raised = True
+
+        # assert
+        assert raised
+
+    @testmethod
+    def T_injection_resolves_default_types_on_first_use(self):
+        # act
+        api_type = pymatrix.injection.DEFAULT_API_TYPE
+        try:
+            pymatrix.injection.DEFAULT_MISSING_TYPE
+            raised = False
+        except AttributeError:
+            raised = True
+
+        # assert
+        assert api_type is pymatrix.api.RestApi
+        assert "DEFAULT_API_TYPE" in vars(pymatrix.injection)
+        assert raised
@@ -0,0 +1,237 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.tests.helpers.fake_backend import FakeBackend
+import pymatrix.api
+import pymatrix.backend.http
+import pymatrix.constants
+import pymatrix.metrics
+import asyncio
+import json
+import types
+import urllib.request
+
+def login_handler(message):
+    user = json.loads(message.body)["user"]
+    if(user == "wrong_user"):
+        return (403, b'{"errcode": "M_FORBIDDEN", "error": "Forbidden"}')
+    return (200, json.dumps({"user_id": "@{}:localhost".format(user),
+        "access_token": "token_{}".format(user)}).encode("utf-8"))
+
+class FakeMetric:
+    def __init__(self, name, documentation, type):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self.samples = []
+
+    def add_sample(self, name, labels, value):
+        self.samples.append((name, labels, value))
+
+class FakeRegistry:
+    def __init__(self):
+        self.collectors = []
+
+    def register(self, collector):
+        self.collectors.append(collector)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class ClientMetricsTests(TestClassBase):
+
+    def test_method_init(self):
+        self.clock = FakeClock()
+        self.metrics = pymatrix.metrics.ClientMetrics(
+            latency_buckets=(0.5, 10.0), clock=self.clock)
+        self.api = pymatrix.api.RestApi(backend=FakeBackend(login_handler),
+            metrics=self.metrics)
+
+    def _login(self, user):
+        return asyncio.get_event_loop().run_until_complete(
+            self.api.generic_call(pymatrix.constants.EndpointNamesEnum.Login,
+                user=user, password="password"))
+
+    @testmethod
+    def T_generic_call_counts_requests_by_endpoint_and_status(self):
+        # act
+        self._login("user_1")
+        self._login("user_2")
+        self._login("wrong_user")
+
+        # assert
+        lines = self.metrics.render().splitlines()
+        assert "# TYPE pymatrix_requests_total counter" in lines
+        assert 'pymatrix_requests_total{endpoint="Login",status="200"} 2' \
+            in lines
+        assert 'pymatrix_requests_total{endpoint="Login",status="403"} 1' \
+            in lines
+        assert 'pymatrix_errors_total{endpoint="Login",errcode="M_FORBIDDEN"}' \
+            ' 1' in lines
+        assert 'pymatrix_requests_in_flight{endpoint="Login"} 0' in lines
+
+    @testmethod
+    def T_generic_call_raw_counts_requests(self):
+        # act
+        response = asyncio.get_event_loop().run_until_complete(
+            self.api.generic_call_raw(
+                pymatrix.constants.EndpointNamesEnum.Login,
+                user="wrong_user", password="password"))
+
+        # assert
+        lines = self.metrics.render().splitlines()
+        assert response.status == 403
+        assert 'pymatrix_requests_total{endpoint="Login",status="403"} 1' \
+            in lines
+        assert 'pymatrix_request_duration_seconds_count{endpoint="Login"} 1' \
+            in lines
+        assert 'pymatrix_requests_in_flight{endpoint="Login"} 0' in lines
+
+    @testmethod
+    def T_latency_histogram_is_cumulative(self):
+        # arrange
+        self.metrics._request_started("Sync")
+        self.metrics._request_started("Sync")
+
+        # act
+        self.metrics._request_finished("Sync", 200, 0.1)
+        self.metrics._request_finished("Sync", None, 2.0)
+
+        # assert
+        lines = self.metrics.render().splitlines()
+        assert 'pymatrix_request_duration_seconds_bucket{endpoint="Sync",' \
+            'le="0.5"} 1' in lines
+        assert 'pymatrix_request_duration_seconds_bucket{endpoint="Sync",' \
+            'le="10.0"} 2' in lines
+        assert 'pymatrix_request_duration_seconds_bucket{endpoint="Sync",' \
+            'le="+Inf"} 2' in lines
+        assert 'pymatrix_request_duration_seconds_count{endpoint="Sync"} 2' \
+            in lines
+        assert 'pymatrix_requests_total{endpoint="Sync",status="exception"}' \
+            ' 1' in lines
+
+    @testmethod
+    def T_sync_lag_and_pool_usage_are_read_when_collected(self):
+        # arrange
+        self.metrics.add_pool(pymatrix.backend.http.PoolStatistics(), "main")
+        self.metrics._record_sync(200)
+
+        # act
+        self.clock.now = 12.5
+        lines = self.metrics.render().splitlines()
+
+        # assert
+        assert "pymatrix_sync_lag_seconds 12.5" in lines
+        assert 'pymatrix_sync_batches_total{outcome="success"} 1' in lines
+        assert 'pymatrix_pool_connections{pool="main",state="idle"} 0' \
+            in lines
+        assert 'pymatrix_pool_connections_created_total{pool="main"} 0' \
+            in lines
+
+    @testmethod
+    def T_sync_errors_are_counted_by_errcode(self):
+        # arrange
+        api = pymatrix.api.RestApi(backend=FakeBackend(lambda message:
+            (401, b'{"errcode": "M_UNKNOWN_TOKEN", "error": "Unknown"}')),
+            metrics=self.metrics)
+
+        async def read_events():
+            return [response async for response in api.read_events()]
+
+        # act
+        asyncio.get_event_loop().run_until_complete(read_events())
+
+        # assert
+        lines = self.metrics.render().splitlines()
+        assert 'pymatrix_errors_total{endpoint="Sync",' \
+            'errcode="M_UNKNOWN_TOKEN"} 1' in lines
+        assert 'pymatrix_sync_batches_total{outcome="error"} 1' in lines
+
+    @testmethod
+    def T_register_and_push_export_every_family(self):
+        # arrange
+        pushed = []
+        default_registry = FakeRegistry()
+        fake_client = types.SimpleNamespace(REGISTRY=default_registry,
+            CollectorRegistry=FakeRegistry,
+            push_to_gateway=lambda gateway, job, registry, **kwargs:
+                pushed.append((gateway, job, registry, kwargs)),
+            core=types.SimpleNamespace(Metric=FakeMetric))
+        prometheus_client = pymatrix.metrics.prometheus_client
+        pymatrix.metrics.prometheus_client = fake_client
+        self._login("wrong_user")
+
+        # act
+        try:
+            collector = self.metrics.register()
+            self.metrics.push("localhost:9091", "job", timeout=5)
+            metrics = dict((metric.name, metric)
+                for metric in collector.collect())
+        finally:
+            pymatrix.metrics.prometheus_client = prometheus_client
+
+        # assert
+        assert default_registry.collectors == [collector]
+        assert metrics["pymatrix_errors"].type == "counter"
+        assert ("pymatrix_errors_total",
+            {"endpoint": "Login", "errcode": "M_FORBIDDEN"}, 1) \
+            in metrics["pymatrix_errors"].samples
+        assert set(metrics) == set(family.name
+            for family in self.metrics.collect())
+        gateway, job, registry, kwargs = pushed[0]
+        assert (gateway, job, kwargs) == ("localhost:9091", "job",
+            {"timeout": 5})
+        assert len(registry.collectors) == 1
+
+    @testmethod
+    def T_register_without_prometheus_client_throw(self):
+        # arrange
+        prometheus_client = pymatrix.metrics.prometheus_client
+        pymatrix.metrics.prometheus_client = None
+        errors = []
+
+        # act
+        try:
+            for export in [self.metrics.register,
+                lambda: self.metrics.push("localhost:9091", "job")]:
+                try:
+                    export()
+                except pymatrix.metrics.MetricsError as me:
+                    errors.append(me)
+        finally:
+            pymatrix.metrics.prometheus_client = prometheus_client
+
+        # assert
+        assert len(errors) == 2
+
+    @testmethod
+    def T_label_values_are_escaped(self):
+        # act
+        self.metrics._record_errcode("Login", 'M_"ODD"\n')
+
+        # assert
+        assert 'pymatrix_errors_total{endpoint="Login",' \
+            'errcode="M_\\"ODD\\"\\n"} 1' in self.metrics.render()
+
+    @testmethod
+    def T_metrics_server_serves_text_exposition(self):
+        # arrange
+        self._login("user_1")
+        server = pymatrix.metrics.MetricsServer(self.metrics, port=0)
+        server.start()
+
+        # act
+        try:
+            with urllib.request.urlopen("http://localhost:{}/metrics".format(
+                server.port)) as response:
+                content_type = response.headers["Content-Type"]
+                body = response.read().decode("utf-8")
+        finally:
+            server.stop()
+
+        # assert
+        assert content_type == pymatrix.metrics.CONTENT_TYPE
+        assert body == self.metrics.render()
+        assert not server.running
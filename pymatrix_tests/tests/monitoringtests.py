@@ -0,0 +1,29 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+import pymatrix.monitoring
+import asyncio
+import time
+
+class LoopLagMonitorTests(TestClassBase):
+
+    @testmethod
+    def T_monitor_measures_blocked_loop(self):
+        # arrange
+        monitor = pymatrix.monitoring.LoopLagMonitor(interval=0.01)
+
+        async def run():
+            monitor.start()
+            await asyncio.sleep(0.03)
+            time.sleep(0.05) # blocks the loop
+            await asyncio.sleep(0.03)
+            await monitor.stop()
+
+        # act
+        asyncio.get_event_loop().run_until_complete(run())
+
+        # assert
+        statistics = monitor.statistics.as_dict()
+        assert statistics["samples"] >= 2
+        assert statistics["lag_max"] >= 0.03
+        assert statistics["buckets"][1.0] == statistics["samples"]
+        assert statistics["buckets"][0.01] < statistics["samples"]
+        assert not monitor.running
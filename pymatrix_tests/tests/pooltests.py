@@ -0,0 +1,106 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.tests.clienttests import matrix_handler
+from pymatrix_tests.tests.helpers.fake_backend import FakeBackend
+import pymatrix.api
+import pymatrix.client
+import pymatrix.pool
+import asyncio
+
+def failing_handler(message):
+    raise ConnectionError("connection lost")
+
+class ClientPoolTests(TestClassBase):
+
+    def test_method_init(self):
+        self.pool = pymatrix.pool.ClientPool()
+
+    def test_method_cleanup(self):
+        asyncio.get_event_loop().run_until_complete(self.pool.close())
+
+    def _add_fake_client(self, account_id, handler):
+        return self.pool.add_client(account_id, pymatrix.client.Client(
+            pymatrix.api.RestApi(backend=FakeBackend(handler, delay=0.001))))
+
+    async def _read(self, nb_responses):
+        responses = []
+        events = self.pool.read_events()
+        try:
+            async for account_id, response in events:
+                responses.append((account_id, response))
+                if(len(responses) == nb_responses):
+                    break
+        finally:
+            await events.aclose()
+        return responses
+
+    @testmethod
+    def T_created_clients_share_resources(self):
+        # act
+        first = asyncio.get_event_loop().run_until_complete(
+            self.pool.create_client("first", "localhost", 49993))
+        second = asyncio.get_event_loop().run_until_complete(
+            self.pool.create_client("second", "localhost", 49993))
+        connector = first.api.backend._session.connector
+        asyncio.get_event_loop().run_until_complete(
+            self.pool.remove_client("first"))
+
+        # assert
+        assert second.api.backend._session.connector is connector
+        assert second.api._serialiser is first.api._serialiser
+        assert second.api._specification is first.api._specification
+        assert not connector.closed
+        assert "first" not in self.pool
+        assert len(self.pool) == 1
+
+    @testmethod
+    def T_read_events_multiplexes_accounts(self):
+        # arrange
+        for account_id in ["a", "b", "c"]:
+            self._add_fake_client(account_id, matrix_handler)
+
+        # act
+        responses = asyncio.get_event_loop().run_until_complete(
+            self._read(9))
+
+        # assert
+        assert sorted(set(account_id for account_id, response
+            in responses)) == ["a", "b", "c"]
+        usage = self.pool.get_usage()
+        assert sum(usage[account_id]["sync_responses"]
+            for account_id in ["a", "b", "c"]) >= 9
+        assert usage["a"]["rooms_cached"] == 1
+        assert usage[None]["accounts"] == 3
+
+    @testmethod
+    def T_read_events_failing_account_does_not_stop_others(self):
+        # arrange
+        self._add_fake_client("a", matrix_handler)
+        self._add_fake_client("failing", failing_handler)
+
+        # act
+        responses = asyncio.get_event_loop().run_until_complete(
+            self._read(4))
+
+        # assert
+        failures = [response for account_id, response in responses
+            if account_id == "failing"]
+        assert len(failures) == 1
+        assert isinstance(failures[0], ConnectionError)
+        assert [account_id for account_id, response in responses].count("a") \
+            == 3
+        assert self.pool.get_usage()["failing"]["sync_errors"] == 1
+
+    @testmethod
+    def T_add_client_twice_raises(self):
+        # arrange
+        self._add_fake_client("a", matrix_handler)
+
+        # act
+        try:
+            self._add_fake_client("a", matrix_handler)
+            raised = False
+        except pymatrix.pool.ClientPoolError:
+            raised = True
+
+        # assert
+        assert raised
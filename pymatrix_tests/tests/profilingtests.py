@@ -0,0 +1,186 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.tests.clienttests import matrix_handler
+from pymatrix_tests.tests.helpers.fake_backend import FakeBackend
+import pymatrix.api
+import pymatrix.client
+import pymatrix.profiling
+import pymatrix.tracing
+import asyncio
+import os
+import pstats
+import tempfile
+import time
+
+def block_loop(duration):
+    time.sleep(duration)
+
+def busy_work():
+    return sum(range(0, 10000))
+
+class FailingBackend(FakeBackend):
+    async def connect(self, hostname, port):
+        raise OSError("connection refused")
+
+    async def disconnect(self):
+        raise OSError("connection reset")
+
+class ProfilerTests(TestClassBase):
+
+    @testmethod
+    def T_profiler_records_stack_of_code_blocking_loop(self):
+        # arrange
+        profiler = pymatrix.profiling.Profiler(
+            pymatrix.profiling.ProfilingOptions(lag_interval=0.01,
+                slow_callback_threshold=0.05, report_interval=None))
+
+        async def run():
+            profiler.start()
+            await asyncio.sleep(0.03)
+            block_loop(0.2)
+            await asyncio.sleep(0.05)
+            await profiler.stop()
+
+        # act
+        asyncio.get_event_loop().run_until_complete(run())
+
+        # assert
+        report = profiler.report()
+        assert len(report.slow_callbacks) == 1
+        slow_callback = report.slow_callbacks[0]
+        assert slow_callback.duration >= 0.1
+        assert any("block_loop" in frame for frame in slow_callback.stack)
+        assert report.loop_lag["lag_max"] >= 0.1
+        assert "block_loop" in report.format()
+        assert not profiler.running
+
+    @testmethod
+    def T_client_profiling_splits_serialisation_from_io(self):
+        # arrange
+        reports = []
+        client = pymatrix.client.ClientFactory.get_client(
+            pymatrix.api.RestApi(backend=FakeBackend(matrix_handler,
+                delay=0.01)),
+            profiling=pymatrix.profiling.ProfilingOptions(
+                report_interval=0.05, on_report=reports.append))
+
+        async def run():
+            await client.connect("localhost")
+            for i in range(0, 3):
+                await client.login("user", "password")
+            await asyncio.sleep(0.1)
+            report = client.profiler.report()
+            await client.logout()
+            return report
+
+        # act
+        report = asyncio.get_event_loop().run_until_complete(run())
+
+        # assert
+        stages = pymatrix.tracing.TraceStageEnum
+        assert report.stages[stages.Send][0] == 3
+        assert report.stages[stages.Deserialise][0] == 3
+        assert report.io_time >= 0.03
+        assert 0 < report.serialisation_time < report.io_time
+        assert len(reports) >= 1
+        assert not client.profiler.running
+        assert not client.api.tracer.active
+
+    @testmethod
+    def T_client_profiling_traces_sync(self):
+        # arrange
+        client = pymatrix.client.ClientFactory.get_client(
+            pymatrix.api.RestApi(backend=FakeBackend(matrix_handler)),
+            profiling=pymatrix.profiling.ProfilingOptions(
+                report_interval=None))
+
+        async def run():
+            await client.connect("localhost")
+            events = client.read_events()
+            try:
+                for i in range(0, 2):
+                    await events.__anext__()
+            finally:
+                await events.aclose()
+            report = client.profiler.report()
+            await client.logout()
+            return report
+
+        # act
+        report = asyncio.get_event_loop().run_until_complete(run())
+
+        # assert
+        stages = pymatrix.tracing.TraceStageEnum
+        assert report.stages[stages.Serialise][0] == 3
+        assert report.stages[stages.Decode][0] == 2
+        assert report.stages[stages.Deserialise][0] == 2
+        assert stages.Send not in report.stages
+
+    @testmethod
+    def T_client_profiling_gives_tracer_to_http_backend(self):
+        # act
+        client = pymatrix.client.ClientFactory.get_client(
+            pymatrix.api.RestApi(),
+            profiling=pymatrix.profiling.ProfilingOptions())
+
+        # assert
+        assert client.api.tracer is not None
+        assert client.api.backend.tracer is client.api.tracer
+
+    @testmethod
+    def T_profiler_stops_when_connect_or_logout_fails(self):
+        # arrange
+        client = pymatrix.client.ClientFactory.get_client(
+            pymatrix.api.RestApi(backend=FailingBackend(matrix_handler)),
+            profiling=pymatrix.profiling.ProfilingOptions(
+                report_interval=None))
+        errors = []
+
+        async def run():
+            try:
+                await client.connect("localhost")
+            except OSError as e:
+                errors.append(e)
+            running_after_connect = client.profiler.running
+            client.profiler.start()
+            try:
+                await client.logout()
+            except OSError as e:
+                errors.append(e)
+            return running_after_connect
+
+        # act
+        running_after_connect = asyncio.get_event_loop().run_until_complete(
+            run())
+
+        # assert
+        assert len(errors) == 2
+        assert not running_after_connect
+        assert not client.profiler.running
+
+    @testmethod
+    def T_profile_window_collects_cprofile_stats(self):
+        # arrange
+        profiler = pymatrix.profiling.Profiler()
+        path = os.path.join(tempfile.mkdtemp(), "window.prof")
+
+        async def work():
+            for i in range(0, 5):
+                busy_work()
+                await asyncio.sleep(0.01)
+
+        async def run():
+            task = asyncio.ensure_future(work())
+            stats = await profiler.profile(0.1, path)
+            await task
+            return stats
+
+        # act
+        stats = asyncio.get_event_loop().run_until_complete(run())
+
+        # assert
+        assert any(function == "busy_work"
+            for filename, line, function in stats.stats)
+        assert any(function == "busy_work"
+            for filename, line, function in pstats.Stats(path).stats)
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
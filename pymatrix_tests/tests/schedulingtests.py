@@ -0,0 +1,144 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.tests.helpers.fake_backend import FakeBackend
+import pymatrix.api
+import pymatrix.backend.http
+import pymatrix.constants
+import pymatrix.scheduling
+import pymatrix.specification.r0.login
+import asyncio
+import time
+
+rate_limited_body = \
+    b'{"errcode": "M_LIMIT_EXCEEDED", "error": "Too many requests", ' \
+    b'"retry_after_ms": 20}'
+login_body = b'{"user_id": "@me:localhost", "access_token": "ABC"}'
+
+class TokenBucketTests(TestClassBase):
+
+    def _make_bucket(self, rate, capacity):
+        return pymatrix.scheduling.TokenBucket(rate, capacity, min_rate=1,
+            max_rate=1000, increase_step=1, decrease_factor=0.5)
+
+    @testmethod
+    def T_acquire_beyond_capacity_waits_for_rate(self):
+        # arrange
+        bucket = self._make_bucket(rate=100, capacity=2)
+
+        async def acquire_many():
+            for i in range(0, 5):
+                await bucket.acquire()
+
+        # act
+        start = time.monotonic()
+        asyncio.get_event_loop().run_until_complete(acquire_many())
+        elapsed = time.monotonic() - start
+
+        # assert: 2 tokens available at once, 3 more at 100 per second
+        assert elapsed >= 0.025
+
+    @testmethod
+    def T_penalise_cuts_rate_and_blocks(self):
+        # arrange
+        bucket = self._make_bucket(rate=100, capacity=2)
+
+        # act
+        bucket.penalise(0.03)
+        start = time.monotonic()
+        asyncio.get_event_loop().run_until_complete(bucket.acquire())
+        elapsed = time.monotonic() - start
+
+        # assert
+        assert bucket.rate == 50
+        assert elapsed >= 0.03
+
+class RateLimitSchedulerTests(TestClassBase):
+
+    def test_method_init(self):
+        self.responses = []
+        self.backend = FakeBackend(lambda message: self.responses.pop(0))
+        self.scheduler = pymatrix.scheduling.RateLimitScheduler(
+            initial_rate=100, burst=5)
+        self.api = pymatrix.api.RestApi(backend=self.backend,
+            scheduler=self.scheduler)
+
+    def _login(self):
+        return asyncio.get_event_loop().run_until_complete(
+            self.api.login("me", "password"))
+
+    @testmethod
+    def T_rate_limited_request_retried_after_delay(self):
+        # arrange
+        self.responses = [(429, rate_limited_body), (200, login_body)]
+
+        # act
+        start = time.monotonic()
+        response = self._login()
+        elapsed = time.monotonic() - start
+
+        # assert
+        assert isinstance(response,
+            pymatrix.specification.r0.login.LoginResponseMessage)
+        assert len(self.backend.messages) == 2
+        assert elapsed >= 0.02
+        assert self.scheduler.statistics.rate_limited == 1
+        assert self.scheduler.get_bucket(
+            pymatrix.constants.EndpointNamesEnum.Login).rate < 100
+
+    @testmethod
+    def T_too_many_rate_limits_return_error(self):
+        # arrange
+        self.scheduler = pymatrix.scheduling.RateLimitScheduler(
+            initial_rate=100, max_retries=1)
+        self.api = pymatrix.api.RestApi(backend=self.backend,
+            scheduler=self.scheduler)
+        self.responses = [(429, rate_limited_body), (429, rate_limited_body)]
+
+        # act
+        response = self._login()
+
+        # assert
+        assert response.errcode == "M_LIMIT_EXCEEDED"
+        assert response.retry_after_ms == 20
+        assert len(self.backend.messages) == 2
+
+    @testmethod
+    def T_other_errors_not_retried(self):
+        # arrange
+        self.responses = [(403, b'{"errcode": "M_FORBIDDEN"}')]
+
+        # act
+        response = self._login()
+
+        # assert
+        assert response.errcode == "M_FORBIDDEN"
+        assert self.scheduler.statistics.rate_limited == 0
+
+    @testmethod
+    def T_rate_limit_without_delay_uses_default_and_decodes_once(self):
+        # arrange
+        self.scheduler = pymatrix.scheduling.RateLimitScheduler(
+            initial_rate=100, max_retries=0)
+        self.api = pymatrix.api.RestApi(backend=self.backend,
+            scheduler=self.scheduler)
+        self.responses = [(429,
+            b'{"errcode": "M_LIMIT_EXCEEDED", "retry_after_ms": null}')]
+        codec = self.api._serialiser.codec
+        decoded = []
+        def recording_decode(raw_data):
+            decoded.append(raw_data)
+            return type(codec).decode(codec, raw_data)
+        codec.decode = recording_decode
+
+        # act
+        try:
+            response = self._login()
+        finally:
+            del codec.decode
+
+        # assert
+        assert response.errcode == "M_LIMIT_EXCEEDED"
+        assert len(decoded) == 1
+        assert self.scheduler.statistics.rate_limited == 1
+        assert self.api._get_retry_after(pymatrix.backend.http.Response(
+            b'{"errcode": "M_LIMIT_EXCEEDED", "retry_after_ms": null}',
+            True, 429)) == pymatrix.api.DEFAULT_RETRY_AFTER_MS / 1000
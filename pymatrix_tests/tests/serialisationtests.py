@@ -2,7 +2,9 @@ from pymatrix_tests.framework.fixture import TestClassBase, testmethod
 from pymatrix_tests.framework.asserts import Assert
 import pymatrix.serialisation
 import pymatrix.error
+import gc
 import inspect
+import weakref
 
 def get_member_by_name(obj, name):
     eligible_members = [member[1] for member in inspect.getmembers(obj)\
@@ -143,6 +145,98 @@ class SerialisationTests(TestClassBase):
         # assert
         assert not result
 
+    @testmethod
+    def T_get_serialisation_plan_same_type_returns_cached_plan(self):
+        # arrange
+        class CustomType:
+            @pymatrix.serialisation.serialisable
+            def int_member(self): return 123
+
+        # act
+        first_plan = pymatrix.serialisation.get_serialisation_plan(CustomType)
+        second_plan = pymatrix.serialisation.get_serialisation_plan(CustomType)
+
+        # assert
+        assert first_plan is second_plan
+        assert [field.name for field in first_plan.fields] == ["int_member"]
+
+    @testmethod
+    def T_invalidate_serialisation_plan_rebuilds_plan(self):
+        # arrange
+        class CustomType:
+            @pymatrix.serialisation.serialisable
+            def int_member(self): return 123
+        first_plan = pymatrix.serialisation.get_serialisation_plan(CustomType)
+        CustomType.other_member = pymatrix.serialisation.serialisable(
+            lambda self: "other")
+
+        # act
+        pymatrix.serialisation.invalidate_serialisation_plan(CustomType)
+        second_plan = pymatrix.serialisation.get_serialisation_plan(CustomType)
+
+        # assert
+        assert first_plan is not second_plan
+        assert [field.name for field in second_plan.fields] == \
+            ["int_member", "other_member"]
+
+    @testmethod
+    def T_get_serialisation_plan_does_not_keep_type_alive(self):
+        # arrange
+        class CustomType:
+            @pymatrix.serialisation.serialisable
+            def int_member(self): return 123
+        plan = weakref.ref(
+            pymatrix.serialisation.get_serialisation_plan(CustomType))
+
+        # act
+        del CustomType
+        gc.collect()
+
+        # assert
+        assert plan() is None
+
+    @testmethod
+    def T_serialisable_class_slots_instances_have_no_dict(self):
+        # arrange
+        @pymatrix.serialisation.serialisable_class(slots=True)
+        class CustomType:
+            @pymatrix.serialisation.serialisable
+            def int_member(self): return self._int_member
+            @int_member.setter
+            def int_member(self, value): self._int_member = value
+            @pymatrix.serialisation.serialisable
+            def computed_member(self): return self._value * 2
+
+        # act
+        obj = CustomType()
+        obj.int_member = 1
+
+        # assert
+        assert CustomType.__slots__ == ("_computed_member", "_int_member")
+        assert not hasattr(obj, "__dict__")
+        assert obj.int_member == 1
+
+    @testmethod
+    def T_serialisable_class_slots_keeps_super_calls_working(self):
+        # arrange
+        class BaseType:
+            def __init__(self): self.base_member = 1
+        @pymatrix.serialisation.serialisable_class(slots=True,
+            extra_slots=("_other",))
+        class CustomType(BaseType):
+            def __init__(self):
+                super().__init__()
+                self._other = 2
+            @pymatrix.serialisation.serialisable
+            def int_member(self): return self._other
+
+        # act
+        obj = CustomType()
+
+        # assert
+        assert obj.base_member == 1
+        assert obj.int_member == 2
+
 class SerialisablePropertyTests(TestClassBase):
 
     @testmethod
@@ -419,6 +513,56 @@ class JsonSerialiserTests(TestClassBase):
         # act
         obj = self._serialiser.deserialise(flat_json, FlatType)
 
+    @testmethod
+    def T_deserialise_flat_json_ignore_unknown_members_skip_missing(self):
+        # arrange
+        flat_json = {"member_one": 1, "member_two": "two"}
+        @pymatrix.serialisation.serialisable_class(
+            ignore_unknown_members=True)
+        class FlatType:
+            @pymatrix.serialisation.serialisable
+            def member_one(self): return self._member_one
+            @member_one.setter
+            def member_one(self, value): self._member_one = value
+
+        # act
+        obj = self._serialiser.deserialise(flat_json, FlatType)
+        generated_obj = pymatrix.serialisation.JsonSerialiser(
+            generate_code=True).deserialise(flat_json, FlatType)
+
+        # assert
+        assert obj.member_one == 1
+        assert generated_obj.member_one == 1
+
+    @testmethod
+    def T_deserialise_into_slotted_type(self):
+        # arrange
+        complex_json = {"member_one": 1, "member_two": {"sub_member": "abc"}}
+        @pymatrix.serialisation.serialisable_class(slots=True)
+        class SubType:
+            @pymatrix.serialisation.serialisable
+            def sub_member(self): return self._sub_member
+            @sub_member.setter
+            def sub_member(self, value): self._sub_member = value
+        @pymatrix.serialisation.serialisable_class(slots=True)
+        class ComplexType:
+            @pymatrix.serialisation.serialisable
+            def member_one(self): return self._member_one
+            @member_one.setter
+            def member_one(self, value): self._member_one = value
+            @pymatrix.serialisation.serialisable(SubType)
+            def member_two(self): return self._member_two
+            @member_two.setter
+            def member_two(self, value): self._member_two = value
+
+        # act
+        obj = self._serialiser.deserialise(complex_json, ComplexType)
+
+        # assert
+        assert obj.member_one == 1
+        assert obj.member_two.sub_member == "abc"
+        assert self._serialiser.serialise(obj) == complex_json
+
     @testmethod
     @Assert.expectexceptiontype(pymatrix.error.SerialisationError)
     def T_deserialise_flat_json_target_type_non_serable_member_throw(self):
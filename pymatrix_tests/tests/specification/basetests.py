@@ -67,3 +67,88 @@ class SpecificationBaseTests(TestClassBase):
 
         # assert
         assert isinstance(req, MessageType1)
+
+    @testmethod
+    def T_message_code_type_not_shared_between_specifications(self):
+        # arrange
+        class MessageType1: pass
+        class CustomSpec(pymatrix.specification.base.SpecificationBase):
+            def _define_message_types(self):
+                self.message_code_type["type1"] = MessageType1
+        class OtherSpec(pymatrix.specification.base.SpecificationBase):
+            def _define_message_types(self): pass
+
+        # act
+        CustomSpec()
+        other_spec = OtherSpec()
+
+        # assert
+        assert other_spec.message_code_type == {}
+
+    @testmethod
+    def T_get_route_return_compiled_route(self):
+        # arrange
+        class RequestType: pass
+        class ResponseType: pass
+        class ErrorType: pass
+        class CustomSpec(pymatrix.specification.base.SpecificationBase):
+            def _define_message_types(self):
+                self.message_code_type = {
+                    "type1": (RequestType, ResponseType, ErrorType)}
+            def _get_transport_options(self, message_code):
+                return {"http": {"endpoint": "/path/{user_id}",
+                    "method": "PUT"}}
+
+        # act
+        route = CustomSpec().get_route("type1")
+
+        # assert
+        assert route.request_type == RequestType
+        assert route.response_type == ResponseType
+        assert route.error_type == ErrorType
+        assert route.method == "PUT"
+        assert route.path == "/path/{user_id}"
+        assert route.idempotent is None
+        assert route.format_path(user_id="@me:local host") == \
+            "/path/%40me%3Alocal%20host"
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SpecificationError)
+    def T_get_route_not_found_throw(self):
+        # arrange
+        class CustomSpec(pymatrix.specification.base.SpecificationBase):
+            def _define_message_types(self): pass
+
+        # act
+        CustomSpec().get_route("type1")
+
+    @testmethod
+    @Assert.expectexceptiontype(pymatrix.error.SpecificationError)
+    def T_get_route_without_error_type_throw(self):
+        # arrange
+        class RequestType: pass
+        class ResponseType: pass
+        class CustomSpec(pymatrix.specification.base.SpecificationBase):
+            def _define_message_types(self):
+                self.message_code_type = {
+                    "type1": (RequestType, ResponseType)}
+
+        # act
+        CustomSpec().get_route("type1")
+
+    @testmethod
+    def T_frozen_transport_options_are_read_only(self):
+        # arrange
+        options = pymatrix.specification.base.freeze_transport_options(
+            {"http": {"endpoint": "/path", "method": "GET"}})
+
+        # act
+        try:
+            options["http"]["method"] = "POST"
+            raised = False
+        except TypeError:
+            raised = True
+
+        # assert
+        assert raised
+        assert options["http"]["method"] == "GET"
@@ -0,0 +1,45 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+import pymatrix.constants
+import pymatrix.serialisation
+import pymatrix.specification.r0
+import pymatrix.specification.r0.login
+
+class R0SpecificationTests(TestClassBase):
+
+    def test_method_init(self):
+        self._specification = pymatrix.specification.r0.Specification()
+
+    @testmethod
+    def T_get_route_login_return_post_route(self):
+        # act
+        route = self._specification.get_route(
+            pymatrix.constants.EndpointNamesEnum.Login)
+
+        # assert
+        assert route.request_type == \
+            pymatrix.specification.r0.login.LoginRequestMessage
+        assert route.method == "POST"
+        assert route.path == "/_matrix/client/r0/login"
+
+    @testmethod
+    def T_every_message_type_has_a_route(self):
+        for message_code in self._specification.message_code_type:
+            # act
+            route = self._specification.get_route(message_code)
+
+            # assert
+            assert route.method is not None
+            assert route.path.startswith("/_matrix/")
+
+    @testmethod
+    def T_only_get_routes_are_cached(self):
+        for message_code in self._specification.message_code_type:
+            # act
+            route = self._specification.get_route(message_code)
+
+            # assert
+            assert route.cache_ttl is None or route.method == "GET"
+        assert self._specification.get_route(
+            pymatrix.constants.EndpointNamesEnum.Versions).cache_ttl > 0
+        assert self._specification.get_route(
+            pymatrix.constants.EndpointNamesEnum.Sync).cache_ttl is None
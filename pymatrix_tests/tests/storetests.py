@@ -0,0 +1,151 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+import pymatrix.specification.r0.sync
+import pymatrix.store
+import os
+import tempfile
+
+def member_event(user_id, membership):
+    return {"type": "m.room.member", "state_key": user_id,
+        "sender": user_id, "content": {"membership": membership}}
+
+def name_event(name):
+    return {"type": "m.room.name", "state_key": "",
+        "sender": "@user:localhost", "content": {"name": name}}
+
+class IterStateEventsTests(TestClassBase):
+
+    @testmethod
+    def T_iter_state_events_returns_state_events_in_order(self):
+        # arrange
+        rooms = pymatrix.specification.r0.sync.RoomsMessage(
+            join={"!a:localhost": {
+                "state": {"events": [name_event("before")]},
+                "timeline": {"events": [
+                    {"type": "m.room.message", "content": {"body": "hi"}},
+                    name_event("after")]}}},
+            invite={"!b:localhost": {"invite_state": {"events": [
+                member_event("@user:localhost", "invite")]}}})
+
+        # act
+        events = list(pymatrix.store.iter_state_events(rooms))
+
+        # assert
+        assert events == [
+            ("!a:localhost", name_event("before")),
+            ("!a:localhost", name_event("after")),
+            ("!b:localhost", member_event("@user:localhost", "invite"))]
+
+class StateStoreTestsBase(TestClassBase):
+    """
+    Tests shared by every store, which is built by make_store
+    """
+    store = None
+
+    def make_store(self): pass
+
+    def test_method_init(self):
+        self.store = self.make_store()
+
+    def test_method_cleanup(self):
+        self.store.close()
+
+    @testmethod
+    def T_session_round_trip(self):
+        # act
+        self.store.set_session("@user:localhost", "ABCDE", "DEVICE")
+
+        # assert
+        assert self.store.get_session() == {"user_id": "@user:localhost",
+            "access_token": "ABCDE", "device_id": "DEVICE",
+            "home_server": None}
+        self.store.clear_session()
+        assert self.store.get_session() is None
+
+    @testmethod
+    def T_save_sync_applies_state_and_token(self):
+        # arrange
+        assert self.store.get_sync_token() is None
+
+        # act
+        self.store.save_sync("s1", [
+            ("!a:localhost", name_event("first")),
+            ("!a:localhost", member_event("@user:localhost", "join"))])
+        self.store.save_sync("s2", [("!a:localhost", name_event("second"))])
+
+        # assert
+        assert self.store.get_sync_token() == "s2"
+        assert self.store.get_state_event("!a:localhost", "m.room.name") \
+            == name_event("second")
+        assert self.store.get_room_state("!a:localhost") == {
+            ("m.room.name", ""): name_event("second"),
+            ("m.room.member", "@user:localhost"):
+                member_event("@user:localhost", "join")}
+        assert self.store.get_room_state("!b:localhost") == {}
+        assert self.store.get_state_event("!b:localhost", "m.room.name") \
+            is None
+
+    @testmethod
+    def T_clear_forgets_everything(self):
+        # arrange
+        self.store.set_session("@user:localhost", "ABCDE")
+        self.store.save_sync("s1", [("!a:localhost", name_event("name"))])
+
+        # act
+        self.store.clear()
+
+        # assert
+        assert self.store.get_session() is None
+        assert self.store.get_sync_token() is None
+        assert self.store.get_room_state("!a:localhost") == {}
+
+class MemoryStateStoreTests(StateStoreTestsBase):
+
+    def make_store(self):
+        return pymatrix.store.MemoryStateStore()
+
+class SqliteStateStoreTests(StateStoreTestsBase):
+
+    directory = None
+
+    def make_store(self):
+        self.directory = tempfile.TemporaryDirectory()
+        return pymatrix.store.SqliteStateStore(
+            os.path.join(self.directory.name, "state.db"))
+
+    def test_method_cleanup(self):
+        super().test_method_cleanup()
+        self.directory.cleanup()
+
+    @testmethod
+    def T_state_survives_reopening(self):
+        # arrange
+        self.store.set_session("@user:localhost", "ABCDE")
+        self.store.save_sync("s1", [("!a:localhost", name_event("name"))])
+        self.store.close()
+
+        # act
+        self.store = pymatrix.store.SqliteStateStore(
+            os.path.join(self.directory.name, "state.db"))
+
+        # assert
+        assert self.store.get_session()["access_token"] == "ABCDE"
+        assert self.store.get_sync_token() == "s1"
+        assert self.store.get_state_event("!a:localhost", "m.room.name") \
+            == name_event("name")
+
+    @testmethod
+    def T_save_sync_is_atomic(self):
+        # arrange
+        self.store.save_sync("s1", [("!a:localhost", name_event("first"))])
+
+        # act
+        try:
+            self.store.save_sync("s2", [("!a:localhost", name_event("second")),
+                ("!a:localhost", {"type": "m.room.topic"})])
+        except KeyError:
+            pass
+
+        # assert
+        assert self.store.get_sync_token() == "s1"
+        assert self.store.get_state_event("!a:localhost", "m.room.name") \
+            == name_event("first")
@@ -0,0 +1,132 @@
+from pymatrix_tests.framework.fixture import TestClassBase, testmethod
+from pymatrix_tests.tests.helpers.fake_backend import FakeBackend
+import pymatrix.api
+import pymatrix.constants
+import pymatrix.tracing
+import asyncio
+import json
+
+def login_handler(message):
+    user = json.loads(message.body)["user"]
+    return (200, json.dumps({"user_id": "@{}:localhost".format(user),
+        "access_token": "token_{}".format(user)}).encode("utf-8"))
+
+class RecordingObserver(pymatrix.tracing.TraceObserverBase):
+    def __init__(self):
+        self.stages = []
+
+    def on_stage(self, stage, duration, size=None, endpoint=None):
+        self.stages.append((stage, size, endpoint))
+
+class TracerTests(TestClassBase):
+
+    def test_method_init(self):
+        self.tracer = pymatrix.tracing.Tracer()
+        self.api = pymatrix.api.RestApi(backend=FakeBackend(login_handler),
+            tracer=self.tracer)
+
+    def _login(self):
+        return asyncio.get_event_loop().run_until_complete(
+            self.api.generic_call(pymatrix.constants.EndpointNamesEnum.Login,
+                user="user", password="password"))
+
+    @testmethod
+    def T_tracer_without_observers_is_inactive(self):
+        # act
+        response = self._login()
+
+        # assert
+        assert not self.tracer.active
+        assert response.user_id == "@user:localhost"
+
+    @testmethod
+    def T_generic_call_emits_every_stage_in_order(self):
+        # arrange
+        observer = RecordingObserver()
+        self.tracer.add_observer(observer)
+
+        # act
+        response = self._login()
+
+        # assert
+        stages = pymatrix.tracing.TraceStageEnum
+        assert response.user_id == "@user:localhost"
+        assert [stage for stage, size, endpoint in observer.stages] == [
+            stages.Build, stages.Serialise, stages.Send, stages.Decode,
+            stages.Deserialise]
+        assert all(endpoint == pymatrix.constants.EndpointNamesEnum.Login
+            for stage, size, endpoint in observer.stages)
+        assert observer.stages[1][1] > 0
+        assert observer.stages[2][1] == observer.stages[3][1] > 0
+
+    @testmethod
+    def T_removed_observer_is_no_longer_called(self):
+        # arrange
+        observer = RecordingObserver()
+        self.tracer.add_observer(observer)
+        self._login()
+
+        # act
+        self.tracer.remove_observer(observer)
+        self._login()
+
+        # assert
+        assert len(observer.stages) == 5
+        assert not self.tracer.active
+
+    @testmethod
+    def T_failing_observer_does_not_fail_the_call(self):
+        # arrange
+        class FailingObserver(pymatrix.tracing.TraceObserverBase):
+            def on_stage(self, stage, duration, size=None, endpoint=None):
+                raise ValueError("failing observer")
+        observer = RecordingObserver()
+        self.tracer.add_observer(FailingObserver())
+        self.tracer.add_observer(observer)
+
+        # act
+        response = self._login()
+
+        # assert
+        assert response.user_id == "@user:localhost"
+        assert len(observer.stages) == 5
+        assert self.tracer.observer_errors == 5
+
+    @testmethod
+    def T_formatted_message_is_traced_by_endpoint_code(self):
+        # arrange
+        endpoint_code = pymatrix.constants.EndpointNamesEnum.Sync
+        route = self.api._specification.get_route(endpoint_code)
+
+        # act
+        message = self.api.format_message(
+            route.request_type(since="s1", timeout=100), route)
+
+        # assert
+        assert message.url.startswith(route.path + "?")
+        assert message.endpoint == endpoint_code
+
+    @testmethod
+    def T_histogram_observer_aggregates_per_stage_and_endpoint(self):
+        # arrange
+        observer = pymatrix.tracing.HistogramObserver(bucket_bounds=(0.1, 1.0))
+        stages = pymatrix.tracing.TraceStageEnum
+
+        # act
+        observer.on_stage(stages.Send, 0.05, 10, "a")
+        observer.on_stage(stages.Send, 0.5, 20, "a")
+        observer.on_stage(stages.Send, 2.0, 30, "b")
+        observer.on_stage(stages.Decode, 0.01, 30, "b")
+
+        # assert
+        histogram = observer.get_histogram(stages.Send, "a")
+        assert histogram.count == 2
+        assert histogram.size_total == 30
+        assert histogram.buckets == {0.1: 1, 1.0: 2}
+        merged = observer.get_histogram(stages.Send)
+        assert merged.count == 3
+        assert merged.duration_max == 2.0
+        assert merged.buckets == {0.1: 1, 1.0: 2}
+        assert observer.get_histogram(stages.Build) is None
+        assert set(observer.as_dict()) == set(["send", "decode"])
+        assert observer.as_dict()["send"]["b"]["count"] == 1
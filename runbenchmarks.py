@@ -0,0 +1,64 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+from benchmarks.framework import BenchmarkRunner, DEFAULT_ITERATIONS
+from benchmarks.serialisationsuite import SerialisationBenchmarks
+from benchmarks.apisuite import GenericCallBenchmarks
+from benchmarks.httpsuite import HttpRoundTripBenchmarks
+
+classes_to_benchmark = [
+    SerialisationBenchmarks,
+    GenericCallBenchmarks,
+    HttpRoundTripBenchmarks
+    ]
+
+def _get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+parser = argparse.ArgumentParser(description="Runs the pymatrix benchmarks.")
+parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS,
+    help="operations timed per benchmark")
+parser.add_argument("--filter", default=None,
+    help="only run the benchmarks whose name contains this string")
+parser.add_argument("--output", default=None,
+    help="file to save the results to, as JSON")
+parser.add_argument("--compare", default=None,
+    help="results file of a previous run to compare with")
+arguments = parser.parse_args()
+
+previous = None
+if(arguments.compare is not None):
+    with open(arguments.compare) as previous_file:
+        previous = json.load(previous_file)["benchmarks"]
+
+runner = BenchmarkRunner(arguments.iterations, name_filter=arguments.filter)
+
+results = []
+for benchmarkclass in classes_to_benchmark:
+    for result in runner.run_from_class(benchmarkclass):
+        results.append(result)
+        line = repr(result)
+        if(previous is not None and result.name in previous):
+            line += " ({:+.1f}% ops/s)".format(
+                (result.ops_per_second
+                    / previous[result.name]["ops_per_second"] - 1) * 100)
+        print(line)
+
+print("Ran {} benchmarks.".format(len(results)))
+
+if(arguments.output is not None):
+    with open(arguments.output, "w") as output_file:
+        json.dump({
+            "commit": _get_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "iterations": arguments.iterations,
+            "benchmarks": dict((result.name, result.as_dict())
+                for result in results)
+            }, output_file, indent=4)
@@ -2,15 +2,70 @@ import traceback
 from pymatrix_tests.framework.fixture import TestRunner, TestStatusEnum
 from pymatrix_tests.tests.serialisationtests import SerialisationTests, \
     SerialisablePropertyTests, JsonSerialiserTests
+from pymatrix_tests.tests.lazyserialisationtests import \
+    LazyJsonSerialiserTests
+from pymatrix_tests.tests.codegentests import CodegenTests, \
+    GeneratedJsonSerialiserTests
+from pymatrix_tests.tests.codectests import CodecTests, \
+    SerialiserCodecTests, IncrementalJsonDecoderTests
+from pymatrix_tests.tests.specification.r0test import R0SpecificationTests
+from pymatrix_tests.tests.apitests import ApiBaseTests
+from pymatrix_tests.tests.schedulingtests import TokenBucketTests, \
+    RateLimitSchedulerTests
+from pymatrix_tests.tests.backend.retrytests import RetryPolicyTests
+from pymatrix_tests.tests.storetests import IterStateEventsTests, \
+    MemoryStateStoreTests, SqliteStateStoreTests
+from pymatrix_tests.tests.cachetests import RoomStateCacheTests, \
+    ResponseCacheTests
+from pymatrix_tests.tests.coalescingtests import SingleFlightTests
+from pymatrix_tests.tests.clienttests import ClientStoreTests
+from pymatrix_tests.tests.pooltests import ClientPoolTests
+from pymatrix_tests.tests.monitoringtests import LoopLagMonitorTests
+from pymatrix_tests.tests.tracingtests import TracerTests
+from pymatrix_tests.tests.metricstests import ClientMetricsTests
+from pymatrix_tests.tests.profilingtests import ProfilerTests
+from pymatrix_tests.tests.lazytests import LazyImportTests
 from pymatrix_tests.tests.specification.basetests import SpecificationBaseTests
 from pymatrix_tests.integration_tests.logintests import LoginTests
+from pymatrix_tests.integration_tests.backendtests import HttpBackendTests
+from pymatrix_tests.integration_tests.streamingtests import StreamingTests
+from pymatrix_tests.integration_tests.synctests import SyncTests
+from pymatrix_tests.integration_tests.workertests import WorkerSupervisorTests
 
 classes_to_test = [
     SerialisationTests,
     SerialisablePropertyTests,
     JsonSerialiserTests,
+    LazyJsonSerialiserTests,
+    CodegenTests,
+    GeneratedJsonSerialiserTests,
+    CodecTests,
+    SerialiserCodecTests,
+    IncrementalJsonDecoderTests,
     SpecificationBaseTests,
-    LoginTests
+    R0SpecificationTests,
+    ApiBaseTests,
+    TokenBucketTests,
+    RateLimitSchedulerTests,
+    RetryPolicyTests,
+    IterStateEventsTests,
+    MemoryStateStoreTests,
+    SqliteStateStoreTests,
+    RoomStateCacheTests,
+    ResponseCacheTests,
+    SingleFlightTests,
+    ClientStoreTests,
+    ClientPoolTests,
+    LoopLagMonitorTests,
+    TracerTests,
+    ClientMetricsTests,
+    ProfilerTests,
+    LazyImportTests,
+    LoginTests,
+    HttpBackendTests,
+    StreamingTests,
+    SyncTests,
+    WorkerSupervisorTests
     ]
 
 runner = TestRunner()